@@ -0,0 +1,114 @@
+"""
+Compare the compact classifier artifact (fold boosters + Platt coefficients,
+JSON) with the five-fold CalibratedClassifierCV joblib it is exported from.
+
+A calibrated model is trained on one synthetic season (the same setup as the
+calibrated_predict_proba case in run_benchmarks.py), exported with its
+training rows as reference, and scored on a second, unseen season.
+
+    python backend/benchmarks/bench_compact_model.py [--repeat 200]
+
+Load times are measured in a fresh interpreter, imports included, since that
+is what a cold start pays.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import run_benchmarks
+from synthetic import synthetic_season, to_individual
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+LOADERS = {
+    'joblib':  "import joblib; joblib.load({path!r})",
+    'compact': "from src.mlb.compact_model import CompactClassifier; CompactClassifier.load({path!r})",
+}
+
+
+def cold_load(kind: str, path: str, repeat: int = 3) -> float:
+    """Best wall time to start Python, import what the loader needs and load ``path``."""
+    code = f"import time; t = time.perf_counter(); {LOADERS[kind].format(path=path)}; print(time.perf_counter() - t)"
+    env = {**os.environ, "PYTHONPATH": BACKEND}
+    runs = [float(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                                 text=True, check=True).stdout) for _ in range(repeat)]
+    return min(runs)
+
+
+def per_call_ms(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact classifier artifact vs. the calibrated joblib.")
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 15, 1000])
+    args = parser.parse_args()
+
+    import warnings
+    warnings.filterwarnings("ignore")
+    run_benchmarks.stub_network()
+    from src.mlb.compact_model import CompactClassifier, export_compact
+    from src.mlb.features import FEATURES
+    from src.mlb.load_process import get_opponent_features
+    from src.mlb.serve import CalibratedPredictor
+
+    clf = run_benchmarks.calibrated_model()
+    train = run_benchmarks.processed(1).dropna(subset=FEATURES)
+
+    workdir = tempfile.mkdtemp(prefix="bench_compact_")
+    joblib_path = os.path.join(workdir, "mlb_wl_calibrated.joblib")
+    compact_path = os.path.join(workdir, "mlb_wl_compact.json")
+    joblib.dump(clf, joblib_path)
+    meta = export_compact(clf, compact_path, train[FEATURES])
+    compact = CompactClassifier.load(compact_path)
+    fast = CalibratedPredictor(clf)
+
+    print(f"artifact size     joblib {os.path.getsize(joblib_path) / 1e6:7.2f} MB   "
+          f"compact {os.path.getsize(compact_path) / 1e6:7.2f} MB")
+    print(f"cold load         joblib {cold_load('joblib', joblib_path):7.3f} s    "
+          f"compact {cold_load('compact', compact_path):7.3f} s")
+
+    # Unseen rows: a season generated with a different seed
+    test = get_opponent_features(to_individual(synthetic_season(2024, seed=7), 2024, seed=7))
+    test = test.dropna(subset=FEATURES)
+    X_frame = test[FEATURES]
+    X = np.ascontiguousarray(X_frame.to_numpy(dtype=float))
+
+    print("per-batch latency (ms)    predict_proba   fold fast path   compact")
+    for n in args.batches:
+        rows = min(n, len(X))
+        sk = per_call_ms(lambda: clf.predict_proba(X_frame.iloc[:rows]), max(args.repeat // 10, 5))
+        ff = per_call_ms(lambda: fast.predict(X[:rows]), args.repeat)
+        cp = per_call_ms(lambda: compact.predict(X[:rows]), args.repeat)
+        print(f"  {rows:>5} rows              {sk:9.3f}      {ff:9.3f}      {cp:9.3f}")
+
+    expected = clf.predict_proba(X_frame)[:, 1]
+    got = compact.predict(X)
+    diff = np.abs(got - expected)
+    flipped = (got >= 0.5) != (expected >= 0.5)
+    # Synthetic outcomes are close to coin flips, so most rows sit near 0.5;
+    # flips among the ensemble's more confident half of picks matter more
+    margin = np.abs(expected - 0.5)
+    sure = margin >= np.median(margin)
+    print(f"agreement on {len(X)} unseen rows: max |dp| {diff.max():.4f}, mean |dp| {diff.mean():.4f}")
+    print(f"pick flips: {flipped.mean():.2%} of all rows, {flipped[sure].mean():.2%} of the "
+          f"{sure.sum()} rows with |p - 0.5| >= {np.median(margin):.3f}")
+    print(f"agreement on the training rows: {meta['reference_fit']}")
+
+
+if __name__ == '__main__':
+    main()
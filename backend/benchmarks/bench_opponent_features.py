@@ -0,0 +1,82 @@
+"""
+Benchmark get_opponent_features against the previous iterrows implementation.
+
+Builds three synthetic seasons in the processed "_individual" schema (see
+synthetic.py) and times both versions per season.
+
+    python backend/benchmarks/bench_opponent_features.py [--seasons 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.mlb.load_process import get_opponent_features
+from synthetic import synthetic_season, to_individual
+
+
+def synthetic_individual_season(year: int, seed: int = 0) -> pd.DataFrame:
+    """One season of per-team feature rows, two rows per game."""
+    return to_individual(synthetic_season(year, seed=seed), year, seed=seed)
+
+
+def legacy_get_opponent_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The row-by-row implementation get_opponent_features replaced."""
+    all_rows = []
+    teams = df['Tm'].unique()
+    team_schedules = {team: df[df['Tm'] == team].copy() for team in teams}
+    for idx, row in df.iterrows():
+        team = row['Tm']
+        opponent = row['Opp']
+        if opponent not in team_schedules:
+            continue
+        opp_schedule = team_schedules[opponent]
+        opp_game = opp_schedule[
+            (opp_schedule['Opp'] == team) &
+            (opp_schedule['Month'] == row['Month']) &
+            (opp_schedule['DayofWeek'] == row['DayofWeek'])
+        ]
+        if opp_game.empty:
+            continue
+        opp_features = opp_game.iloc[0].drop(['Tm', 'Opp', 'Home_Away', 'W/L', 'R', 'RA', 'W-L', 'D/N', 'Boxscore'])
+        opp_features.index = ['Opp_' + col for col in opp_features.index]
+        all_rows.append(pd.concat([row, opp_features]))
+    return pd.DataFrame(all_rows)
+
+
+def _time(fn, df):
+    start = time.perf_counter()
+    out = fn(df)
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seasons', type=int, default=3)
+    args = parser.parse_args()
+
+    total_old = total_new = 0.0
+    for i in range(args.seasons):
+        year = 2025 - i
+        df = synthetic_individual_season(year, seed=i)
+        t_new, new = _time(get_opponent_features, df)
+        t_old, old = _time(legacy_get_opponent_features, df)
+        total_new += t_new
+        total_old += t_old
+
+        # Every game has exactly one opponent row, doubleheaders included
+        assert len(new) == len(df)
+        assert list(new.columns) == list(old.columns)
+        print(f"{year}: {len(df):>5} rows  iterrows {t_old:8.3f}s  merge {t_new:6.3f}s  "
+              f"x{t_old / t_new:,.0f}")
+
+    print(f"total: iterrows {total_old:.3f}s  merge {total_new:.3f}s  x{total_old / total_new:,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Hyperparameter search for the win/loss classifier: RandomizedSearchCV (full
+1000-tree fits on every fold) against the successive-halving search with
+per-fold early stopping (src/mlb/tuning.py), on synthetic seasons.
+
+Both searches draw the same candidates from train_lgbm_classification_model's
+grid. Quality is the chosen parameters' holdout ROC AUC, after the same
+early-stopped refit that training does.
+
+    python backend/benchmarks/bench_search.py [--seasons 2] [--candidates 25] [--cpus 4]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import RandomizedSearchCV, TimeSeriesSplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import run_benchmarks
+
+PARAM_DIST = {
+    'num_leaves': [31, 63, 127],
+    'max_depth': [-1, 6, 10],
+    'learning_rate': [0.01, 0.05, 0.1],
+    'subsample': [0.7, 0.8, 1.0],
+    'colsample_bytree': [0.7, 0.8, 1.0],
+    'reg_alpha': [0.0, 0.1, 0.5],
+    'reg_lambda': [0.0, 0.1, 0.5],
+}
+BASE_PARAMS = dict(objective='binary', boosting_type='gbdt', n_estimators=1000,
+                   class_weight='balanced', random_state=42)
+
+
+def holdout_auc(params, X_train, y_train, X_test, y_test, threads) -> float:
+    """Early-stopped refit on the last fifth of the training rows, scored on the holdout."""
+    val_idx = int(len(X_train) * 0.8)
+    clf = lgb.LGBMClassifier(**BASE_PARAMS, **params, n_jobs=threads, verbose=-1)
+    clf.fit(X_train.iloc[:val_idx], y_train.iloc[:val_idx],
+            eval_set=[(X_train.iloc[val_idx:], y_train.iloc[val_idx:])], eval_metric='auc',
+            callbacks=[lgb.early_stopping(50, verbose=False)])
+    return roc_auc_score(y_test, clf.predict_proba(X_test)[:, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Randomized vs. successive-halving hyperparameter search.")
+    parser.add_argument('--seasons', type=int, default=2, help="Synthetic seasons of training data")
+    parser.add_argument('--candidates', type=int, default=25)
+    parser.add_argument('--cpus', type=int, default=None)
+    parser.add_argument('--trial-threads', type=int, default=1)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    run_benchmarks.stub_network()
+    from src.mlb.features import FEATURES
+    from src.mlb.lgbm_model import _prepare_features
+    from src.mlb.train_dataset import TrainingData
+    from src.mlb.tuning import cpu_budget, halving_search
+
+    df = run_benchmarks.processed(args.seasons).dropna(subset=FEATURES + ['W/L']).sort_values('Date')
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        X = _prepare_features(df, FEATURES)
+    y = df['W/L']
+    split_idx = int(len(df) * 0.8)
+    X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
+    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
+    cv = TimeSeriesSplit(n_splits=5)
+    workers, threads = cpu_budget(args.cpus, args.trial_threads)
+    print(f"{len(X_train)} training rows, {args.candidates} candidates, {workers} x {threads} threads")
+
+    start = time.perf_counter()
+    search = RandomizedSearchCV(lgb.LGBMClassifier(**BASE_PARAMS, n_jobs=threads, verbose=-1), PARAM_DIST,
+                                n_iter=args.candidates, scoring='roc_auc', cv=cv, n_jobs=workers,
+                                random_state=42)
+    search.fit(X_train, y_train)
+    random_secs = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(open(os.devnull, "w")):
+        # The halving search fits on views of one binned dataset, as in training
+        data = TrainingData(df, X, cache_dir=cache_dir)
+        halving = halving_search(data, 'W/L', BASE_PARAMS, PARAM_DIST, cv, n_candidates=args.candidates,
+                                 cpus=args.cpus, trial_threads=args.trial_threads)
+
+    print("                 wall (s)   fold fits   CV AUC   holdout AUC")
+    rows = [
+        ('random', random_secs, args.candidates * cv.get_n_splits(), search.best_score_, search.best_params_),
+        ('halving', halving['seconds'], halving['fits'], halving['best_score'], halving['best_params']),
+    ]
+    for name, secs, fits, cv_auc, params in rows:
+        test_auc = holdout_auc(params, X_train, y_train, X_test, y_test, workers * threads)
+        print(f"  {name:<12} {secs:9.1f}   {fits:9d}   {cv_auc:6.4f}   {test_auc:11.4f}")
+    print(f"random search picked  {search.best_params_}")
+    print(f"halving search picked {halving['best_params']}")
+    rank = np.argsort(-search.cv_results_['mean_test_score'])
+    picked = [i for i in rank if search.cv_results_['params'][i] == halving['best_params']]
+    if picked:
+        print(f"halving's choice ranks {list(rank).index(picked[0]) + 1} of {len(rank)} by full randomized CV")
+
+
+if __name__ == '__main__':
+    main()
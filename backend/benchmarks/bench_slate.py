@@ -0,0 +1,139 @@
+"""
+Slate prediction latency: predict_for_date against predict_for_date_async
+(auto_predict --async) on a synthetic slate.
+
+Every network call is replaced by a stub that sleeps for a fixed round trip,
+so the numbers show how much of the I/O each mode overlaps, not how fast the
+real sites are. Baseball-Reference's request rate limit (rate_limit.HOST_RATES)
+is not simulated; in a real run it still bounds how quickly previews arrive.
+
+    python backend/benchmarks/bench_slate.py [--games 15] [--preview 0.4] [--stats 0.3]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import MLB_TEAMS, fangraphs_snapshot, starting_pitcher_stats, synthetic_season
+
+
+def preview_html(away: str, home: str) -> str:
+    """A bbref preview page with both probable starters."""
+    def starter(team, name, era):
+        return (f'<div id="sp_{team}_sh"><h2><a href="#">{name}</a><strong></strong></h2></div>'
+                f'<!-- <table id="sp_{team}"><tbody><tr>'
+                f'<td data-stat="earned_run_avg">{era}</td></tr></tbody></table> -->')
+    return f"<html><body>{starter(away, 'Away Starter', '3.50')}{starter(home, 'Home Starter', '4.10')}</body></html>"
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _Model:
+    def predict_proba(self, X):
+        p = np.clip(0.5 + X.fillna(0).to_numpy().sum(axis=1) % 0.2 - 0.1, 0, 1)
+        return np.column_stack([1 - p, p])
+
+
+def stub_slate(games: int, latency: dict) -> str:
+    """Point auto_predict at a synthetic season and slow stubs; returns the slate date."""
+    import src.mlb.auto_predict as ap
+    from src.mlb.storage import apply_schema
+
+    raw = apply_schema(synthetic_season(2025), 'raw', 2025)
+    target = (raw['Date'].max() + timedelta(days=1)).date()
+    teams = MLB_TEAMS[:2 * games]
+    slate = pd.DataFrame([
+        {"Date": target, "D/N": 1, "Tm": home, "Opp": away, "url": f"https://preview/{away}-{home}"}
+        for away, home in zip(teams[0::2], teams[1::2])
+    ])
+    sp = {k: v for k, v in starting_pitcher_stats().items() if k not in ('SP', 'SP_ERA')}
+    snap = fangraphs_snapshot()
+
+    def limited_get(url, **kwargs):
+        time.sleep(latency['preview'])
+        away, home = url.rsplit('/', 1)[1].split('-')
+        return _Response(preview_html(away, home))
+
+    @lru_cache(maxsize=None)
+    def load_war_index(ymd):
+        time.sleep(latency['war'])
+        return {}
+
+    def get_player_stats(name, game_date, year=2025):
+        load_war_index((pd.Timestamp(game_date) - pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+        time.sleep(latency['stats'])
+        return dict(sp)
+
+    def fg_team_snapshot(season, as_of):
+        time.sleep(latency['snapshot'])
+        return snap
+
+    def load_model():
+        time.sleep(latency['model'])
+        return _Model()
+
+    ap.load_dataset = lambda kind, year, **kwargs: raw.copy()
+    ap.get_slate_for_date = lambda d: slate
+    ap.load_processed_data = lambda year: raw[['Date']]
+    ap.limited_get = limited_get
+    ap.load_war_index = load_war_index
+    ap.get_player_stats = get_player_stats
+    ap.fg_team_snapshot = fg_team_snapshot
+    ap._load_model = load_model
+    ap.upload_file_to_bucket = lambda *args, **kwargs: None
+    ap.HISTORY = os.path.join(tempfile.mkdtemp(prefix="bench_slate_"), "pred_history.csv")
+    os.environ.pop("SUPABASE_BUCKET", None)
+    return target.isoformat()
+
+
+def timed(fn) -> tuple:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async slate prediction latency.")
+    parser.add_argument('--games', type=int, default=15)
+    parser.add_argument('--preview', type=float, default=0.4, help="Seconds per preview download")
+    parser.add_argument('--stats', type=float, default=0.3, help="Seconds per get_player_stats call")
+    parser.add_argument('--war', type=float, default=0.5, help="Seconds for the daily WAR archive")
+    parser.add_argument('--snapshot', type=float, default=1.0, help="Seconds for the Fangraphs snapshot")
+    parser.add_argument('--model', type=float, default=0.2, help="Seconds to load the model")
+    args = parser.parse_args()
+
+    latency = {k: getattr(args, k) for k in ('preview', 'stats', 'war', 'snapshot', 'model')}
+    date_str = stub_slate(min(args.games, len(MLB_TEAMS) // 2), latency)
+
+    import src.mlb.auto_predict as ap
+    sync_secs, sync_out = timed(lambda: ap.predict_for_date(date_str))
+    async_secs, async_out = timed(lambda: asyncio.run(ap.predict_for_date_async(date_str)))
+
+    pd.testing.assert_frame_equal(sync_out, async_out)
+    print(f"{len(sync_out) // 2} games, latencies {latency}")
+    print(f"  predict_for_date          {sync_secs:7.2f}s")
+    print(f"  predict_for_date_async    {async_secs:7.2f}s  (x{sync_secs / async_secs:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Startup cost of the backend entry points, measured with ``python -X importtime``.
+
+Each entry point is imported in a fresh interpreter, from an empty working
+directory, so the numbers include every module it pulls in and any file an
+import creates (a cache database, a downloaded CSV, a models folder) is
+reported as a side effect.
+
+    python backend/benchmarks/bench_startup.py
+    python backend/benchmarks/bench_startup.py --modules src.mlb.auto_predict --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_POINTS = [
+    "mlb_pred_pipeline",
+    "src.mlb.auto_predict",
+    "src.mlb.load_process",
+    "src.mlb.lgbm_model",
+    "src.mlb.odds",
+]
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, depth, self_us, cumulative_us) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str) -> dict:
+    """Import ``module`` once in a clean interpreter and working directory."""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND, env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as cwd:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+        created = sorted(os.listdir(cwd))
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    total = next(cum for name, depth, _, cum in rows if name == module and depth == 0)
+    # Cumulative time of each top-level package the entry point pulls in
+    packages = {}
+    for name, depth, _, cum in rows:
+        top = name.split(".")[0]
+        if name == top and top not in ("src", module):
+            packages[top] = max(packages.get(top, 0), cum)
+    return {
+        "seconds": total / 1e6,
+        "modules": len(rows),
+        "packages": packages,
+        "side_effects": created,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the backend entry points.")
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3, help="Keep the fastest of this many runs")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list per entry point")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        results[module] = best
+        print(f"{module:<24} {best['seconds']:7.3f}s  {best['modules']:5d} modules")
+        heaviest = sorted(best["packages"].items(), key=lambda kv: -kv[1])[:args.top]
+        for package, us in heaviest:
+            print(f"    {package:<20} {us / 1e6:7.3f}s")
+        if best["side_effects"]:
+            print(f"    side effects: created {', '.join(best['side_effects'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the compute hot paths, on synthetic data with every
+network call stubbed out.
+
+    python backend/benchmarks/run_benchmarks.py                       # all cases, 1x/10x/100x
+    python backend/benchmarks/run_benchmarks.py --scales 1 10 --cases opponent_features
+    python backend/benchmarks/run_benchmarks.py --save-baseline backend/benchmarks/baseline.json
+    python backend/benchmarks/run_benchmarks.py --baseline backend/benchmarks/baseline.json
+
+Results are written as JSON (--output). With --baseline, every case/scale
+that is slower than the baseline by more than --tolerance is reported as a
+regression and the exit status is 1.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import (
+    fangraphs_snapshot,
+    starting_pitcher_stats,
+    synthetic_raw_schedule,
+    synthetic_season,
+    to_individual,
+)
+
+CASES = {}
+
+
+def case(name, scales=(1, 10, 100)):
+    """Register ``fn(scale) -> run`` where ``run()`` is the timed call."""
+    def register(fn):
+        CASES[name] = (fn, scales)
+        return fn
+    return register
+
+
+def stub_network():
+    """Replace every scraper/API call reachable from the benchmarked code."""
+    import src.mlb.feature_engineering as fe
+    import src.mlb.load_process as lp
+
+    sp = starting_pitcher_stats()
+    snap = fangraphs_snapshot()
+    fe.get_starting_pitcher = lambda *args, **kwargs: dict(sp)
+    fe.backfill_season = lambda *args, **kwargs: 0
+    fe.get_snapshot_for_date = lambda season, as_of: snap
+    fe.fg_team_snapshot = lambda season, as_of: snap
+    lp.upload_file_to_bucket = lambda *args, **kwargs: None
+    lp.ensure_local_file = lambda bucket, storage_path, local_path: local_path
+    os.environ.pop("SUPABASE_BUCKET", None)
+
+
+_individual_cache = {}
+
+
+def individual(scale: int) -> pd.DataFrame:
+    """``scale`` synthetic seasons in the processed _individual schema."""
+    if scale not in _individual_cache:
+        seasons = [to_individual(synthetic_season(2025 - i, seed=i), 2025 - i, seed=i) for i in range(scale)]
+        _individual_cache[scale] = pd.concat(seasons, ignore_index=True)
+    return _individual_cache[scale]
+
+
+def processed(scale: int) -> pd.DataFrame:
+    from src.mlb.load_process import get_opponent_features
+    return get_opponent_features(individual(scale))
+
+
+@case("opponent_features")
+def bench_opponent_features(scale):
+    from src.mlb.load_process import get_opponent_features
+    df = individual(scale)
+    return lambda: get_opponent_features(df)
+
+
+@case("create_features")
+def bench_create_features(scale):
+    from src.mlb.feature_engineering import create_features
+    raw = synthetic_raw_schedule(scale)
+    team = raw[raw['Tm'] == 'NYY'].reset_index(drop=True)
+    return lambda: create_features(2025, team, sp_workers=1)
+
+
+@case("update_season_data", scales=(1,))
+def bench_update_season_data(scale):
+    from src.mlb import storage
+    from src.mlb.load_process import update_season_data
+
+    raw = synthetic_season(2025)
+    feats = to_individual(raw, 2025)
+    # Everything but the last three days has already been processed
+    cutoff = feats['Date'].max() - pd.Timedelta(days=3)
+    workdir = tempfile.mkdtemp(prefix="bench_update_")
+    seed_dir = os.path.join(workdir, "seed")
+    os.makedirs(os.path.join(seed_dir, "raw"))
+    os.makedirs(os.path.join(seed_dir, "processed"))
+    raw.to_csv(os.path.join(seed_dir, "raw", "mlb_teams_schedules_2025.csv"), index=False)
+    feats[feats['Date'] <= cutoff].to_csv(
+        os.path.join(seed_dir, "processed", "mlb_teams_schedules_2025_individual.csv"), index=False)
+
+    def run():
+        data_dir = os.path.join(workdir, "data")
+        shutil.rmtree(data_dir, ignore_errors=True)
+        shutil.copytree(seed_dir, data_dir)
+        storage.clear_cache()
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            update_season_data(2025)
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+@case("latest_state", scales=(1,))
+def bench_latest_state(scale):
+    from src.mlb.rolling_state import latest_state
+    from src.mlb.storage import apply_schema
+    raw = apply_schema(synthetic_season(2025), 'raw', 2025)
+    # Prediction for the last day of the season: every earlier game is replayed
+    target = raw['Date'].max()
+    return lambda: latest_state(raw, target)
+
+
+@case("prepare_features")
+def bench_prepare_features(scale):
+    from src.mlb.features import FEATURES
+    from src.mlb.lgbm_model import _prepare_features
+    df = processed(scale)
+    return lambda: _prepare_features(df, FEATURES)
+
+
+@case("suggest_units")
+def bench_suggest_units(scale):
+    from src.mlb.odds import suggest_units
+    rng = np.random.default_rng(0)
+    n = 4860 * scale
+    df = pd.DataFrame({'Model_Prob': rng.uniform(0.3, 0.7, n), 'Odds': rng.uniform(1.5, 3.0, n)})
+    df['Edge'] = df['Model_Prob'] - 1 / df['Odds']
+    df['EV'] = df['Model_Prob'] * df['Odds'] - 1
+    return lambda: suggest_units(df, bankroll_units=100.0, kelly_frac=0.5, min_edge=0.05,
+                                 max_bankroll_frac=0.02, round_to_units=0.01)
+
+
+_calibrated = {}
+
+
+def calibrated_model():
+    """A sigmoid-calibrated LightGBM classifier trained once on one synthetic season."""
+    if 'clf' not in _calibrated:
+        import lightgbm as lgb
+        from sklearn.calibration import CalibratedClassifierCV
+        from sklearn.model_selection import TimeSeriesSplit
+        from src.mlb.features import FEATURES
+
+        df = processed(1).dropna(subset=FEATURES)
+        clf = lgb.LGBMClassifier(n_estimators=200, num_leaves=31, verbose=-1, random_state=42)
+        calibrated = CalibratedClassifierCV(clf, method="sigmoid", cv=TimeSeriesSplit(n_splits=5))
+        calibrated.fit(df[FEATURES], df['W/L'])
+        _calibrated['clf'] = calibrated
+    return _calibrated['clf']
+
+
+@case("calibrated_predict_proba")
+def bench_calibrated_predict_proba(scale):
+    from src.mlb.features import FEATURES
+    clf = calibrated_model()
+    X = processed(scale)[FEATURES]
+    return lambda: clf.predict_proba(X)
+
+
+@case("logging_actual_winners")
+def bench_logging_actual_winners(scale):
+    from src.mlb.load_process import logging_actual_winners
+    df = processed(scale)
+    home = df[df['Home_Away'] == 1]
+    hist = pd.DataFrame({
+        'Date': pd.to_datetime(home['Date']).dt.strftime('%Y-%m-%d'),
+        'Home': home['Tm'],
+        'Away': home['Opp'],
+        'Pred_Winner': home['Tm'],
+        'Pred_Prob': 0.55,
+        'Actual_Winner': np.where(home['W/L'] == 1, home['Tm'], home['Opp']),
+    })
+    # The most recent tenth of predictions are still waiting for results
+    hist.loc[hist.index[-len(hist) // 10:], 'Actual_Winner'] = np.nan
+    workdir = tempfile.mkdtemp(prefix="bench_history_")
+    hist_path = os.path.join(workdir, "pred_history.csv")
+
+    def run():
+        hist.to_csv(hist_path, index=False)
+        logging_actual_winners(df.copy(), hist_path)
+    return run
+
+
+def time_case(run, repeat: int) -> float:
+    """Best wall time over ``repeat`` calls, with the pipeline's progress output silenced."""
+    best = float("inf")
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, by_scale in results.items():
+        for scale, secs in by_scale.items():
+            base = baseline.get(name, {}).get(scale)
+            if base is None:
+                continue
+            ratio = secs / base if base > 0 else float("inf")
+            flag = "REGRESSION" if ratio > 1 + tolerance else "ok"
+            print(f"  {name:<26} {scale:>4}x  {base:9.4f}s -> {secs:9.4f}s  x{ratio:5.2f}  {flag}")
+            if flag != "ok":
+                regressions.append((name, scale, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compute hot paths on synthetic data.")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default="bench_results.json")
+    parser.add_argument('--baseline', help="Compare against a previous results JSON")
+    parser.add_argument('--save-baseline', help="Also write the results to this path")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown vs. baseline before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    stub_network()
+
+    results = {}
+    for name in args.cases:
+        fn, scales = CASES[name]
+        for scale in args.scales:
+            if scale not in scales:
+                continue
+            run = fn(scale)
+            secs = time_case(run, args.repeat)
+            results.setdefault(name, {})[str(scale)] = round(secs, 5)
+            print(f"{name:<26} {scale:>4}x  {secs:9.4f}s")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        print(f"Comparison with {args.baseline}:")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
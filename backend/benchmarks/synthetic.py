@@ -0,0 +1,138 @@
+"""
+Synthetic schedule data for benchmarks.
+
+``synthetic_raw_schedule(scale)`` returns ``scale`` seasons of league-wide
+games in the raw "mlb_teams_schedules_YYYY.csv" schema (one row per team per
+game, doubleheaders included), i.e. 1x is one real season's row count.
+``to_individual`` turns one raw season into the processed "_individual" schema
+without any scraping.
+"""
+import numpy as np
+import pandas as pd
+
+MLB_TEAMS = ['NYY', 'BOS', 'TOR', 'BAL', 'TBR',
+             'CHW', 'CLE', 'DET', 'KCR', 'MIN',
+             'HOU', 'LAA', 'ATH', 'SEA', 'TEX',
+             'ATL', 'MIA', 'NYM', 'PHI', 'WSN',
+             'CHC', 'CIN', 'MIL', 'PIT', 'STL',
+             'ARI', 'COL', 'LAD', 'SDP', 'SFG']
+
+GAMES_PER_TEAM = 162
+
+FG_BATTING = ['HR', 'RBI', 'H', 'wRC+', 'wOBA', 'SLG+', 'OBP+', 'AVG+', 'ISO+',
+              'HRFB%+', 'BB%+', 'K%+', 'Spd', 'EV', 'LA', 'Barrel%', 'HardHit%',
+              'Pull%+', 'Oppo%+', 'Cent%+', 'WPA', 'pLI', 'Clutch', 'WAR', 'RAR',
+              'BaseRunning', 'Offense', 'Defense', 'Fielding', 'wBsR', 'Batting',
+              'Positional', 'wLeague']
+FG_BULLPEN = ['WPA', 'pLI', 'Clutch', 'MD', 'WAR', 'FIP', 'ERA', 'RAR']
+
+# In the order get_starting_pitcher returns them
+SP_STATS = ['SP_ERA', 'SP_WAR', 'SP_IP', 'SP_K9', 'SP_BB9', 'SP_WHIP', 'SP_HardHit%']
+
+
+def synthetic_season(year: int, seed: int = 0) -> pd.DataFrame:
+    """One season in the raw schedule schema, rows grouped by team like get_teams_schedules."""
+    rng = np.random.default_rng(seed)
+    teams = np.array(MLB_TEAMS)
+    played = {t: 0 for t in teams}
+    wins = {t: 0 for t in teams}
+    streak = {t: 0 for t in teams}
+    day = pd.Timestamp(f"{year}-03-27")
+    rows = []
+    while min(played.values()) < GAMES_PER_TEAM:
+        order = rng.permutation(teams)
+        doubleheader = rng.random() < 0.05
+        night = 'N' if rng.random() < 0.6 else 'D'
+        for home, away in zip(order[::2], order[1::2]):
+            for game in range(1, 3 if doubleheader else 2):
+                r, ra = (int(x) for x in rng.integers(0, 12, size=2))
+                if r == ra:
+                    r += 1
+                box = f"https://www.baseball-reference.com/boxes/{home}/{home}{day:%Y%m%d}{game}.shtml"
+                for tm, opp, ha, runs, allowed in ((home, away, 'Home', r, ra), (away, home, '@', ra, r)):
+                    won = runs > allowed
+                    played[tm] += 1
+                    wins[tm] += won
+                    streak[tm] = (max(streak[tm], 0) + 1) if won else (min(streak[tm], 0) - 1)
+                    rows.append({
+                        'Date': day.strftime('%A, %b %-d'),
+                        'Tm': tm,
+                        'Home_Away': ha,
+                        'Opp': opp,
+                        'W/L': 'W' if won else 'L',
+                        'R': runs,
+                        'RA': allowed,
+                        'Inn': np.nan,
+                        'W-L': f"{wins[tm]}-{played[tm] - wins[tm]}",
+                        'Rank': int(rng.integers(1, 6)),
+                        'GB': 'Tied',
+                        'Win': 'Pitcher A',
+                        'Loss': 'Pitcher B',
+                        'Save': np.nan,
+                        'Time': '3:00',
+                        'D/N': night,
+                        'Attendance': int(rng.integers(10000, 50000)),
+                        'cLI': round(float(rng.uniform(0.5, 1.5)), 2),
+                        'Streak': streak[tm],
+                        'Orig. Scheduled': np.nan,
+                        'Game_Number': game,
+                        'Boxscore': box,
+                    })
+        day += pd.Timedelta(days=1)
+    df = pd.DataFrame(rows)
+    return df.sort_values('Tm', kind='stable').reset_index(drop=True)
+
+
+def synthetic_raw_schedule(scale: int = 1, first_year: int = 2025, seed: int = 0) -> pd.DataFrame:
+    """``scale`` seasons (first_year, first_year - 1, ...) stacked in the raw schema."""
+    seasons = [synthetic_season(first_year - i, seed=seed + i) for i in range(scale)]
+    return pd.concat(seasons, ignore_index=True)
+
+
+def fangraphs_snapshot(seed: int = 0) -> pd.DataFrame:
+    """A team snapshot shaped like fangraphs_stats.fg_team_snapshot."""
+    rng = np.random.default_rng(seed)
+    cols = [f"B_{c}" for c in FG_BATTING] + [f"RP_{c}" for c in FG_BULLPEN]
+    snap = pd.DataFrame(rng.normal(size=(len(MLB_TEAMS), len(cols))).round(3), columns=cols)
+    snap.insert(0, 'Tm', MLB_TEAMS)
+    return snap
+
+
+def starting_pitcher_stats(seed: int = 0) -> dict:
+    """A get_starting_pitcher result with plausible values."""
+    rng = np.random.default_rng(seed)
+    stats = {c: round(float(v), 2) for c, v in zip(SP_STATS, rng.uniform(0, 5, size=len(SP_STATS)))}
+    return {'SP': 'Synthetic Pitcher', **stats}
+
+
+def to_individual(raw: pd.DataFrame, year: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Processed per-team rows for one raw season, roughly as create_features
+    would write them (rolling features, SP and Fangraphs columns), without
+    any network access.
+    """
+    rng = np.random.default_rng(seed)
+    df = raw.drop(columns=['Time', 'Attendance', 'Inn', 'Orig. Scheduled', 'Save', 'GB', 'Win', 'Loss', 'Game_Number']).copy()
+    dates = pd.to_datetime(df['Date'] + f" {year}", format='%A, %b %d %Y')
+    df['Date'] = dates
+    df.insert(1, 'Month', dates.dt.month)
+    df.insert(2, 'DayofWeek', dates.dt.dayofweek)
+    df['Run_Diff'] = df['R'] - df['RA']
+    df['SP'] = 'Synthetic Pitcher'
+    for col in SP_STATS:
+        df[col] = rng.uniform(0, 5, size=len(df)).round(2)
+    df['Streak'] = df.groupby('Tm')['Streak'].shift(1).fillna(0).astype(int)
+    by_team = df.groupby('Tm')
+    for window in (3, 5, 10):
+        for name, col in (('R', 'R'), ('RA', 'RA'), ('RunDiff', 'Run_Diff')):
+            df[f'{name}_MA{window}'] = by_team[col].transform(
+                lambda s: s.shift(1).rolling(window, min_periods=1).mean()).round(3)
+        for name, col in (('R', 'R'), ('RA', 'RA'), ('RunDiff', 'Run_Diff')):
+            df[f'{name}_EWMA{window}'] = by_team[col].transform(
+                lambda s: s.shift(1).ewm(span=window, adjust=False).mean()).round(3)
+    df['Home_Away'] = df['Home_Away'].map({'Home': 1, '@': 0})
+    df['W/L'] = df['W/L'].map({'W': 1, 'L': 0})
+    df['D/N'] = df['D/N'].map({'D': 0, 'N': 1})
+    snap = fangraphs_snapshot(seed).drop(columns=['Tm'])
+    fg = pd.DataFrame(rng.normal(size=(len(df), snap.shape[1])).round(3), columns=snap.columns)
+    return pd.concat([df.reset_index(drop=True), fg], axis=1)
@@ -4,18 +4,34 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=NotOpenSSLWarning)
 
 import os
+import argparse
+import logging
 import pandas as pd
 import numpy as np
-from datetime import date
-from src.mlb.load_process import update_season_data, get_teams_schedules, load_all_teams_data
-from src.mlb.lgbm_model import create_models
+from datetime import date, timedelta
+from src.mlb.load_process import update_season_data, get_teams_schedules, load_all_teams_data, build_seasons, TEAM_WORKERS
 from src.mlb.auto_predict import predict_for_date
 from src.mlb.odds import get_game_odds_today, suggest_units
 from src.mlb.supabase_client import upsert_predictions, upload_file_to_bucket, ensure_local_file
+from src.mlb.boxscore_store import STORE_PATH as BOXSCORE_STORE, store as boxscore_store
+from src.mlb.statcast_store import update_store as update_statcast_store, export_archive as export_statcast, import_archive as import_statcast, ARCHIVE_PATH as STATCAST_ARCHIVE
+from src.mlb.fangraphs_stats import backfill_season as backfill_fangraphs
+from src.mlb.storage import migrate as migrate_storage, cache_report
+from src.mlb.war import load_war_index
+from src.mlb.player_ids import resolver as pid_resolver
+from src.mlb.pitchers import install_http_cache
+from src.mlb.serve import MODEL_DIR, RELOAD_SECONDS, serve
+from src.mlb.compact_model import COMPACT_PATH
+from src.mlb.warm_start import update_models, WARM_ROUNDS, HOLDOUT_DAYS, CALIBRATION_DAYS
+from src.mlb.metrics import metrics, configure_logging, instrument_requests
+
+logger = logging.getLogger("mlb_pred_pipeline")
 
 def predict_and_odds(date: str, bankroll: float, kelly: float, min_edge: float, max_bet_frac: float):
-    pred_df = predict_for_date(date)
-    odds_df = get_game_odds_today()
+    with metrics.stage("predict"):
+        pred_df = predict_for_date(date)
+    with metrics.stage("odds_api"):
+        odds_df = get_game_odds_today()
 
     merged = pred_df.merge(odds_df, on=["Team"], how="left")
 
@@ -38,44 +54,195 @@ def predict_and_odds(date: str, bankroll: float, kelly: float, min_edge: float,
     path = "data/games_today.csv"
     merged.to_csv(path, index=False)
     
-    try:
-        upload_file_to_bucket(path)
-    except Exception as exc:
-        print(f"Failed to upload games_today CSV to Supabase storage: {exc}")
+    with metrics.stage("supabase_publish"):
+        try:
+            upload_file_to_bucket(path)
+        except Exception as exc:
+            print(f"Failed to upload games_today CSV to Supabase storage: {exc}")
 
-    try:
-        upsert_predictions(merged)
-    except Exception as exc:
-        print(f"Failed to upload today's predictions (games_today) to Supabase table: {exc}")
+        try:
+            upsert_predictions(merged)
+        except Exception as exc:
+            print(f"Failed to upload today's predictions (games_today) to Supabase table: {exc}")
+
+def full_updated_odds(date: str, bankroll: float = 100.0, kelly: float = 0.50, min_edge: float = 0.05, max_bet_frac: float = 0.02, verify_rolling: bool = False, refresh_models: bool = False):
+    bucket = os.getenv("SUPABASE_BUCKET")
+    if bucket:
+        with metrics.stage("supabase_download"):
+            try:
+                ensure_local_file(bucket, "boxscores.sqlite", BOXSCORE_STORE)
+            except Exception as exc:
+                print(f"Warning: failed to download boxscore store from Supabase: {exc}")
 
-def full_updated_odds(date: str, bankroll: float = 100.0, kelly: float = 0.50, min_edge: float = 0.05, max_bet_frac: float = 0.02):
     # Retrieve up-to-date raw game data
-    get_teams_schedules(2025)
+    with metrics.stage("bbref_schedules"):
+        get_teams_schedules(2025)
+
+    # Append yesterday's league-wide Statcast pitches to the synced store
+    statcast_archive = STATCAST_ARCHIVE.format(season=2025)
+    if bucket:
+        with metrics.stage("supabase_download"):
+            try:
+                ensure_local_file(bucket, os.path.basename(statcast_archive), statcast_archive)
+                import_statcast(2025, statcast_archive)
+            except Exception as exc:
+                print(f"Warning: failed to download Statcast store from Supabase: {exc}")
+    with metrics.stage("statcast_store"):
+        added = update_statcast_store(2025, pd.Timestamp(date).date() - timedelta(days=1))
+    if added:
+        with metrics.stage("supabase_upload"):
+            try:
+                upload_file_to_bucket(export_statcast(2025, statcast_archive))
+            except Exception as exc:
+                print(f"Failed to upload Statcast store to Supabase storage: {exc}")
 
     # Update processed data
-    update_season_data()
+    with metrics.stage("update_season_data"):
+        update_season_data(verify=verify_rolling)
+
+    if refresh_models:
+        with metrics.stage("update_models"):
+            update_models()
     
-    path = "data/pred_history.csv"
-    bucket = os.getenv("SUPABASE_BUCKET")
-    if bucket:
+    with metrics.stage("supabase_upload"):
         try:
-            ensure_local_file(bucket, "pred_history.csv", path)
+            upload_file_to_bucket(boxscore_store.export("data/boxscores_export.sqlite"), dest_path="boxscores.sqlite")
         except Exception as exc:
-            print(f"Warning: failed to download prediction history from Supabase: {exc}")
+            print(f"Failed to upload boxscore store to Supabase storage: {exc}")
+
+    path = "data/pred_history.csv"
+    if bucket:
+        with metrics.stage("supabase_download"):
+            try:
+                ensure_local_file(bucket, "pred_history.csv", path)
+            except Exception as exc:
+                print(f"Warning: failed to download prediction history from Supabase: {exc}")
     
     predict_and_odds(date, bankroll, kelly, min_edge, max_bet_frac)
     
     df = pd.read_csv(path)
     df = df.replace([np.inf, -np.inf], None).where(pd.notnull(df), None)
     df = df.astype(object).where(pd.notnull(df), None)
-    try:
-        upsert_predictions(df, table="history")
-    except Exception as exc:
-        print(f"Failed to upload prediction history to Supabase table: {exc}")
+    with metrics.stage("supabase_publish"):
+        try:
+            upsert_predictions(df, table="history")
+        except Exception as exc:
+            print(f"Failed to upload prediction history to Supabase table: {exc}")
+
+def register_metric_sources():
+    """Stores with their own counters, sampled into the run report."""
+    metrics.register_source("boxscore_store", boxscore_store.stats)
+    metrics.register_source("dataset_cache", cache_report)
+    metrics.register_source("war_index", lambda: load_war_index.cache_info()._asdict())
+    metrics.register_source("player_ids", pid_resolver.report)
+
+def boxscores_command(action: str, path: str = None):
+    if action == "stats":
+        print(boxscore_store.stats())
+    elif action == "export":
+        print("Exported boxscore store to", boxscore_store.export(path or "data/boxscores_export.sqlite"))
+    elif action == "import":
+        if not path:
+            raise SystemExit("Error: boxscores import needs a path to an exported store")
+        print(f"Imported {boxscore_store.import_from(path)} new box scores from {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="MLB prediction pipeline.")
+    sub = parser.add_subparsers(dest="command")
+
+    daily = sub.add_parser("daily", help="Update data, predict and publish (default)")
+    daily.add_argument("date", nargs="?", default=date.today().strftime("%Y-%m-%d"))
+    daily.add_argument("--verify-rolling", action="store_true",
+                       help="Check incremental rolling features against a full recompute")
+    daily.add_argument("--update-models", action="store_true",
+                       help="Warm-start the models on the newly completed games before predicting")
+
+    box = sub.add_parser("boxscores", help="Inspect, export or import the parsed boxscore store")
+    box.add_argument("action", choices=["stats", "export", "import"])
+    box.add_argument("path", nargs="?", help="Destination (export) or source (import) SQLite file")
+
+    fg = sub.add_parser("fangraphs-backfill", help="Store every missing Fangraphs team snapshot of a season")
+    fg.add_argument("season", type=int)
+    fg.add_argument("--workers", type=int, default=4)
+
+    build = sub.add_parser("build-seasons", help="Build the processed datasets of a range of seasons concurrently")
+    build.add_argument("first", type=int, help="First season, e.g. 2023")
+    build.add_argument("last", type=int, nargs="?", help="Last season (default: first)")
+    build.add_argument("--workers", type=int, default=TEAM_WORKERS, help="Worker processes")
+
+    mig = sub.add_parser("migrate-storage", help="Write typed Parquet mirrors for every schedule CSV")
+    mig.add_argument("--data-dir", default="data")
+
+    srv = sub.add_parser("serve", help="Serve model predictions over HTTP with the models kept in memory")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8000)
+    srv.add_argument("--model-dir", default=MODEL_DIR)
+    srv.add_argument("--poll", type=float, default=RELOAD_SECONDS, help="Seconds between checks for new model files")
+
+    exp = sub.add_parser("export-model", help="Write the compact (JSON) classifier artifact")
+    exp.add_argument("--source", default="backend/models/mlb_wl_calibrated.joblib")
+    exp.add_argument("--dest", default=COMPACT_PATH)
+    exp.add_argument("--seasons", type=int, nargs="*", default=[2023, 2024, 2025],
+                     help="Seasons whose rows the artifact is checked against the joblib model on (none: no check)")
+
+    train = sub.add_parser("train-models", help="Retrain the win/loss, run-diff and run-total models from scratch")
+    train.add_argument("--search", choices=["random", "halving"], default="random",
+                       help="Hyperparameter search: the full randomized search, or successive halving with early stopping")
+    train.add_argument("--cpus", type=int, default=None, help="Total cores for the search (default: all)")
+    train.add_argument("--trial-threads", type=int, default=1, help="LightGBM threads per trial fit")
+
+    upd = sub.add_parser("update-models", help="Continue the saved models on newly completed games (warm start)")
+    upd.add_argument("--season", type=int, default=2025)
+    upd.add_argument("--rounds", type=int, default=WARM_ROUNDS, help="Boosting rounds added per model")
+    upd.add_argument("--holdout-days", type=int, default=HOLDOUT_DAYS,
+                     help="Newest game days held back to decide whether to promote")
+    upd.add_argument("--calibration-days", type=int, default=CALIBRATION_DAYS,
+                     help="Days of games the win/loss calibration is refit on")
+
+    parser.add_argument("--log-level", default=None, help="DEBUG, INFO, WARNING... (default: $MLB_LOG_LEVEL or INFO)")
+    parser.add_argument("--report", default=None, help="Run report path (default: data/run_reports/run_<timestamp>.json)")
+
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    if args.command not in ("boxscores", "migrate-storage", "serve", "export-model", "train-models", "update-models"):
+        # Scraper requests go through a one-day requests cache
+        install_http_cache()
+    if args.command == "boxscores":
+        boxscores_command(args.action, args.path)
+    elif args.command == "fangraphs-backfill":
+        print(f"Fetched {backfill_fangraphs(args.season, workers=args.workers)} Fangraphs snapshots for {args.season}")
+    elif args.command == "build-seasons":
+        years = range(args.first, (args.last or args.first) + 1)
+        for year, rows in sorted(build_seasons(years, workers=args.workers).items()):
+            print(f"Season {year}: {rows} processed rows")
+    elif args.command == "migrate-storage":
+        migrate_storage(args.data_dir)
+    elif args.command == "export-model":
+        # Training-side: lgbm_model pulls in LightGBM and scikit-learn
+        from src.mlb.lgbm_model import export_model
+        export_model(args.source, args.dest, args.seasons)
+    elif args.command == "train-models":
+        from src.mlb.lgbm_model import create_models
+        create_models(args.search, args.cpus, args.trial_threads)
+    elif args.command == "update-models":
+        update_models(args.season, args.rounds, args.holdout_days, args.calibration_days)
+    elif args.command == "serve":
+        serve(args.host, args.port, args.model_dir, args.poll)
+    else:
+        # Create LightGBM models (lgbm_model pulls in LightGBM and scikit-learn,
+        # so it is only imported when training)
+        #from src.mlb.lgbm_model import create_models
+        #create_models()
+        d = getattr(args, "date", None) or date.today().strftime("%Y-%m-%d")
+        instrument_requests()
+        register_metric_sources()
+        try:
+            full_updated_odds(d, verify_rolling=getattr(args, "verify_rolling", False),
+                              refresh_models=getattr(args, "update_models", False))
+        finally:
+            logger.info("Run report written to %s", metrics.write_report(args.report))
+            logger.info(metrics.summary())
+        #upload_file_to_bucket("backend/models/mlb_wl_lgbm.txt", dest_path=f"models/mlb_wl_lgbm.txt")
 
 if __name__ == '__main__':
-    # Create LightGBM models
-    #create_models()
-    d = date.today().strftime("%Y-%m-%d")
-    full_updated_odds(d)
-    #upload_file_to_bucket("backend/models/mlb_wl_lgbm.txt", dest_path=f"models/mlb_wl_lgbm.txt")
\ No newline at end of file
+    main()
@@ -1,21 +1,36 @@
 import argparse
+import asyncio
 import requests
 import pandas as pd
 import re
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
+from typing import Optional
 from bs4 import BeautifulSoup, Comment
 
-from src.mlb.feature_engineering import full_to_abbrev
+from src.mlb.teams import full_to_abbrev
 from src.mlb.pitchers import get_player_stats
-from src.mlb.lgbm_model import FEATURES
-import joblib
+from src.mlb.features import FEATURES
+from src.mlb.compact_model import COMPACT_PATH, CompactClassifier, compact_promoted
 from src.mlb.fangraphs_stats import fg_team_snapshot
 from src.mlb.supabase_client import ensure_local_file, upload_file_to_bucket
+from src.mlb.storage import load_dataset
+from src.mlb.rolling_state import latest_state
+from src.mlb.rate_limit import limited_get
+from src.mlb.war import load_war_index
 
 HISTORY = "data/pred_history.csv"
 
+# Slate previews fetched at once; bbref's rate limit still applies to all of them
+PREVIEW_WORKERS = 4
+
+# --async: blocking calls in flight at once per host
+BBREF_HOST = "www.baseball-reference.com"
+FANGRAPHS_HOST = "www.fangraphs.com"
+SUPABASE_HOST = "supabase"
+ASYNC_HOST_LIMITS = {BBREF_HOST: 4, FANGRAPHS_HOST: 2, SUPABASE_HOST: 2}
+
 def load_processed_data(year: int) -> pd.DataFrame:
     path = f"data/processed/mlb_teams_schedules_{year}.csv"
     bucket = os.getenv("SUPABASE_BUCKET")
@@ -24,7 +39,7 @@ def load_processed_data(year: int) -> pd.DataFrame:
             ensure_local_file(bucket, f"processed/mlb_teams_schedules_{year}.csv", path)
         except Exception as exc:
             print(f"Warning: failed to download processed schedule from Supabase: {exc}")
-    df = pd.read_csv(path, dtype={'Tm':str,'Opp':str}, parse_dates=['Date'])
+    df = load_dataset('processed', year)
     return df
 
 def get_todays_slate(target: date = date.today()) -> pd.DataFrame:
@@ -96,11 +111,7 @@ def get_slate_for_date(target: date) -> pd.DataFrame:
     
     return get_todays_slate(target)
 
-def get_starting_pitcher_from_preview(url: str, team_name: str) -> dict:
-    resp = requests.get(url)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-
+def _preview_starter(soup: BeautifulSoup, comments: list, team_name: str) -> dict:
     heading = soup.find("div", id=f"sp_{team_name}_sh")
     if not heading:
         print(f"Couldn’t find sp_{team_name}_sh on {team_name}")
@@ -114,7 +125,7 @@ def get_starting_pitcher_from_preview(url: str, team_name: str) -> dict:
     name = raw_name.encode("latin‑1").decode("utf‑8")
     
     comment = None
-    for c in soup.find_all(string=lambda t: isinstance(t, Comment)):
+    for c in comments:
         if f'id="sp_{team_name}"' in c:
             comment = c
             break
@@ -141,67 +152,75 @@ def get_starting_pitcher_from_preview(url: str, team_name: str) -> dict:
 
     return {"name": name, "ERA": era}
 
+def parse_preview_starters(html: str, teams) -> dict:
+    """Probable starters of ``teams`` from one preview page, parsed once."""
+    soup = BeautifulSoup(html, "html.parser")
+    comments = soup.find_all(string=lambda t: isinstance(t, Comment))
+    return {team: _preview_starter(soup, comments, team) for team in teams}
+
+def get_starting_pitchers_from_preview(url: str, teams) -> dict:
+    """{team: {'name', 'ERA'}} for both sides of a game from a single download."""
+    resp = limited_get(url)
+    resp.raise_for_status()
+    return parse_preview_starters(resp.text, teams)
+
+def get_starting_pitcher_from_preview(url: str, team_name: str) -> dict:
+    return get_starting_pitchers_from_preview(url, [team_name])[team_name]
+
+def fetch_slate_starters(records: list, workers: int = PREVIEW_WORKERS) -> dict:
+    """
+    Probable starters for every game of a slate, keyed by preview url. Each
+    preview is downloaded once; the downloads go through the per-host limiter,
+    so the workers overlap waiting and parsing rather than add requests.
+    """
+    games = {ev['url']: (ev['Tm'], ev['Opp']) for ev in records if ev.get('url')}
+    if not games:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(games))) as pool:
+        futures = {url: pool.submit(get_starting_pitchers_from_preview, url, teams) for url, teams in games.items()}
+        return {url: fut.result() for url, fut in futures.items()}
+
 def build_features_for_event(
     event: dict,
-    raw_schedule_df: pd.DataFrame,
+    team_states: dict,
     snapshot_cache: dict,
-    year: int
+    year: int,
+    starters: Optional[dict] = None,
+    sp_stats: Optional[dict] = None
 ) -> pd.Series:
     """
     event: { 'Tm': 'NYY', 'Opp': 'BOS', 'url': '…', 'D/N': 1 }
-    raw_schedule_df: your raw "mlb_teams_schedules_YYYY.csv" parsed with Date datetime64
+    team_states: rolling_state.latest_state(raw schedule, game date), built once per slate
     snapshot_cache: pre-built dict mapping 'YYYY-MM-DD' → fangraphs snapshot df
     year: the season year, e.g. 2025
+    starters: {team: {'name', 'ERA'}} from fetch_slate_starters; fetched here if not given
+    sp_stats: {team: get_player_stats(...)} for both starters; looked up here if not given
     """
     tm, opp = event['Tm'], event['Opp']
     target = event['Date']
     
-    if raw_schedule_df['Date'].dtype == object or not pd.api.types.is_datetime64_any_dtype(raw_schedule_df['Date']):
-        raw_schedule_df['Date'] = raw_schedule_df['Date'].str.replace(r'\s+\(\d\)', '', regex=True)
-        raw_schedule_df['Date'] = pd.to_datetime(raw_schedule_df['Date'].astype(str) + f' {year}', format='%A, %b %d %Y')
-    
-    # 1) find that team’s last raw boxscore row (strictly before game date)
-    def last_raw_features(team_code, windows=(3,5,10)):
-        hist = (raw_schedule_df.loc[(raw_schedule_df['Tm'] == team_code) &
-                                    (raw_schedule_df['Date'].dt.date < target)]
-                .sort_values('Date'))
-        if hist.empty:
+    # 1) each team's rolling/streak/rank state going into the game date
+    def last_raw_features(team_code):
+        state = team_states.get(team_code)
+        if state is None:
             raise ValueError(f"No prior row for {team_code} before {target}")
-        
-        R = hist['R'].astype(float)
-        RA = hist['RA'].astype(float)
-        Diff = R - RA
-        last = hist.iloc[-1]
-        
-        feat = {
-            'Rank':         last['Rank'],
-            'Streak':       last['Streak'],
-            'W/L':          last['W/L'],
-        }
-        
-        for w in windows:
-            feat[f'R_MA{w}'] = R.rolling(w, min_periods=1).mean().iloc[-1].round(3)
-            feat[f'RA_MA{w}'] = RA.rolling(w, min_periods=1).mean().iloc[-1].round(3)
-            feat[f'RunDiff_MA{w}'] = Diff.rolling(w, min_periods=1).mean().iloc[-1].round(3)
-            feat[f'R_EWMA{w}'] = R.ewm(span=w, adjust=False).mean().iloc[-1].round(3)
-            feat[f'RA_EWMA{w}'] = RA.ewm(span=w, adjust=False).mean().iloc[-1].round(3)
-            feat[f'RunDiff_EWMA{w}'] = Diff.ewm(span=w, adjust=False).mean().iloc[-1].round(3)
-        
-        return feat
+        return {**state.features(), 'Rank': state.rank, 'Streak': state.next_streak()}
     
     home_raw = last_raw_features(tm)
     opp_raw  = last_raw_features(opp)
     
     # 2) SP preview + stats
-    sp_tm  = get_starting_pitcher_from_preview(event['url'], tm)
-    #print(f"Found SP for {tm}: {sp_tm['name']} with ERA {sp_tm['ERA']}")
-    time.sleep(0.5)
-    sp_opp = get_starting_pitcher_from_preview(event['url'], opp)
-    #print(f"Found SP for {opp}: {sp_opp['name']} with ERA {sp_opp['ERA']}")
+    if starters is None:
+        starters = get_starting_pitchers_from_preview(event['url'], [tm, opp])
+    sp_tm  = starters[tm]
+    sp_opp = starters[opp]
     
     # Retrieve SP stats including WAR
-    sp_tm_stats  = get_player_stats(sp_tm['name'], target, year)
-    sp_opp_stats = get_player_stats(sp_opp['name'], target, year)
+    if sp_stats is None:
+        sp_stats = {tm: get_player_stats(sp_tm['name'], target, year),
+                    opp: get_player_stats(sp_opp['name'], target, year)}
+    sp_tm_stats  = dict(sp_stats[tm])
+    sp_opp_stats = dict(sp_stats[opp])
     # Override ERA with the preview ERA
     sp_tm_stats['SP_ERA'] = sp_tm['ERA']
     sp_opp_stats['SP_ERA'] = sp_opp['ERA']
@@ -224,24 +243,11 @@ def build_features_for_event(
     tm_fg  = fg_stats(tm,  '')
     opp_fg = fg_stats(opp, 'Opp_')
     
-    # Find current streaks
-    h_win = home_raw['W/L'] in ('W', 'W-wo')    
-    h_streak = home_raw['Streak']
-    if h_streak > 0: h_streak += 1 if h_win else -1
-    elif h_streak < 0: h_streak -= 1 if h_win else -1
-    else: h_streak = 1 if h_win else -1
-        
-    o_win = opp_raw['W/L'] in ('W', 'W-wo')
-    o_streak = opp_raw['Streak']
-    if o_streak > 0: o_streak += 1 if o_win else -1
-    elif o_streak < 0: o_streak -= 1 if o_win else -1
-    else: o_streak = 1 if o_win else -1
-    
     # 4) assemble into a single dict
     data = {
         'Home_Away': 1,
-        'Streak': h_streak,
-        'Opp_Streak': o_streak,
+        'Streak': home_raw['Streak'],
+        'Opp_Streak': opp_raw['Streak'],
         'D/N': event['D/N'],
     }
 
@@ -273,7 +279,8 @@ def build_features_for_event(
     return pd.Series({ f: data.get(f, float('nan')) for f in FEATURES })
 
 
-def predict_for_date(date_str: str) -> pd.DataFrame:
+def _load_slate(date_str: str):
+    """(target date, raw schedule, slate records), or None when there are no games."""
     try:
         target = datetime.strptime(date_str, '%Y-%m-%d').date()
     except ValueError:
@@ -286,16 +293,14 @@ def predict_for_date(date_str: str) -> pd.DataFrame:
             ensure_local_file(bucket, f"raw/mlb_teams_schedules_{target.year}.csv", raw_path)
         except Exception as exc:
             print(f"Warning: failed to download raw schedule from Supabase: {exc}")
-    raw = pd.read_csv(raw_path, parse_dates=['Date'])
-
-    snap_cache = {}
+    raw = load_dataset('raw', target.year)
 
     slate = get_slate_for_date(target)
     records = slate.to_dict('records')
     
     if not records:
         print(f"No matchups found for {target}")
-        return
+        return None
     
     print(f"Found {len(records)} matchups for {target}...")
     if target < date.today():
@@ -304,17 +309,18 @@ def predict_for_date(date_str: str) -> pd.DataFrame:
         print("Using today's data for predictions")
     
     print(slate[["Tm", "Opp", "Date", "D/N"]])
+    return target, raw, records
 
-    proc = load_processed_data(target.year)
+def _check_processed(year: int) -> None:
+    proc = load_processed_data(year)
     if 'Date' not in proc.columns:
         raise RuntimeError("Processed data missing Date column")
 
-    feats = []
-    for ev in records:
-        feats.append(build_features_for_event(ev, raw, snap_cache, target.year))
-    X = pd.DataFrame(feats, columns=FEATURES)
-    #X.to_csv("data/games_today_stats.csv", index=False)
-
+def _load_model():
+    # The compact artifact only once a warm-start update has promoted it;
+    # until then it is a one-fold approximation of the joblib model
+    if compact_promoted() and os.path.exists(COMPACT_PATH):
+        return CompactClassifier.load(COMPACT_PATH)
     model_path = "backend/models/mlb_wl_calibrated.joblib"
     if not os.path.exists(model_path):
         bucket = os.getenv("SUPABASE_BUCKET")
@@ -323,7 +329,14 @@ def predict_for_date(date_str: str) -> pd.DataFrame:
                 ensure_local_file(bucket, model_path, model_path)
             except Exception as exc:
                 print(f"Warning: failed to download classification model: {exc}")
-    clf = joblib.load(model_path)
+    # joblib, and the scikit-learn/LightGBM classes it unpickles, are only
+    # needed once there is something to predict
+    import joblib
+
+    return joblib.load(model_path)
+
+def _predict_slate(clf, records: list, X: pd.DataFrame, date_str: str) -> pd.DataFrame:
+    """Score the whole slate at once and log the picks to the history file."""
     probs = clf.predict_proba(X)[:, 1]
     
     probs_df = pd.DataFrame(records)
@@ -371,6 +384,81 @@ def predict_for_date(date_str: str) -> pd.DataFrame:
     return long
 
 
+def predict_for_date(date_str: str) -> pd.DataFrame:
+    slate = _load_slate(date_str)
+    if slate is None:
+        return
+    target, raw, records = slate
+
+    _check_processed(target.year)
+
+    # One pass over the raw schedule; every event is then a lookup
+    team_states = latest_state(raw, target)
+    # One preview download per game, fetched concurrently
+    starters = fetch_slate_starters(records)
+
+    snap_cache = {}
+    feats = []
+    for ev in records:
+        feats.append(build_features_for_event(ev, team_states, snap_cache, target.year, starters.get(ev.get('url'))))
+    X = pd.DataFrame(feats, columns=FEATURES)
+    #X.to_csv("data/games_today_stats.csv", index=False)
+
+    return _predict_slate(_load_model(), records, X, date_str)
+
+
+async def predict_for_date_async(date_str: str) -> pd.DataFrame:
+    """
+    predict_for_date with the slate's network I/O overlapped: every preview,
+    both starters' stats per game, the Fangraphs snapshot, the processed data
+    check and the model load run concurrently, at most ASYNC_HOST_LIMITS[host]
+    at a time per host. The scrapers are blocking, so each call runs in a
+    worker thread; limited_get's per-host rate limits still apply. The slate
+    is scored in one predict_proba call once every event's features are ready.
+    """
+    slate = await asyncio.to_thread(_load_slate, date_str)
+    if slate is None:
+        return
+    target, raw, records = slate
+    year = target.year
+    as_of = (pd.to_datetime(target) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+    limits = {host: asyncio.Semaphore(n) for host, n in ASYNC_HOST_LIMITS.items()}
+
+    async def call(host, fn, *args):
+        async with limits[host]:
+            return await asyncio.to_thread(fn, *args)
+
+    # Every starter's WAR comes from the same daily archive: fetch it once
+    # before the stats lookups fan out, alongside the previews
+    war_ready = asyncio.ensure_future(call(BBREF_HOST, load_war_index, as_of))
+
+    async def game_inputs(ev):
+        teams = [ev['Tm'], ev['Opp']]
+        starters = await call(BBREF_HOST, get_starting_pitchers_from_preview, ev['url'], teams)
+        await war_ready
+        stats = await asyncio.gather(*(
+            call(BBREF_HOST, get_player_stats, starters[team]['name'], ev['Date'], year) for team in teams
+        ))
+        return starters, dict(zip(teams, stats))
+
+    games, snapshot, team_states, clf, _ = await asyncio.gather(
+        asyncio.gather(*(game_inputs(ev) for ev in records)),
+        call(FANGRAPHS_HOST, fg_team_snapshot, year, as_of),
+        asyncio.to_thread(latest_state, raw, target),
+        call(SUPABASE_HOST, _load_model),
+        call(SUPABASE_HOST, _check_processed, year),
+    )
+
+    snap_cache = {as_of: snapshot}
+    feats = [
+        build_features_for_event(ev, team_states, snap_cache, year, starters, sp_stats)
+        for ev, (starters, sp_stats) in zip(records, games)
+    ]
+    X = pd.DataFrame(feats, columns=FEATURES)
+    return _predict_slate(clf, records, X, date_str)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Predict MLB outcomes for games on a given date using processed features and BBRef scraping."
@@ -379,8 +467,15 @@ def main():
         'date', nargs='?', default=date.today().isoformat(),
         help="Date to predict in YYYY-MM-DD format (defaults to today)"
     )
+    parser.add_argument(
+        '--async', dest='use_async', action='store_true',
+        help="Fetch the whole slate's previews, pitcher stats and snapshots concurrently"
+    )
     args = parser.parse_args()
-    predict_for_date(args.date)
+    if args.use_async:
+        asyncio.run(predict_for_date_async(args.date))
+    else:
+        predict_for_date(args.date)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
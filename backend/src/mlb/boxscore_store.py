@@ -0,0 +1,152 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional
+
+from bs4 import BeautifulSoup, Comment
+
+# Permanent store of parsed Baseball-Reference box scores. A finished game's
+# box score never changes, so each URL is downloaded and parsed at most once.
+STORE_PATH = "data/boxscores.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS boxscores (
+    url        TEXT PRIMARY KEY,
+    parsed_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS starters (
+    url     TEXT NOT NULL,
+    team    TEXT NOT NULL,
+    sp      TEXT,
+    sp_era  REAL,
+    PRIMARY KEY (url, team)
+);
+"""
+
+
+def team_key(team_name: str) -> str:
+    """Team name as it appears in bbref table ids, e.g. 'NewYorkYankees'."""
+    return re.sub(r'[^A-Za-z]', '', team_name)
+
+
+def parse_starters(html: str) -> dict:
+    """Return {team_key: (SP name, SP ERA)} for every pitching table in a box score."""
+    soup = BeautifulSoup(html, "html.parser")
+    starters = {}
+    for comment in soup.find_all(string=lambda t: isinstance(t, Comment)):
+        if 'pitching"' not in comment:
+            continue
+        inner = BeautifulSoup(comment, "html.parser")
+        for table in inner.find_all("table", id=re.compile(r"pitching$")):
+            if table.tbody is None:
+                continue
+            row = table.tbody.find("tr")
+            name_cell = row.find("th", {"data-stat": "player"}) if row else None
+            link = name_cell.find("a") if name_cell else None
+            if link is None:
+                continue
+            raw = link.get_text(strip=True)
+            name = raw.encode("latin-1").decode("utf-8")
+            era_cell = row.find("td", {"data-stat": "earned_run_avg"})
+            text = era_cell.get_text(strip=True) if era_cell is not None else ""
+            era = float(text) if text else None
+            starters[table["id"][:-len("pitching")]] = (name, era)
+    return starters
+
+
+class BoxscoreStore:
+    """SQLite-backed map of boxscore URL -> starting pitcher line for both teams."""
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def reset(self) -> None:
+        """Drop the connection, e.g. in a forked worker that must open its own."""
+        with self._lock:
+            self._conn = None
+
+    def get(self, url: str, team_name: str):
+        """
+        Return (found, starter) for a team in a stored box score. ``found`` is
+        False when the URL has never been parsed; ``starter`` is None when the
+        box score has no pitching table for that team.
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn.execute("SELECT 1 FROM boxscores WHERE url = ?", (url,)).fetchone() is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            row = conn.execute(
+                "SELECT sp, sp_era FROM starters WHERE url = ? AND team = ?",
+                (url, team_key(team_name)),
+            ).fetchone()
+        return True, row
+
+    def put(self, url: str, starters: dict) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO starters (url, team, sp, sp_era) VALUES (?, ?, ?, ?)",
+                    [(url, team, sp, era) for team, (sp, era) in starters.items()],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO boxscores (url, parsed_at) VALUES (?, ?)",
+                    (url, datetime.now().isoformat(timespec="seconds")),
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._connect().execute("SELECT COUNT(*) FROM boxscores").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "boxscores": n,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+    def export(self, dest: str) -> str:
+        """Write a consistent copy of the store to ``dest``."""
+        with self._lock:
+            if os.path.dirname(dest):
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+            out = sqlite3.connect(dest)
+            try:
+                self._connect().backup(out)
+            finally:
+                out.close()
+        return dest
+
+    def import_from(self, src: str) -> int:
+        """Merge another exported store into this one; return the number of new box scores."""
+        with self._lock:
+            conn = self._connect()
+            before = conn.execute("SELECT COUNT(*) FROM boxscores").fetchone()[0]
+            conn.execute("ATTACH DATABASE ? AS other", (src,))
+            try:
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO boxscores SELECT * FROM other.boxscores")
+                    conn.execute("INSERT OR IGNORE INTO starters SELECT * FROM other.starters")
+            finally:
+                conn.execute("DETACH DATABASE other")
+            after = conn.execute("SELECT COUNT(*) FROM boxscores").fetchone()[0]
+        return after - before
+
+
+store = BoxscoreStore()
@@ -0,0 +1,142 @@
+import json
+import os
+
+import numpy as np
+
+#
+# Compact win/loss model artifact.
+#
+# The trained classifier is a sigmoid CalibratedClassifierCV over five
+# TimeSeriesSplit folds: five LightGBM forests and five Platt calibrators,
+# pickled with joblib. The compact artifact stores the same five forests (as
+# LightGBM's text format) and their Platt coefficients as JSON, and averages
+# the calibrated fold probabilities exactly as predict_proba does. Loading it
+# needs LightGBM but no scikit-learn unpickling.
+#
+# After a full retrain the five-fold joblib model is the one served; the
+# compact artifact takes over once a warm-start update has promoted it, as
+# recorded in the training state file (see warm_start.py).
+#
+COMPACT_PATH = "backend/models/mlb_wl_compact.json"
+TRAIN_STATE_PATH = "backend/models/train_state.json"
+FORMAT_VERSION = 2
+
+
+def _expit_neg(u: np.ndarray) -> np.ndarray:
+    # Platt: p = 1 / (1 + exp(a * f + b))
+    return 1. / (1. + np.exp(u))
+
+
+def fit_platt(scores: np.ndarray, target: np.ndarray, a: float = 0., b: float = 0.,
+              iterations: int = 50) -> tuple:
+    """
+    Newton steps for (a, b) minimising the log loss of 1 / (1 + exp(a*s + b))
+    against ``target``, which may be soft (another model's probabilities).
+    """
+    s = np.asarray(scores, dtype=float)
+    p = np.asarray(target, dtype=float)
+    for _ in range(iterations):
+        q = _expit_neg(a * s + b)
+        g = p - q
+        w = q * (1 - q) + 1e-12
+        grad = np.array([g @ s, g.sum()])
+        hess = np.array([[w @ (s * s), w @ s], [w @ s, w.sum()]]) + 1e-9 * np.eye(2)
+        step = np.linalg.solve(hess, grad)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-10:
+            break
+    return float(a), float(b)
+
+
+def compact_promoted(state_path: str = TRAIN_STATE_PATH) -> bool:
+    """Whether the classifier was last updated by a warm start, so the compact artifact is current."""
+    try:
+        with open(state_path) as f:
+            return json.load(f).get('classifier', {}).get('mode') == "warm"
+    except (OSError, ValueError):
+        return False
+
+
+def export_compact(clf, path: str = COMPACT_PATH, X=None) -> dict:
+    """
+    Write the compact artifact for a fitted sigmoid CalibratedClassifierCV.
+    ``X`` (a feature frame, e.g. the training rows) is used to check that the
+    artifact reproduces ``clf.predict_proba``. Returns the artifact's metadata.
+    """
+    folds = getattr(clf, 'calibrated_classifiers_', None)
+    if not folds or any(f.method != 'sigmoid' or len(f.calibrators) != 1 for f in folds):
+        raise ValueError("export_compact needs a sigmoid CalibratedClassifierCV")
+    # scikit-learn calibrates the raw score when the estimator has a
+    # decision_function, otherwise the positive class probability
+    raw_score = hasattr(folds[0].estimator, 'decision_function')
+    members = [(f.estimator.booster_, float(f.calibrators[0].a_), float(f.calibrators[0].b_)) for f in folds]
+    features = list(getattr(clf, 'feature_names_in_', members[0][0].feature_name()))
+
+    fit = None
+    if X is not None:
+        X = np.ascontiguousarray(np.asarray(X[features] if hasattr(X, 'columns') else X, dtype=float))
+        ensemble = clf.predict_proba(_frame(X, features))[:, 1]
+        diff = np.abs(CompactClassifier(members, features, raw_score).predict(X) - ensemble)
+        fit = {'rows': len(X), 'max_abs_diff': float(diff.max()), 'mean_abs_diff': float(diff.mean())}
+
+    return write_compact(members, features, path, raw_score, reference_fit=fit)
+
+
+def write_compact(folds: list, features: list, path: str = COMPACT_PATH, raw_score: bool = True,
+                  **extra) -> dict:
+    """Atomically write (booster, a, b) folds as the compact artifact."""
+    meta = {
+        'format': FORMAT_VERSION,
+        'features': list(features),
+        'raw_score': raw_score,
+        'platt': [{'a': float(a), 'b': float(b)} for _, a, b in folds],
+        **extra,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({**meta, 'boosters': [booster.model_to_string() for booster, _, _ in folds]}, f)
+    os.replace(tmp, path)
+    return meta
+
+
+def _frame(X: np.ndarray, features: list):
+    import pandas as pd
+
+    return pd.DataFrame(X, columns=features)
+
+
+class CompactClassifier:
+    """Calibrated LightGBM fold boosters, averaged like CalibratedClassifierCV, from the compact artifact."""
+
+    def __init__(self, folds: list, features: list, raw_score: bool = True):
+        # folds: (booster, a, b) per calibrated fold
+        self.folds = folds
+        self.features = features
+        self.raw_score = raw_score
+
+    @classmethod
+    def load(cls, path: str = COMPACT_PATH) -> "CompactClassifier":
+        import lightgbm as lgb
+
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {data.get('format')!r} in {path}; "
+                             "re-run export-model")
+        folds = [(lgb.Booster(model_str=booster), platt['a'], platt['b'])
+                 for booster, platt in zip(data['boosters'], data['platt'])]
+        return cls(folds, data['features'], data['raw_score'])
+
+    def predict(self, X) -> np.ndarray:
+        """Home win probability per row; ``X`` is a float matrix in ``features`` order or a frame."""
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy(dtype=float)
+        total = np.zeros(len(X))
+        for booster, a, b in self.folds:
+            total += _expit_neg(a * booster.predict(X, raw_score=self.raw_score) + b)
+        return total / len(self.folds)
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = self.predict(X)
+        return np.column_stack([1 - p, p])
@@ -1,11 +1,35 @@
-import requests
+import os
+import threading
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
 from bs4 import BeautifulSoup
-from joblib import Memory
+from tqdm import tqdm
 
-memory = Memory(location=".fangraphs_cache", verbose=0)
+from src.mlb.metrics import metrics
+from src.mlb.rate_limit import limited_get
+
+# Every daily team snapshot of a season is kept in one long table:
+# data/fangraphs/team_snapshots_{season}.csv with columns (as_of, Tm, stats...)
+# It is CSV, like the schedule datasets, rather than a columnar format: it is
+# small (about 30 rows a day) and is read whole once per process.
+#
+# Season builds run in several processes that can all miss the same season's
+# table, so new dates are never appended in place: the table is re-read,
+# merged and atomically replaced under an exclusive lock on a sidecar file.
+# Backfills collect their fetches and write them BACKFILL_BATCH dates at a
+# time, and a write with no new dates leaves the file alone.
+SNAPSHOT_DIR = "data/fangraphs"
+
+# Worker threads for backfills; requests are paced by the fangraphs limiter
+BACKFILL_WORKERS = 4
+# Fetched dates written to the season table at a time during a backfill
+BACKFILL_BATCH = 50
+
+_store_lock = threading.Lock()
+_snapshots = {}
 
 def strip_link(html):
     return BeautifulSoup(html, "html.parser").get_text()
@@ -15,7 +39,6 @@ def _prefix_all(df, key='Tm', prefix='B_'):
     df = df.rename(columns={c: f"{prefix}{c}" for c in df.columns if c != key})
     return df
 
-@lru_cache()
 def fg_team_batting_snapshot(season: int, as_of: str) -> pd.DataFrame:
     url = 'https://www.fangraphs.com/api/leaders/major-league/data'
     params = {
@@ -36,7 +59,7 @@ def fg_team_batting_snapshot(season: int, as_of: str) -> pd.DataFrame:
         'startdate': f"{season}-03-01",
         'enddate':   as_of,
     }
-    resp = requests.get(url, params=params)
+    resp = limited_get(url, params=params)
     resp.raise_for_status()
     data = resp.json().get('data', [])
     df = pd.DataFrame(data)
@@ -61,7 +84,6 @@ def fg_team_batting_snapshot(season: int, as_of: str) -> pd.DataFrame:
     bat_df = _prefix_all(df, key='Tm', prefix='B_')
     return bat_df
 
-@lru_cache()
 def fg_team_bullpen_snapshot(season: int, as_of: str) -> pd.DataFrame:
     url = 'https://www.fangraphs.com/api/leaders/major-league/data'
     params = {
@@ -82,7 +104,7 @@ def fg_team_bullpen_snapshot(season: int, as_of: str) -> pd.DataFrame:
         'startdate': f"{season}-03-01",
         'enddate':   as_of,
     }
-    resp = requests.get(url, params=params)
+    resp = limited_get(url, params=params)
     resp.raise_for_status()
     data = resp.json().get('data', [])
     df = pd.DataFrame(data)
@@ -102,7 +124,7 @@ def fg_team_bullpen_snapshot(season: int, as_of: str) -> pd.DataFrame:
     rp_df = _prefix_all(df, key='Tm', prefix='RP_')
     return rp_df
 
-def fg_team_snapshot(season: int, as_of: str) -> pd.DataFrame:
+def fetch_team_snapshot(season: int, as_of: str) -> pd.DataFrame:
     bat_df = fg_team_batting_snapshot(season, as_of)
     bp_df = fg_team_bullpen_snapshot(season, as_of)
     
@@ -111,4 +133,120 @@ def fg_team_snapshot(season: int, as_of: str) -> pd.DataFrame:
     
     df = bat_df.merge(bp_df, on=["Tm"], how="left")
     #df.to_csv("data/merged_fangraphs_data.csv", index=False)
-    return df
\ No newline at end of file
+    return df
+
+def _store_path(season: int) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"team_snapshots_{season}.csv")
+
+def _parse_table(table: pd.DataFrame) -> dict:
+    snaps = {}
+    for as_of, snap in table.groupby('as_of', sort=False):
+        # Dates with no Fangraphs data are stored as a single row without Tm
+        snaps[as_of] = snap[snap['Tm'].notna()].drop(columns=['as_of']).reset_index(drop=True)
+    return snaps
+
+def _read_table(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, dtype={'as_of': str, 'Tm': str})
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock across processes (a no-op where fcntl is unavailable)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(f"{path}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _season_snapshots(season: int) -> dict:
+    """as_of -> snapshot DataFrame for every date stored for a season (loaded once)."""
+    if season not in _snapshots:
+        path = _store_path(season)
+        _snapshots[season] = _parse_table(_read_table(path)) if os.path.exists(path) else {}
+    return _snapshots[season]
+
+def _store_snapshots(season: int, fetched: dict) -> None:
+    """Persist fetched snapshots (as_of -> DataFrame) and make them visible to this process."""
+    snaps = _season_snapshots(season)
+    for as_of, snap in fetched.items():
+        snaps.setdefault(as_of, snap.reset_index(drop=True))
+    path = _store_path(season)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with _file_lock(path):
+        # Other processes may have stored dates since this one loaded the table
+        table = _read_table(path) if os.path.exists(path) else None
+        stored = set(table['as_of']) if table is not None else set()
+        parts = []
+        for as_of, snap in sorted(fetched.items()):
+            if as_of in stored:
+                continue
+            rows = snap.copy()
+            if rows.empty:
+                # Dates with no Fangraphs data are stored as a single row without Tm
+                rows = pd.DataFrame([{c: np.nan for c in snap.columns}])
+            rows.insert(0, 'as_of', as_of)
+            parts.append(rows)
+        if not parts:
+            return
+        if table is not None:
+            # Keep the stored column order even if Fangraphs reorders its payload
+            parts = [table] + [rows.reindex(columns=table.columns) for rows in parts]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pd.concat(parts, ignore_index=True).to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+def fg_team_snapshot(season: int, as_of: str) -> pd.DataFrame:
+    """Team batting + bullpen snapshot through ``as_of``, from the store when possible."""
+    with _store_lock:
+        snaps = _season_snapshots(season)
+        metrics.record_cache('fangraphs_snapshots', as_of in snaps)
+        if as_of in snaps:
+            return snaps[as_of]
+
+    snap = fetch_team_snapshot(season, as_of)
+    if as_of >= date.today().strftime("%Y-%m-%d"):
+        # Today's numbers are still moving; don't persist them
+        return snap
+    with _store_lock:
+        if as_of not in snaps:
+            _store_snapshots(season, {as_of: snap})
+        return snaps[as_of]
+
+def season_as_of_dates(season: int) -> list:
+    """Every as_of date a season's games can need, up to yesterday."""
+    start = date(season, 3, 15)
+    end = min(date(season, 10, 5), date.today() - timedelta(days=1))
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+def backfill_season(season: int, dates=None, workers: int = BACKFILL_WORKERS) -> int:
+    """
+    Fetch every missing snapshot of ``season`` (or of ``dates``) concurrently
+    and persist them BACKFILL_BATCH dates at a time. Returns the number of
+    dates fetched.
+    """
+    dates = season_as_of_dates(season) if dates is None else dates
+    today = date.today().strftime("%Y-%m-%d")
+    with _store_lock:
+        stored = _season_snapshots(season)
+        missing = sorted({d for d in dates if d not in stored and d < today})
+    if not missing:
+        return 0
+
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_team_snapshot, season, d): d for d in missing}
+        for fut in tqdm(as_completed(futures), total=len(futures), desc=f"Fangraphs {season}"):
+            fetched[futures[fut]] = fut.result()
+            if len(fetched) >= BACKFILL_BATCH:
+                with _store_lock:
+                    _store_snapshots(season, fetched)
+                fetched = {}
+    if fetched:
+        with _store_lock:
+            _store_snapshots(season, fetched)
+    return len(missing)
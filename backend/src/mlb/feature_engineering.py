@@ -1,53 +1,19 @@
-from sklearn.preprocessing import LabelEncoder
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
 import pandas as pd
-import time
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
-import random
 
 from src.mlb.pitchers import get_starting_pitcher
-from src.mlb.fangraphs_stats import fg_team_snapshot
+from src.mlb.fangraphs_stats import fg_team_snapshot, backfill_season
+from src.mlb.metrics import metrics
+from src.mlb.rolling_state import ROLLING_WINDOWS, add_rolling_features
+from src.mlb.teams import full_to_abbrev, full_to_abbrev_proc, abbrev_to_full
 
-# Arizona D'Backs when creating raw data (for collecting boxscores) or making prediction
-# Arizona Diamondbacks when creating processed data 
-# 2025 season uses Athletics: 'ATH'
-full_to_abbrev = {
-    'Arizona D\'Backs':       'ARI',
-    'Atlanta Braves':         'ATL',
-    'Baltimore Orioles':      'BAL',
-    'Boston Red Sox':         'BOS',
-    'Chicago Cubs':           'CHC',
-    'Chicago White Sox':      'CHW',
-    'Cincinnati Reds':        'CIN',
-    'Cleveland Guardians':    'CLE',
-    'Colorado Rockies':       'COL',
-    'Detroit Tigers':         'DET',
-    'Houston Astros':         'HOU',
-    'Kansas City Royals':     'KCR',
-    'Los Angeles Angels':     'LAA',
-    'Los Angeles Dodgers':    'LAD',
-    'Miami Marlins':          'MIA',
-    'Milwaukee Brewers':      'MIL',
-    'Minnesota Twins':        'MIN',
-    'New York Mets':          'NYM',
-    'New York Yankees':       'NYY',
-#   'Oakland Athletics':      'OAK',
-    'Athletics':              'ATH',
-    'Philadelphia Phillies':  'PHI',
-    'Pittsburgh Pirates':     'PIT',
-    'San Diego Padres':       'SDP',
-    'Seattle Mariners':       'SEA',
-    'San Francisco Giants':   'SFG',
-    'St. Louis Cardinals':    'STL',
-    'Tampa Bay Rays':         'TBR',
-    'Texas Rangers':          'TEX',
-    'Toronto Blue Jays':      'TOR',
-    'Washington Nationals':   'WSN'
-}
-
-full_to_abbrev_proc = full_to_abbrev.copy()
-full_to_abbrev_proc['Arizona Diamondbacks'] = full_to_abbrev_proc.pop('Arizona D\'Backs')
-
-abbrev_to_full = {abbrev: full for full, abbrev in full_to_abbrev_proc.items()}
+logger = logging.getLogger(__name__)
 
 _snapshot_cache = {}
 
@@ -56,8 +22,49 @@ def get_snapshot_for_date(season: int, as_of: str):
         _snapshot_cache[as_of] = fg_team_snapshot(season, as_of)
     return _snapshot_cache[as_of]
 
-# Create features for team dataframe
-def create_features(year: int, df: pd.DataFrame, rolling_windows=[3, 5, 10]) -> pd.DataFrame:
+def stack_snapshots(season: int, dates) -> pd.DataFrame:
+    """The snapshots of ``dates`` as one (as_of, Tm, stats...) table, one row per team and date."""
+    frames = []
+    for as_of in dates:
+        snap = get_snapshot_for_date(season, as_of).drop_duplicates(subset=['Tm'], keep='first')
+        frames.append(snap.assign(as_of=as_of))
+    if not frames:
+        return pd.DataFrame(columns=['as_of', 'Tm'])
+    return pd.concat(frames, ignore_index=True)
+
+# Worker threads used to scrape starting pitchers. Requests are paced by the
+# per-host limiter in rate_limit, so more workers only overlap waiting time.
+SP_WORKERS = 4
+
+def load_sp_checkpoint(path: str) -> dict:
+    """
+    Boxscore URL -> starting pitcher record from a checkpoint file (one JSON
+    object per line). A line torn by a crash can only be the last one and is
+    dropped.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            done[entry['Boxscore']] = entry['record']
+    return done
+
+def _append_sp_checkpoint(path: str, box_url: str, record: dict) -> None:
+    with open(path, "a") as f:
+        f.write(json.dumps({'Boxscore': box_url, 'record': record}, default=float) + "\n")
+        f.flush()
+
+# Create features for team dataframe.
+# ``sp_checkpoint`` is a file that every scraped game is appended to, so an
+# interrupted build resumes at the first game it had not finished; ``progress``
+# is called once per game instead of drawing a tqdm bar.
+def create_features(year: int, df: pd.DataFrame, rolling_windows=ROLLING_WINDOWS, sp_workers: int = SP_WORKERS,
+                    sp_checkpoint: Optional[str] = None, progress: Optional[Callable[[], None]] = None) -> pd.DataFrame:
     df = df.copy()
     # Drop unwanted columns
     df.drop(columns=['Time', 'Attendance', 'Inn', 'Orig. Scheduled', 'Save', 'GB', 'Win', 'Loss', 'Game_Number'], inplace=True)
@@ -66,20 +73,30 @@ def create_features(year: int, df: pd.DataFrame, rolling_windows=[3, 5, 10]) ->
     df['Tm'] = df['Tm'].map(abbrev_to_full)
 
     # Get starting pitcher stats
+    done = load_sp_checkpoint(sp_checkpoint) if sp_checkpoint else {}
+    checkpoint_lock = threading.Lock()
+
     def _scrape_sp(row):
-        stats = get_starting_pitcher(
-            row['Boxscore'],
-            row['Tm'],
-            row['Date'],
-            year
-        )
-        time.sleep(random.uniform(1,2))  # Random sleep to avoid hitting the server too hard
-        return stats
-    
-    records = []
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Fetching SP stats"):
-        stats = _scrape_sp(row)
-        records.append(stats)
+        record = done.get(row['Boxscore'])
+        if record is None:
+            record = get_starting_pitcher(
+                row['Boxscore'],
+                row['Tm'],
+                row['Date'],
+                year
+            )
+            if sp_checkpoint:
+                with checkpoint_lock:
+                    _append_sp_checkpoint(sp_checkpoint, row['Boxscore'], record)
+        if progress is not None:
+            progress()
+        return record
+
+    # executor.map yields in submission order, so records stay aligned with df
+    rows = df[['Boxscore', 'Tm', 'Date']].to_dict('records')
+    with metrics.stage("create_features.starting_pitchers"), ThreadPoolExecutor(max_workers=sp_workers) as executor:
+        records = list(tqdm(executor.map(_scrape_sp, rows), total=len(rows), desc="Fetching SP stats",
+                            disable=progress is not None))
 
     sp_stats = pd.DataFrame(records)
     
@@ -107,52 +124,7 @@ def create_features(year: int, df: pd.DataFrame, rolling_windows=[3, 5, 10]) ->
     )
     
     # Rolling stats over various windows (Simple rolling and EWM)
-    for window in rolling_windows:
-        df[f'R_MA{window}'] = (
-            df['R']
-            .shift(1)
-            .rolling(window=window, min_periods=1)
-            .mean()
-            .round(3)
-        )
-        df[f'RA_MA{window}'] = (
-            df['RA']
-            .shift(1)
-            .rolling(window=window, min_periods=1)
-            .mean()
-            .round(3)
-        )
-        df[f'RunDiff_MA{window}'] = (
-            df['Run_Diff']
-            .shift(1)
-            .rolling(window=window, min_periods=1)
-            .mean()
-            .round(3)
-        )
-        
-        df[f'R_EWMA{window}'] = (
-            df['R']
-            .shift(1)
-            .ewm(span=window, adjust=False)
-            .mean()
-            .round(3)
-        )
-        
-        df[f'RA_EWMA{window}'] = (
-            df['RA']
-            .shift(1)
-            .ewm(span=window, adjust=False)
-            .mean()
-            .round(3)
-        )
-        
-        df[f'RunDiff_EWMA{window}'] = (
-            df['Run_Diff']
-            .shift(1)
-            .ewm(span=window, adjust=False)
-            .mean()
-            .round(3)
-        )
+    df = add_rolling_features(df, rolling_windows)
     
     # Encode categorical variables
     df['Home_Away'] = df['Home_Away'].map({'Home': 1, '@': 0})
@@ -162,27 +134,16 @@ def create_features(year: int, df: pd.DataFrame, rolling_windows=[3, 5, 10]) ->
     # Add Fangraphs stats
     df['Date'] = pd.to_datetime(df['Date'])
     df['as_of'] = (df['Date'] - pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d")
+    # Fetch every snapshot the snapshot store is missing in one concurrent pass
+    with metrics.stage("create_features.fangraphs_backfill"):
+        backfill_season(year, dates=df['as_of'].unique().tolist())
 
-    # Pull out the Tm rows for each game
-    batting_rows = []
-    for _, row in df.iterrows():
-        snap = get_snapshot_for_date(year, row['as_of'])
-        print("Fetching Fangraphs stats for date:", row['as_of'])
-        team_slice = snap[snap['Tm'] == row['Tm']]
-        if team_slice.empty:
-            # build a dict of NaNs for every stat except 'Tm'
-            tm_pref = {c: float('nan') for c in snap.columns if c != 'Tm'}
-        else:
-            tm_vals = team_slice.iloc[0]
-            tm_pref = {
-                c: tm_vals[c] 
-                for c in tm_vals.index
-                if c != 'Tm'
-            }
-            
-        batting_rows.append({**tm_pref})
-
-    batting_df = pd.DataFrame(batting_rows)
+    # One as-of join against every needed snapshot stacked on (as_of, Tm)
+    batting_df = (
+        df[['as_of', 'Tm']]
+        .merge(stack_snapshots(year, df['as_of'].unique()), on=['as_of', 'Tm'], how='left')
+        .drop(columns=['as_of', 'Tm'])
+    )
     df = pd.concat([df.reset_index(drop=True), batting_df], axis=1)
     df.drop(columns=['as_of'], inplace=True)
     
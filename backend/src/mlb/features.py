@@ -0,0 +1,50 @@
+#
+# Model feature columns, kept apart from the training code so prediction can
+# use them without importing LightGBM and scikit-learn.
+#
+# Recently removed:
+# 'R_MA3', 'R_MA5', 'R_MA10', 
+# 'RA_MA3', 'RA_MA5', 'RA_MA10',
+# 'Opp_R_MA3', 'Opp_R_MA5', 'Opp_R_MA10',
+# 'Opp_RA_MA3', 'Opp_RA_MA5', 'Opp_RA_MA10',
+FEATURES = [
+    'Home_Away', 'Rank', 'Streak', 'D/N',
+    'RunDiff_MA3', 'RunDiff_MA5', 'RunDiff_MA10',
+    'RunDiff_EWMA3', 'RunDiff_EWMA5', 'RunDiff_EWMA10',
+    'SP_ERA', 'SP_WAR', 'SP_K9', 'SP_BB9', 
+    'SP_WHIP', 'SP_IP', 'SP_HardHit%',
+    'B_HR', 'B_RBI', 'B_H', 'B_wRC+', 'B_wOBA', 
+    'B_SLG+', 'B_OBP+', 'B_AVG+', 'B_ISO+', 
+    'B_HRFB%+', 'B_BB%+', 'B_K%+', 'B_Spd', 
+    'B_EV', 'B_LA', 'B_Barrel%', 'B_HardHit%', 
+    'B_Pull%+', 'B_Oppo%+', 'B_Cent%+', 'B_WPA',
+    'B_pLI', 'B_Clutch', 'B_WAR', 'B_RAR',
+    'B_BaseRunning', 'B_Offense', 'B_Defense',
+    'B_Fielding', 'B_wBsR', 'B_Batting', 
+    'B_Positional', 'B_wLeague',
+    'RP_WPA', 'RP_pLI', 'RP_Clutch', 'RP_MD',
+    'RP_WAR', 'RP_FIP', 'RP_ERA', 'RP_RAR',
+    'Opp_Rank', 'Opp_Streak',
+    'Opp_RunDiff_MA3', 'Opp_RunDiff_MA5', 
+    'Opp_RunDiff_MA10', 'Opp_RunDiff_EWMA3',
+    'Opp_RunDiff_EWMA5', 'Opp_RunDiff_EWMA10',
+    'Opp_SP_ERA', 'Opp_SP_WAR', 'Opp_SP_K9',
+    'Opp_SP_BB9', 'Opp_SP_WHIP', 'Opp_SP_IP', 'Opp_SP_HardHit%',
+    'Opp_B_HR', 'Opp_B_RBI', 'Opp_B_H',
+    'Opp_B_wRC+', 'Opp_B_wOBA', 'Opp_B_SLG+',
+    'Opp_B_OBP+', 'Opp_B_AVG+', 'Opp_B_ISO+',
+    'Opp_B_HRFB%+', 'Opp_B_BB%+', 'Opp_B_K%+',
+    'Opp_B_Spd', 'Opp_B_EV', 'Opp_B_LA',
+    'Opp_B_Barrel%', 'Opp_B_HardHit%', 'Opp_B_Pull%+',
+    'Opp_B_Oppo%+', 'Opp_B_Cent%+', 'Opp_B_WPA',
+    'Opp_B_pLI', 'Opp_B_Clutch', 'Opp_B_WAR',
+    'Opp_B_RAR', 'Opp_B_BaseRunning', 'Opp_B_Offense',
+    'Opp_B_Defense', 'Opp_B_Fielding', 'Opp_B_wBsR',
+    'Opp_B_Batting', 'Opp_B_Positional', 'Opp_B_wLeague',
+    'Opp_RP_WPA', 'Opp_RP_pLI', 'Opp_RP_Clutch',
+    'Opp_RP_MD', 'Opp_RP_WAR', 'Opp_RP_FIP',
+    'Opp_RP_ERA', 'Opp_RP_RAR',
+]
+
+# Columns the training jobs read from the processed datasets
+TRAIN_COLUMNS = ['Date', 'R', 'RA', 'W/L'] + FEATURES
@@ -1,4 +1,5 @@
 import os
+import time
 import pandas as pd
 import numpy as np
 import lightgbm as lgb
@@ -19,50 +20,11 @@ from sklearn.frozen import FrozenEstimator
 
 from src.mlb.load_process import load_all_teams_data
 from src.mlb.supabase_client import upload_file_to_bucket, ensure_local_file
-
-# Recently removed:
-# 'R_MA3', 'R_MA5', 'R_MA10', 
-# 'RA_MA3', 'RA_MA5', 'RA_MA10',
-# 'Opp_R_MA3', 'Opp_R_MA5', 'Opp_R_MA10',
-# 'Opp_RA_MA3', 'Opp_RA_MA5', 'Opp_RA_MA10',
-FEATURES = [
-    'Home_Away', 'Rank', 'Streak', 'D/N',
-    'RunDiff_MA3', 'RunDiff_MA5', 'RunDiff_MA10',
-    'RunDiff_EWMA3', 'RunDiff_EWMA5', 'RunDiff_EWMA10',
-    'SP_ERA', 'SP_WAR', 'SP_K9', 'SP_BB9', 
-    'SP_WHIP', 'SP_IP', 'SP_HardHit%',
-    'B_HR', 'B_RBI', 'B_H', 'B_wRC+', 'B_wOBA', 
-    'B_SLG+', 'B_OBP+', 'B_AVG+', 'B_ISO+', 
-    'B_HRFB%+', 'B_BB%+', 'B_K%+', 'B_Spd', 
-    'B_EV', 'B_LA', 'B_Barrel%', 'B_HardHit%', 
-    'B_Pull%+', 'B_Oppo%+', 'B_Cent%+', 'B_WPA',
-    'B_pLI', 'B_Clutch', 'B_WAR', 'B_RAR',
-    'B_BaseRunning', 'B_Offense', 'B_Defense',
-    'B_Fielding', 'B_wBsR', 'B_Batting', 
-    'B_Positional', 'B_wLeague',
-    'RP_WPA', 'RP_pLI', 'RP_Clutch', 'RP_MD',
-    'RP_WAR', 'RP_FIP', 'RP_ERA', 'RP_RAR',
-    'Opp_Rank', 'Opp_Streak',
-    'Opp_RunDiff_MA3', 'Opp_RunDiff_MA5', 
-    'Opp_RunDiff_MA10', 'Opp_RunDiff_EWMA3',
-    'Opp_RunDiff_EWMA5', 'Opp_RunDiff_EWMA10',
-    'Opp_SP_ERA', 'Opp_SP_WAR', 'Opp_SP_K9',
-    'Opp_SP_BB9', 'Opp_SP_WHIP', 'Opp_SP_IP', 'Opp_SP_HardHit%',
-    'Opp_B_HR', 'Opp_B_RBI', 'Opp_B_H',
-    'Opp_B_wRC+', 'Opp_B_wOBA', 'Opp_B_SLG+',
-    'Opp_B_OBP+', 'Opp_B_AVG+', 'Opp_B_ISO+',
-    'Opp_B_HRFB%+', 'Opp_B_BB%+', 'Opp_B_K%+',
-    'Opp_B_Spd', 'Opp_B_EV', 'Opp_B_LA',
-    'Opp_B_Barrel%', 'Opp_B_HardHit%', 'Opp_B_Pull%+',
-    'Opp_B_Oppo%+', 'Opp_B_Cent%+', 'Opp_B_WPA',
-    'Opp_B_pLI', 'Opp_B_Clutch', 'Opp_B_WAR',
-    'Opp_B_RAR', 'Opp_B_BaseRunning', 'Opp_B_Offense',
-    'Opp_B_Defense', 'Opp_B_Fielding', 'Opp_B_wBsR',
-    'Opp_B_Batting', 'Opp_B_Positional', 'Opp_B_wLeague',
-    'Opp_RP_WPA', 'Opp_RP_pLI', 'Opp_RP_Clutch',
-    'Opp_RP_MD', 'Opp_RP_WAR', 'Opp_RP_FIP',
-    'Opp_RP_ERA', 'Opp_RP_RAR',
-]
+from src.mlb.features import FEATURES, TRAIN_COLUMNS
+from src.mlb.compact_model import COMPACT_PATH, export_compact
+from src.mlb.tuning import cpu_budget, halving_search
+from src.mlb.train_dataset import TrainingData, balanced_weight
+from src.mlb.warm_start import STATE_PATH, mark_trained
 
 def _prepare_features(df: pd.DataFrame, feature_list: list) -> pd.DataFrame:
     """Return numeric feature matrix with constant columns removed."""
@@ -73,51 +35,40 @@ def _prepare_features(df: pd.DataFrame, feature_list: list) -> pd.DataFrame:
         X = X.drop(columns=constant_cols)
     return X
 
-os.makedirs("models", exist_ok=True)
-
-def train_run_diff_model(df: pd.DataFrame) -> lgb.Booster:
+def prepare_training_data(df: pd.DataFrame) -> TrainingData:
     """
-    Train a LightGBM regression model to predict the run differential (R - RA).
+    Drop incomplete rows, sort chronologically and build the feature matrix
+    once for all three models, with the run-diff and run-total targets.
     """
-    # 1) Load processed features
-    df['Run_Diff'] = df['R'] - df['RA']
-
-    # 2) Drop missing and sort chronologically
-    df = df.dropna(subset=FEATURES + ['Run_Diff'])
+    df = df.dropna(subset=FEATURES + ['R', 'RA', 'W/L']).copy()
     df['Date'] = pd.to_datetime(df['Date'])
     df = df.sort_values('Date')
-    df = df.dropna(subset=FEATURES + ['Run_Diff'])
-    X = _prepare_features(df, FEATURES)
-    y = df['Run_Diff']
-
-    # 3) Chronological train/test split
-    split_idx = int(len(df) * 0.8)
-    X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
-    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
-
-    # 4) Create LightGBM datasets
-    dtrain = lgb.Dataset(X_train, label=y_train)
-    dvalid = lgb.Dataset(X_test, label=y_test, reference=dtrain)
-
-    # 5) Model parameters
-    params = {
-        'objective': 'regression',
-        'metric': 'rmse',
-        'boosting_type': 'gbdt',
-        'learning_rate': 0.01,
-        'num_leaves': 31,
-        'min_data_in_leaf': 20,
-        'feature_fraction': 0.8,
-        'bagging_fraction': 0.8,
-        'bagging_freq': 5,
-        'lambda_l1': 0.1,
-        'lambda_l2': 0.1,
-        'verbose': -1
-    }
-
-    # 6) Train with early stopping
+    df['Run_Diff'] = df['R'] - df['RA']
+    df['Run_Total'] = df['R'] + df['RA']
+    return TrainingData(df, _prepare_features(df, FEATURES))
+
+# Shared by the run-diff and run-total regressors
+REG_PARAMS = {
+    'objective': 'regression',
+    'metric': 'rmse',
+    'boosting_type': 'gbdt',
+    'learning_rate': 0.01,
+    'num_leaves': 31,
+    'min_data_in_leaf': 20,
+    'feature_fraction': 0.8,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'lambda_l1': 0.1,
+    'lambda_l2': 0.1,
+    'verbose': -1
+}
+
+def _train_regression(data: TrainingData, target: str, name: str, path: str, state_name: str) -> lgb.Booster:
+    dtrain, dvalid = data.datasets(target)
+
+    # Train with early stopping
     model = lgb.train(
-        params,
+        REG_PARAMS,
         dtrain,
         num_boost_round=2000,
         valid_sets=[dtrain, dvalid],
@@ -127,105 +78,61 @@ def train_run_diff_model(df: pd.DataFrame) -> lgb.Booster:
         ]
     )
 
-    # 7) Evaluate
-    y_pred = model.predict(X_test, num_iteration=model.best_iteration)
+    # Evaluate
+    _, y_test = data.target(target)
+    y_pred = model.predict(data.X_test, num_iteration=model.best_iteration)
     rmse = root_mean_squared_error(y_test, y_pred)
     r2   = r2_score(y_test, y_pred)
-    print(f"RunDiff RMSE: {rmse:.3f}, R2: {r2:.3f}")
+    print(f"{name} RMSE: {rmse:.3f}, R2: {r2:.3f}")
 
-    # 8) Save the model
-    model.save_model(f"backend/models/run_diff_lgbm.txt")
+    model.save_model(path)
+    # Warm-start updates continue from the last training row
+    mark_trained(data.frame['Date'].iloc[data.split_idx - 1], [state_name])
     return model
 
-
-def train_run_total_model(df: pd.DataFrame) -> lgb.Booster:
+def train_run_diff_model(df: pd.DataFrame, data: TrainingData = None) -> lgb.Booster:
     """
-    Train a LightGBM regression model to predict the total runs (R + RA).
+    Train a LightGBM regression model to predict the run differential (R - RA).
     """
-    # 1) Load processed features
-    df['Run_Total'] = df['R'] + df['RA']
-
-    # 2) Drop missing and sort chronologically
-    df = df.dropna(subset=FEATURES + ['Run_Total'])
-    df['Date'] = pd.to_datetime(df['Date'])
-    df = df.sort_values('Date')
-    X = _prepare_features(df, FEATURES)
-    y = df['Run_Total']
-
-    # 3) Chronological train/test split
-    split_idx = int(len(df) * 0.8)
-    X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
-    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
-
-    # 4) Create LightGBM datasets
-    dtrain = lgb.Dataset(X_train, label=y_train)
-    dvalid = lgb.Dataset(X_test, label=y_test, reference=dtrain)
-
-    # 5) Model parameters (same as RunDiff)
-    params = {
-        'objective': 'regression',
-        'metric': 'rmse',
-        'boosting_type': 'gbdt',
-        'learning_rate': 0.01,
-        'num_leaves': 31,
-        'min_data_in_leaf': 20,
-        'feature_fraction': 0.8,
-        'bagging_fraction': 0.8,
-        'bagging_freq': 5,
-        'lambda_l1': 0.1,
-        'lambda_l2': 0.1,
-        'verbose': -1
-    }
-
-    # 6) Train with early stopping
-    model = lgb.train(
-        params,
-        dtrain,
-        num_boost_round=2000,
-        valid_sets=[dtrain, dvalid],
-        callbacks=[
-            lgb.callback.early_stopping(stopping_rounds=50),
-            lgb.callback.log_evaluation(period=100)
-        ]
-    )
+    data = data or prepare_training_data(df)
+    return _train_regression(data, 'Run_Diff', "RunDiff", "backend/models/run_diff_lgbm.txt", 'run_diff')
 
-    # 7) Evaluate
-    y_pred = model.predict(X_test, num_iteration=model.best_iteration)
-    rmse = root_mean_squared_error(y_test, y_pred)
-    r2   = r2_score(y_test, y_pred)
-    print(f"RunTotal RMSE: {rmse:.3f}, R2: {r2:.3f}")
 
-    # 8) Save the model
-    model.save_model(f"backend/models/run_total_lgbm.txt")
-    return model
+def train_run_total_model(df: pd.DataFrame, data: TrainingData = None) -> lgb.Booster:
+    """
+    Train a LightGBM regression model to predict the total runs (R + RA).
+    """
+    data = data or prepare_training_data(df)
+    return _train_regression(data, 'Run_Total', "RunTotal", "backend/models/run_total_lgbm.txt", 'run_total')
 
     
-def train_lgbm_classification_model(df: pd.DataFrame) -> CalibratedClassifierCV:
-    """Train and calibrate a LightGBM classifier."""
+def train_lgbm_classification_model(df: pd.DataFrame, search: str = "random", cpus: int = None,
+                                    trial_threads: int = 1, data: TrainingData = None) -> CalibratedClassifierCV:
+    """
+    Train and calibrate a LightGBM classifier. ``search`` is "random"
+    (RandomizedSearchCV over full 1000-tree fits) or "halving" (successive
+    halving with per-fold early stopping, see tuning.py); both keep to
+    ``cpus`` cores, default all of them.
+    """
 
     target = 'W/L'
 
-    # Drop rows with missing values, parse dates, and sort chronologically
-    df = df.dropna(subset=FEATURES + [target])
-    df['Date'] = pd.to_datetime(df['Date'])
-    df = df.sort_values('Date')
-    X = _prepare_features(df, FEATURES)
-    y = df[target]
-
-    # Split once to hold out a final test set (chronological)
-    split_idx = int(len(df) * 0.8)
-    X_train_full, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
-    y_train_full, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
+    # Rows with missing values dropped, sorted chronologically, with a final
+    # test set held out (chronological)
+    data = data or prepare_training_data(df)
+    X = data.X
+    X_train_full, X_test = data.X_train, data.X_test
+    y_train_full, y_test = data.target(target)
 
     # Base model for hyperparameter tuning
-    base_clf = lgb.LGBMClassifier(
+    base_params = dict(
         objective='binary',
         boosting_type='gbdt',
         n_estimators=1000,
         class_weight='balanced',
-        n_jobs=-1,
         random_state=42,
     )
+    workers, threads = cpu_budget(cpus, trial_threads)
 
     param_dist = {
         'num_leaves': [31, 63, 127],
@@ -239,43 +146,55 @@ def train_lgbm_classification_model(df: pd.DataFrame) -> CalibratedClassifierCV:
 
     cv = TimeSeriesSplit(n_splits=5)
 
-    search = RandomizedSearchCV(
-        estimator=base_clf,
-        param_distributions=param_dist,
-        n_iter=25,
-        scoring='roc_auc',
-        cv=cv,
-        n_jobs=-1,
-        verbose=1,
-        random_state=42,
-    )
-
-    # Hyperparameter tuning using cross-validation
-    search.fit(X_train_full, y_train_full)
+    # Hyperparameter tuning using cross-validation. Trials run side by side
+    # with few LightGBM threads each rather than nesting two thread pools
+    # that each try to use every core.
+    start = time.perf_counter()
+    if search == "halving":
+        result = halving_search(data, target, base_params, param_dist, cv,
+                                n_candidates=25, cpus=cpus, trial_threads=trial_threads)
+        best_params, best_score, fits = result['best_params'], result['best_score'], result['fits']
+    elif search == "random":
+        search_cv = RandomizedSearchCV(
+            estimator=lgb.LGBMClassifier(**base_params, n_jobs=threads, verbose=-1),
+            param_distributions=param_dist,
+            n_iter=25,
+            scoring='roc_auc',
+            cv=cv,
+            n_jobs=workers,
+            verbose=1,
+            random_state=42,
+        )
+        search_cv.fit(X_train_full, y_train_full)
+        best_params, best_score, fits = search_cv.best_params_, search_cv.best_score_, 25 * cv.get_n_splits()
+    else:
+        raise ValueError(f"Unknown search mode {search!r}; expected 'halving' or 'random'")
 
-    best_params = search.best_params_
     print(f"Best params: {best_params}")
+    print(f"Search ({search}): {time.perf_counter() - start:.1f}s wall, {fits} fold fits, "
+          f"{workers} x {threads} threads, CV ROC AUC {best_score:.4f}")
 
-    # Further split training data for early stopping (chronological)
+    # Further split training data for early stopping (chronological). Both
+    # parts are views of the shared binned dataset; the balanced class
+    # weights are the ones LGBMClassifier would use.
     val_idx = int(len(X_train_full) * 0.8)
-    X_train, X_valid = X_train_full.iloc[:val_idx], X_train_full.iloc[val_idx:]
-    y_train, y_valid = y_train_full.iloc[:val_idx], y_train_full.iloc[val_idx:]
-
-    best_clf = lgb.LGBMClassifier(
-        objective='binary',
-        boosting_type='gbdt',
-        class_weight='balanced',
-        n_jobs=-1,
-        random_state=42,
-        n_estimators=1000,
-        **best_params,
-    )
-
-    best_clf.fit(
-        X_train,
-        y_train,
-        eval_set=[(X_valid, y_valid)],
-        eval_metric='auc',
+    weight = balanced_weight(y_train_full.iloc[:val_idx])
+    dtrain = data.train_subset(target, range(val_idx), weight=weight)
+    dvalid = data.train_subset(target, range(val_idx, len(X_train_full)))
+
+    best_booster = lgb.train(
+        {
+            'objective': 'binary',
+            'boosting_type': 'gbdt',
+            'metric': ['binary_logloss', 'auc'],
+            'num_threads': workers * threads,
+            'seed': 42,
+            'verbose': -1,
+            **best_params,
+        },
+        dtrain,
+        num_boost_round=1000,
+        valid_sets=[dvalid],
         callbacks=[
             lgb.early_stopping(50),
             lgb.log_evaluation(100),
@@ -287,9 +206,9 @@ def train_lgbm_classification_model(df: pd.DataFrame) -> CalibratedClassifierCV:
         objective='binary',
         boosting_type='gbdt',
         class_weight='balanced',
-        n_jobs=-1,
+        n_jobs=workers * threads,
         random_state=42,
-        n_estimators=best_clf.best_iteration_ or best_clf.n_estimators,
+        n_estimators=best_booster.best_iteration or 1000,
         **best_params,
     )
 
@@ -313,7 +232,7 @@ def train_lgbm_classification_model(df: pd.DataFrame) -> CalibratedClassifierCV:
     print("Feature importances:")
     feature_importances = pd.DataFrame({
         'Feature': X.columns,
-        'Importance': best_clf.booster_.feature_importance(),
+        'Importance': best_booster.feature_importance(),
     }).sort_values(by='Importance', ascending=False)
 
     print(feature_importances.to_string())
@@ -332,8 +251,14 @@ def train_lgbm_classification_model(df: pd.DataFrame) -> CalibratedClassifierCV:
     except Exception as exc:
         print(f"Could not create calibration plot: {exc}")
 
-    best_clf.booster_.save_model("backend/models/mlb_wl_lgbm.txt")
+    best_booster.save_model("backend/models/mlb_wl_lgbm.txt")
     joblib.dump(calibrated_clf, "backend/models/mlb_wl_calibrated.joblib")
+    compact = export_compact(calibrated_clf, COMPACT_PATH, X_train_full)
+    print(f"Compact model written to {COMPACT_PATH}: {compact['reference_fit']}")
+    # Warm-start updates continue the compact fold boosters from the last row
+    # the newest (last) calibration fold was fit on
+    fold_rows, _ = list(cv.split(X_train_full))[-1]
+    mark_trained(data.frame['Date'].iloc[fold_rows[-1]], ['classifier'])
 
     return calibrated_clf
 
@@ -369,15 +294,32 @@ def load_clf_model(model_path: str) -> lgb.Booster:
     model = lgb.Booster(model_file=model_path)
     return model
 
-def create_models():
-    schedules_2025 = load_all_teams_data(2025)
-    schedules_2024 = load_all_teams_data(2024)
-    schedules_2023 = load_all_teams_data(2023)
+def export_model(source: str = "backend/models/mlb_wl_calibrated.joblib", dest: str = COMPACT_PATH,
+                 seasons=(2023, 2024, 2025)) -> dict:
+    """Compact artifact from an existing calibrated model, checked on the given seasons' rows."""
+    clf = joblib.load(source)
+    X = None
+    if seasons:
+        df = pd.concat([load_all_teams_data(year, columns=TRAIN_COLUMNS) for year in seasons], ignore_index=True)
+        X = df.dropna(subset=FEATURES + ['W/L'])[list(clf.feature_names_in_)]
+    meta = export_compact(clf, dest, X)
+    print(f"Compact model written to {dest}: {meta['reference_fit']}")
+    return meta
+
+def create_models(search: str = "random", cpus: int = None, trial_threads: int = 1):
+    # Created here rather than at import, where the trained models are saved
+    os.makedirs("backend/models", exist_ok=True)
+    schedules_2025 = load_all_teams_data(2025, columns=TRAIN_COLUMNS)
+    schedules_2024 = load_all_teams_data(2024, columns=TRAIN_COLUMNS)
+    schedules_2023 = load_all_teams_data(2023, columns=TRAIN_COLUMNS)
     df = pd.concat([schedules_2023, schedules_2024, schedules_2025], ignore_index=True)
     #print(df.columns)
-    train_lgbm_classification_model(df)
-    train_run_diff_model(df)
-    train_run_total_model(df)
+    # Prepared and binned once; a retrain on unchanged data loads the bins
+    data = prepare_training_data(df)
+    train_lgbm_classification_model(df, search=search, cpus=cpus, trial_threads=trial_threads, data=data)
+    train_run_diff_model(df, data=data)
+    train_run_total_model(df, data=data)
+    print(f"Training dataset {'loaded from' if data.loaded else 'binned and saved to'} {data.cache_dir}")
 
     try:
         upload_file_to_bucket(
@@ -388,5 +330,9 @@ def create_models():
             "backend/models/mlb_wl_calibrated.joblib",
             dest_path="models/mlb_wl_calibrated.joblib",
         )
+        upload_file_to_bucket(COMPACT_PATH, dest_path="models/mlb_wl_compact.json")
+        upload_file_to_bucket("backend/models/run_diff_lgbm.txt", dest_path="models/run_diff_lgbm.txt")
+        upload_file_to_bucket("backend/models/run_total_lgbm.txt", dest_path="models/run_total_lgbm.txt")
+        upload_file_to_bucket(STATE_PATH, dest_path="models/train_state.json")
     except Exception as exc:
         print(f"Failed to upload history CSV to Supabase storage: {exc}")
@@ -1,16 +1,37 @@
 import os
+import json
+import multiprocessing
 import pandas as pd
-import requests_cache
-
-from pybaseball import schedule_and_record
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from tqdm import tqdm
 
 from src.mlb.feature_engineering import create_features, full_to_abbrev
-from src.mlb.pitchers import get_all_boxscores
+from src.mlb.pitchers import get_all_boxscores, install_http_cache, reopen_http_cache
+from src.mlb.boxscore_store import store as boxscore_store
+from src.mlb.fangraphs_stats import backfill_season
+from src.mlb.statcast_store import update_store as update_statcast_store
+from src.mlb.rate_limit import limiter, start_shared_limiter
 from src.mlb.supabase_client import ensure_local_file
 from src.mlb.supabase_client import upload_file_to_bucket
+from src.mlb.storage import load_dataset, write_table, append_table, csv_columns, content_fingerprint
+from src.mlb.rolling_state import STATE_PATH, TeamState, build_state, load_state, save_state, verify_against_recompute
 
 HISTORY = "data/pred_history.csv"
 
+# Per-team checkpoint shards of a season build
+SHARD_DIR = "data/processed/shards/{year}"
+
+# Worker processes for a season build; requests from all of them share one
+# per-host limiter, so more workers overlap parsing and waiting, not requests.
+TEAM_WORKERS = min(4, os.cpu_count() or 1)
+
+# Written next to the processed dataset: which _individual file it was built
+# from, so the next run can tell whether appending new rows is safe
+MANIFEST_PATH = "data/processed/mlb_teams_schedules_{year}.manifest.json"
+
+# _individual columns needed to rebuild the rolling state
+STATE_COLUMNS = ['Date', 'Tm', 'R', 'RA', 'Run_Diff', 'W/L', 'Streak']
+
 # ATH for 2025, OAK for 2024 and before
 MLB_TEAMS = ['NYY', 'BOS', 'TOR', 'BAL', 'TBR',  # AL East
         'CHW', 'CLE', 'DET', 'KCR', 'MIN',  # AL Central
@@ -24,6 +45,10 @@ def get_teams_schedules(year: int = 2025) -> pd.DataFrame:
     raw_team_schedules = {}
     rawpath = f"data/raw/mlb_teams_schedules_{year}.csv"
     
+    from pybaseball import schedule_and_record
+    import requests_cache
+
+    install_http_cache()
     requests_cache.clear()
 
     for team in MLB_TEAMS:
@@ -68,7 +93,7 @@ def get_teams_schedules(year: int = 2025) -> pd.DataFrame:
     
     df.dropna(subset=['Boxscore'], inplace=True)
     
-    df.to_csv(rawpath, index=False)
+    write_table(df, rawpath, 'raw', year)
     
     try:
         upload_file_to_bucket(rawpath, dest_path=f"raw/mlb_teams_schedules_{year}.csv")
@@ -80,8 +105,9 @@ def get_teams_schedules(year: int = 2025) -> pd.DataFrame:
 #
 # Load and process team data for all MLB teams for a given year.
 # Returns a DataFrame containing the schedules and records of all teams (Processed).
+# ``columns`` optionally limits the result to a subset of columns.
 #
-def load_all_teams_data(year: int) -> pd.DataFrame:
+def load_all_teams_data(year: int, columns=None) -> pd.DataFrame:
     # Load if CSV exists locally or download from Supabase storage
     rawpath = f"data/raw/mlb_teams_schedules_{year}.csv"
     newpath = f"data/processed/mlb_teams_schedules_{year}.csv"
@@ -98,22 +124,93 @@ def load_all_teams_data(year: int) -> pd.DataFrame:
             print(f"Warning: failed to download raw schedule from Supabase: {exc}")
 
     if os.path.exists(newpath):
-        print(f"Loading CSV file: {newpath}")
-        return pd.read_csv(newpath)
+        print(f"Loading processed file: {newpath}")
+        return load_dataset('processed', year, columns=columns)
 
     if os.path.exists(rawpath):
-        df = pd.read_csv(rawpath)
+        df = load_dataset('raw', year)
     else:
         df = get_teams_schedules(year)
 
-    return process_all_teams_data(year, df)
+    full = process_all_teams_data(year, df)
+    return full if columns is None else full[list(columns)]
 
 #
-# Process the raw teams data one-by-one with computed features and cleaning the DataFrame.
-# Adds opponent features in each row
+# Process the raw teams data in parallel worker processes, one per team.
+# Every team is written to its own shard (data/processed/shards/{year}/{team}.csv)
+# with a temp file + rename, so a shard either exists complete or not at all
+# and a rerun skips exactly the teams that finished. The shards are then
+# merged into the _individual file and opponent features are added.
 # Returns a DataFrame containing the processed schedules and records of all teams.
 #
-def process_all_teams_data(year: int, df: pd.DataFrame) -> pd.DataFrame:
+def _shard_dir(year: int) -> str:
+    return SHARD_DIR.format(year=year)
+
+def _shard_path(year: int, team: str) -> str:
+    return os.path.join(_shard_dir(year), f"{team}.csv")
+
+def _write_atomic(df: pd.DataFrame, path: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+def _checkpoint_path(year: int, team: str) -> str:
+    return os.path.join(_shard_dir(year), f"{team}.sp.jsonl")
+
+# Set in pool workers started by build_seasons: per-game progress goes back to the parent
+_progress_queue = None
+
+def _pool_context():
+    """
+    Start method for the team pools. Workers are never forked from the
+    parent: build_seasons starts them while threads hold the Statcast, box
+    score, session and logging locks, and a fork copies those locks held.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def _init_team_worker(shared_limiter, progress_queue=None) -> None:
+    global _progress_queue
+    # Share the per-host request budget with the rest of the pool
+    limiter.attach(shared_limiter)
+    # A worker must not reuse a parent's SQLite connections: the
+    # boxscore store's or the requests cache's
+    boxscore_store.reset()
+    reopen_http_cache()
+    _progress_queue = progress_queue
+
+def _build_team_shard(year: int, team: str, team_df: pd.DataFrame) -> str:
+    checkpoint = _checkpoint_path(year, team)
+    progress = None
+    if _progress_queue is not None:
+        progress = lambda: _progress_queue.put(year)
+    _write_atomic(create_features(year, team_df, sp_checkpoint=checkpoint, progress=progress),
+                  _shard_path(year, team))
+    # The shard now holds every game; the per-game checkpoint is no longer needed
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return team
+
+def _shard_legacy_file(year: int, feats_path: str) -> None:
+    """Split an _individual file written by the old sequential loop into shards."""
+    legacy = pd.read_csv(feats_path, on_bad_lines='skip', engine='python')
+    teams = legacy['Tm'].drop_duplicates().tolist()
+    # The last team appended may have been cut off mid-write: redo it
+    for team in teams[:-1]:
+        _write_atomic(legacy[legacy['Tm'] == team], _shard_path(year, team))
+
+def _prefetch_season(year: int, df: pd.DataFrame) -> None:
+    """Fill the shared Statcast and Fangraphs stores once, before the workers read them."""
+    dates = df['Date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates.str.replace(r'\s+\(\d\)', '', regex=True) + f' {year}',
+                               format='%A, %b %d %Y')
+    update_statcast_store(year, dates.max().date())
+    as_of = (dates - pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d").unique().tolist()
+    backfill_season(year, dates=as_of)
+
+def _pending_teams(year: int) -> list:
+    """Teams of ``year`` without a finished shard, after adopting any legacy _individual file."""
     feats_path = f"data/processed/mlb_teams_schedules_{year}_individual.csv"
     bucket = os.getenv("SUPABASE_BUCKET")
 
@@ -129,100 +226,165 @@ def process_all_teams_data(year: int, df: pd.DataFrame) -> pd.DataFrame:
                 f"Warning: failed to download individual processed schedules from Supabase: {exc}"
             )
 
-    if os.path.exists(feats_path):
-        done = pd.read_csv(
-            feats_path,
-            usecols=['Tm'],
-            on_bad_lines='skip',
-            engine='python'
-        )['Tm'].unique().tolist()
-    else:
-        done = []
-    
-    for team in MLB_TEAMS:
-        if team in done:
-            print(f"— Skipping {team} (already done)")
-            continue
+    os.makedirs(_shard_dir(year), exist_ok=True)
+    has_shards = any(name.endswith(".csv") for name in os.listdir(_shard_dir(year)))
+    if os.path.exists(feats_path) and not has_shards:
+        _shard_legacy_file(year, feats_path)
+    return [team for team in MLB_TEAMS if not os.path.exists(_shard_path(year, team))]
 
-        print(f"➤ Processing {team}")
-        team_df      = df[df['Tm'] == team].copy()
-        processed_tm = create_features(year, team_df)
-
-        processed_tm.to_csv(
-            feats_path,
-            mode   = 'a' if os.path.exists(feats_path) else 'w',
-            header = not os.path.exists(feats_path),
-            index  = False
-        )
-        print(f"✔ Finished {team}")
-        
-    if bucket:
-        try:
-            ensure_local_file(
-                bucket,
-                f"processed/mlb_teams_schedules_{year}_individual.csv",
-                feats_path,
-            )
-        except Exception as exc:
-            print(
-                f"Warning: failed to download individual processed schedules from Supabase: {exc}"
-            )
-        
-    all_feats = pd.read_csv(
-        feats_path,
-        on_bad_lines='skip',
-        engine='python'
+def _merge_shards(year: int) -> pd.DataFrame:
+    """Combine a season's shards into the _individual file and the processed dataset."""
+    feats_path = f"data/processed/mlb_teams_schedules_{year}_individual.csv"
+    outpath = f"data/processed/mlb_teams_schedules_{year}.csv"
+
+    # Merge the shards in a fixed team order
+    all_feats = pd.concat(
+        [pd.read_csv(_shard_path(year, team)) for team in MLB_TEAMS if os.path.exists(_shard_path(year, team))],
+        ignore_index=True,
     )
-    full = get_opponent_features(all_feats)
+    _write_atomic(all_feats, feats_path)
 
-    outpath = f"data/processed/mlb_teams_schedules_{year}.csv"
-    full.to_csv(outpath, index=False)
+    full = get_opponent_features(all_feats)
+    write_table(full, outpath, 'processed', year)
+    _write_manifest(year, feats_path, outpath)
     try:
         upload_file_to_bucket(outpath, dest_path=f"processed/mlb_teams_schedules_{year}.csv")
     except Exception as exc:
         print(f"Failed to upload history CSV to Supabase storage: {exc}")
-    
     return full
 
+def process_all_teams_data(year: int, df: pd.DataFrame, workers: int = TEAM_WORKERS) -> pd.DataFrame:
+    todo = _pending_teams(year)
+    for team in MLB_TEAMS:
+        if team not in todo:
+            print(f"— Skipping {team} (already done)")
+
+    if todo:
+        _prefetch_season(year, df)
+        team_dfs = {team: df[df['Tm'] == team].copy() for team in todo}
+        if workers <= 1:
+            for team in todo:
+                print(f"➤ Processing {team}")
+                _build_team_shard(year, team, team_dfs[team])
+                print(f"✔ Finished {team}")
+        else:
+            manager, shared_limiter = start_shared_limiter()
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_init_team_worker,
+                                         initargs=(shared_limiter,)) as pool:
+                    futures = {pool.submit(_build_team_shard, year, team, team_dfs[team]): team for team in todo}
+                    for fut in tqdm(as_completed(futures), total=len(futures), desc=f"Teams {year}"):
+                        print(f"✔ Finished {fut.result()}")
+            finally:
+                manager.shutdown()
+
+    return _merge_shards(year)
+
+#
+# Build several seasons at once. Seasons are prepared (raw schedules, Statcast
+# and Fangraphs stores) in parallel threads, and every pending team of every
+# season goes to one process pool that shares a single per-host limiter.
+# Progress is tracked per game, with one bar and ETA per season; an
+# interrupted build resumes from the per-team shards and per-game checkpoints.
+#
+def _load_raw_season(year: int) -> pd.DataFrame:
+    rawpath = f"data/raw/mlb_teams_schedules_{year}.csv"
+    bucket = os.getenv("SUPABASE_BUCKET")
+    if bucket:
+        try:
+            ensure_local_file(bucket, f"raw/mlb_teams_schedules_{year}.csv", rawpath)
+        except Exception as exc:
+            print(f"Warning: failed to download raw schedule from Supabase: {exc}")
+    if os.path.exists(rawpath):
+        return load_dataset('raw', year)
+    return get_teams_schedules(year)
+
+def _prepare_season(year: int) -> tuple:
+    todo = _pending_teams(year)
+    if not todo:
+        return year, {}
+    df = _load_raw_season(year)
+    _prefetch_season(year, df)
+    return year, {team: df[df['Tm'] == team].copy() for team in todo}
+
+def build_seasons(years, workers: int = TEAM_WORKERS) -> dict:
+    """Build every season in ``years``; returns {year: rows in the processed dataset}."""
+    years = list(years)
+    manager, shared_limiter = start_shared_limiter()
+    progress_queue = manager.Queue()
+    # Scrapes made while preparing seasons count against the same budget
+    limiter.attach(shared_limiter)
+    bars, remaining, built = {}, {}, {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_init_team_worker,
+                                 initargs=(shared_limiter, progress_queue)) as pool, \
+                ThreadPoolExecutor(max_workers=len(years)) as prep:
+            prepared = [prep.submit(_prepare_season, year) for year in years]
+            futures = {}
+            for i, fut in enumerate(as_completed(prepared)):
+                year, team_dfs = fut.result()
+                games = sum(len(team_df) for team_df in team_dfs.values())
+                bars[year] = tqdm(total=games, desc=f"Season {year}", unit="game", position=i)
+                bars[year].set_postfix(teams=f"{len(MLB_TEAMS) - len(team_dfs)}/{len(MLB_TEAMS)}")
+                remaining[year] = set(team_dfs)
+                for team, team_df in team_dfs.items():
+                    futures[pool.submit(_build_team_shard, year, team, team_df)] = (year, team)
+                if not team_dfs:
+                    bars[year].close()
+                    built[year] = len(_merge_shards(year))
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                while not progress_queue.empty():
+                    bars[progress_queue.get()].update(1)
+                for fut in done:
+                    year, team = futures[fut]
+                    fut.result()
+                    while not progress_queue.empty():
+                        bars[progress_queue.get()].update(1)
+                    remaining[year].discard(team)
+                    bars[year].set_postfix(teams=f"{len(MLB_TEAMS) - len(remaining[year])}/{len(MLB_TEAMS)}", last=team)
+                    if not remaining[year]:
+                        bars[year].close()
+                        built[year] = len(_merge_shards(year))
+    finally:
+        limiter.attach(None)
+        manager.shutdown()
+    return built
+
+# Columns of the opponent's row that are not carried over as Opp_ features.
+OPP_EXCLUDE = ['Tm', 'Opp', 'Home_Away', 'W/L', 'R', 'RA', 'W-L', 'D/N', 'Boxscore']
+
+#
+# Attach the opponent's version of every game as Opp_ columns.
+# Each game appears once per team, so the opponent's row is found with a keyed
+# self-join on (Date, Tm, Opp, Game_Number): doubleheaders match game-for-game.
+# Rows without an opponent row are dropped.
+#
 def get_opponent_features(df: pd.DataFrame) -> pd.DataFrame:
-    all_rows = []
-    
-    # Step 1: Group by each team so we can access each team's schedule
-    teams = df['Tm'].unique()
-    team_schedules = {team: df[df['Tm'] == team].copy() for team in teams}
-
-    # Step 2: Go row by row, and pull opponent's version of the same game
-    for idx, row in df.iterrows():
-        team = row['Tm']
-        opponent = row['Opp']
-        month = row['Month']
-        dow = row['DayofWeek']
-        
-        # Get opponent schedule
-        if opponent not in team_schedules:
-            continue
-        
-        opp_schedule = team_schedules[opponent]
-        
-        # Try to find the matching game (same day, opponent = team)
-        opp_game = opp_schedule[
-            (opp_schedule['Opp'] == team) &
-            (opp_schedule['Month'] == month) &
-            (opp_schedule['DayofWeek'] == dow)
-        ]
-        
-        if opp_game.empty:
-            continue
-        
-        # Extract relevant opponent stats (add prefix)
-        opp_features = opp_game.iloc[0].drop(['Tm', 'Opp', 'Home_Away', 'W/L', 'R', 'RA', 'W-L', 'D/N', 'Boxscore'])
-        opp_features.index = ['Opp_' + col for col in opp_features.index]
-        
-        # Combine row and opponent features
-        combined = pd.concat([row, opp_features])
-        all_rows.append(combined)
-    
-    return pd.DataFrame(all_rows)
+    keys = ['Date', 'Tm', 'Opp', 'Game_Number']
+    left = df.reset_index(drop=True)
+    drop_game_number = 'Game_Number' not in left.columns
+    if drop_game_number:
+        # Processed files drop Game_Number; rows are in schedule order per team
+        left['Game_Number'] = left.groupby(['Date', 'Tm', 'Opp'], observed=True).cumcount() + 1
+
+    opp = left.drop(columns=[c for c in OPP_EXCLUDE if c in left.columns])
+    if drop_game_number:
+        opp = opp.drop(columns=['Game_Number'])
+    opp = opp.add_prefix('Opp_')
+    # The opponent's row has Tm/Opp swapped relative to ours
+    opp['Date'] = left['Date']
+    opp['Tm'] = left['Opp']
+    opp['Opp'] = left['Tm']
+    opp['Game_Number'] = left['Game_Number']
+    opp = opp.drop_duplicates(subset=keys, keep='first')
+
+    full = left.merge(opp, on=keys, how='inner', sort=False)
+    if drop_game_number:
+        full = full.drop(columns=['Game_Number'])
+    return full
 
 def load_team_data(team: str, year: int) -> pd.DataFrame:
     try:
@@ -253,8 +415,7 @@ def load_team_schedule_CSV(team: str, year: int) -> pd.DataFrame:
         except Exception as exc:
             print(f"Warning: failed to download processed schedule from Supabase: {exc}")
     print(f"Loading cached file: {filepath}")
-    df = pd.read_csv(filepath)
-    df = df[df['Tm'] == team]
+    df = load_dataset('processed', year, filters={'Tm': team})
     df.reset_index(drop=True, inplace=True)
     return df
         
@@ -272,8 +433,7 @@ def load_team_schedule_raw_CSV(team: str, year: int) -> pd.DataFrame:
 
     if os.path.exists(filepath):
         print(f"Loading cached file: {filepath}")
-        df = pd.read_csv(filepath)
-        df = df[df['Tm'] == team]
+        df = load_dataset('raw', year, filters={'Tm': team})
         df.reset_index(drop=True, inplace=True)
         return df
     else:
@@ -328,14 +488,50 @@ def logging_actual_winners(processed_df: pd.DataFrame, pred_csv: str = HISTORY):
     merged.to_csv(pred_csv, index=False)
     return merged
 
-def update_season_data(year: int = 2025):
+def _read_manifest(year: int) -> dict:
+    path = MANIFEST_PATH.format(year=year)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def _write_manifest(year: int, feats_path: str, final_path: str) -> None:
+    manifest = {
+        'individual': content_fingerprint(feats_path),
+        'processed': content_fingerprint(final_path),
+        'columns': csv_columns(final_path),
+    }
+    path = MANIFEST_PATH.format(year=year)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+def _can_append(manifest: dict, feats_path: str, final_path: str) -> bool:
+    """Both files are exactly as the last run left them."""
+    return (
+        bool(manifest)
+        and os.path.exists(final_path)
+        and manifest.get('individual') == content_fingerprint(feats_path)
+        and manifest.get('processed') == content_fingerprint(final_path)
+    )
+
+def update_season_data(year: int = 2025, verify: bool = False):
     """
     Incrementally process any games in raw_df that occur
     after the last‐processed date, appending them to your
-    per‐team features file and then re‐merging opponents.
+    per‐team features file and then merging opponents.
     
     raw_df must have at least columns ['Date','Tm','Opp',…]
     with Date as datetime64[ns].
+
+    Rolling features and streaks for new games come from the persisted
+    per-team rolling state; with verify=True they are also checked against
+    a full recompute over the season.
+
+    Opponent features are joined for the new rows only and appended to the
+    processed dataset; the whole season is re-merged only when the files
+    changed since the last run or the columns no longer match. Returns the
+    processed rows that were written.
     """
     raw_path = f"data/raw/mlb_teams_schedules_{year}.csv"
     feats_path = f"data/processed/mlb_teams_schedules_{year}_individual.csv"
@@ -357,21 +553,35 @@ def update_season_data(year: int = 2025):
             print(
                 f"Warning: failed to download individual processed schedules from Supabase: {exc}"
             )
-
-    raw_df = pd.read_csv(raw_path, parse_dates=['Date'])
+        # The processed file, manifest and rolling state let a fresh checkout
+        # take the incremental path; each is checked against the content of
+        # the _individual file before it is trusted
+        for local in (final_path, MANIFEST_PATH.format(year=year), STATE_PATH.format(year=year)):
+            try:
+                ensure_local_file(bucket, f"processed/{os.path.basename(local)}", local)
+            except Exception as exc:
+                print(f"Warning: failed to download {os.path.basename(local)} from Supabase: {exc}")
+
+    # Only read here, so share the cached copy
+    raw_df = load_dataset('raw', year, copy=False)
     
-    if raw_df['Date'].dtype == object or not pd.api.types.is_datetime64_any_dtype(raw_df['Date']):
-        raw_df['Date'] = pd.to_datetime(raw_df['Date'] + f" {year}", format='%A, %b %d %Y')
-    
-    if os.path.exists(feats_path):
-        feats = pd.read_csv(feats_path, parse_dates=['Date'])
-        last_date = feats['Date'].max()
-        last_streak = feats.groupby('Tm')['Streak'].last().to_dict()
-        last_result = feats.groupby('Tm')['W/L'].last().to_dict()
-        #print (f"Last processed streak: {last_streak}, {last_result}")
-    else:
+    if not os.path.exists(feats_path):
         print("No existing feature file")
         return
+
+    # Checked before appending: afterwards the feature file has changed by design
+    incremental = _can_append(_read_manifest(year), feats_path, final_path)
+
+    states = load_state(year, feats_path)
+    if states is None:
+        # First run, or the feature file changed underneath the state: replay it once
+        print("Rebuilding rolling state from", feats_path)
+        history = load_dataset('individual', year, columns=STATE_COLUMNS, copy=False)
+        states = build_state(history)
+    if not states:
+        print("Feature file has no games")
+        return
+    last_date = pd.Timestamp(max(state.last_date for state in states.values()))
     
     new_games = raw_df[raw_df['Date'] > last_date]
     if new_games.empty:
@@ -380,70 +590,27 @@ def update_season_data(year: int = 2025):
         
     print(f"Found {len(new_games)} new games since {last_date.date()} → processing…")
     
+    appended = []
     for team in MLB_TEAMS:
-        team_new = new_games[(new_games['Tm'] == team)].sort_values("Date")
+        team_new = new_games[(new_games['Tm'] == team)].sort_values("Date", kind="stable")
         if team_new.empty:
             continue
         
         print(f"  • Adding {len(team_new)} games for {team}")
         
         tm_feats = create_features(year, team_new)
-        tm_feats = tm_feats.drop(columns=["Streak"], errors="ignore")
-        
-        history = feats[feats['Tm'] == team].sort_values("Date").tail(9)
-        combo = pd.concat(
-            [history[["R", "RA", "Run_Diff"]], tm_feats[["R", "RA", "Run_Diff"]]],
-            ignore_index=True,
-        )
-
-        for window in [3, 5, 10]:
-            r_ma = (
-                combo["R"].shift(1).rolling(window, min_periods=1).mean().round(3)
-            )
-            ra_ma = (
-                combo["RA"].shift(1).rolling(window, min_periods=1).mean().round(3)
-            )
-            rd_ma = (
-                combo["Run_Diff"].shift(1).rolling(window, min_periods=1).mean().round(3)
-            )
 
-            r_ewma = (
-                combo["R"].shift(1).ewm(span=window, adjust=False).mean().round(3)
-            )
-            ra_ewma = (
-                combo["RA"].shift(1).ewm(span=window, adjust=False).mean().round(3)
-            )
-            rd_ewma = (
-                combo["Run_Diff"].shift(1).ewm(span=window, adjust=False).mean().round(3)
-            )
+        # O(1) per game: features from the state, then advance it
+        rolled = states.setdefault(team, TeamState()).advance(tm_feats)
+        tm_feats[rolled.columns] = rolled
+        tm_feats.to_csv(feats_path, mode='a', header=False, index=False)
+        appended.append(tm_feats)
 
-            tm_feats[f"R_MA{window}"] = r_ma.iloc[-len(tm_feats):].values
-            tm_feats[f"RA_MA{window}"] = ra_ma.iloc[-len(tm_feats):].values
-            tm_feats[f"RunDiff_MA{window}"] = rd_ma.iloc[-len(tm_feats):].values
+    if not appended:
+        print(f"No new games for known teams after {last_date.date()}; nothing to do.")
+        return
 
-            tm_feats[f"R_EWMA{window}"] = r_ewma.iloc[-len(tm_feats):].values
-            tm_feats[f"RA_EWMA{window}"] = ra_ewma.iloc[-len(tm_feats):].values
-            tm_feats[f"RunDiff_EWMA{window}"] = rd_ewma.iloc[-len(tm_feats):].values
-        
-        streak_before = []
-        prev_s = last_streak.get(team, 0)
-        prev_r = last_result.get(team, 0)
-        #print(f"  • Last streak for {team} was {prev_s}, last result was {prev_r}")
-        s = prev_s
-        r = prev_r
-        for wl in tm_feats['W/L'].astype(int):
-            if r == 1:
-                s = s + 1 if s > 0 else 1
-            else:
-                s = s - 1 if s < 0 else -1
-            
-            r = 1 if wl == 1 else 0
-            streak_before.append(s)
-
-        tm_feats['Streak'] = streak_before
-        st = tm_feats.pop("Streak")
-        tm_feats.insert(13, "Streak", st)
-        tm_feats.to_csv(feats_path, mode='a', header=False, index=False)
+    save_state(states, year, feats_path)
     
     if bucket:
         try:
@@ -457,9 +624,26 @@ def update_season_data(year: int = 2025):
                 f"Warning: failed to download individual processed schedules from Supabase: {exc}"
             )
     
-    all_feats = pd.read_csv(feats_path)
-    full = get_opponent_features(all_feats)
-    full.to_csv(final_path, index=False)
+    new_rows = pd.concat(appended, ignore_index=True)
+    if verify:
+        all_feats = load_dataset('individual', year)
+        mismatches = verify_against_recompute(all_feats, new_rows)
+        if mismatches.empty:
+            print("✅ Incremental rolling features match a full recompute")
+        else:
+            print(f"❌ {len(mismatches)} rolling feature values differ from a full recompute:")
+            print(mismatches.to_string(index=False))
+
+    # A day's games are played against each other, so the new rows hold both sides
+    full = get_opponent_features(new_rows) if incremental else None
+    if full is not None and list(full.columns) == _read_manifest(year).get('columns'):
+        append_table(full, final_path)
+        print(f"Appended {len(full)} rows to", final_path)
+    else:
+        print("Rebuilding", final_path, "from the full season")
+        full = get_opponent_features(load_dataset('individual', year))
+        write_table(full, final_path, 'processed', year)
+    _write_manifest(year, feats_path, final_path)
     logging_actual_winners(full)
     print("✅ Updated processed file written to", final_path)
     try:
@@ -470,5 +654,10 @@ def update_season_data(year: int = 2025):
         upload_file_to_bucket(feats_path, dest_path=f"processed/mlb_teams_schedules_{year}_individual.csv")
     except Exception as exc:
         print(f"Failed to upload history CSV to Supabase storage: {exc}")
+    for local in (MANIFEST_PATH.format(year=year), STATE_PATH.format(year=year)):
+        try:
+            upload_file_to_bucket(local, dest_path=f"processed/{os.path.basename(local)}")
+        except Exception as exc:
+            print(f"Failed to upload {os.path.basename(local)} to Supabase storage: {exc}")
     
     return full
\ No newline at end of file
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+#
+# Run instrumentation for the daily pipeline.
+#
+# One process-wide Metrics object collects wall time per stage, HTTP requests
+# and bytes per host, cache hit/miss counters and peak RSS. Every requests
+# call that reaches the network is counted by a hook on requests' Session.send
+# (responses answered by requests_cache never get there and are counted as
+# cache hits by rate_limit.limited_get instead). Stores that keep their own
+# counters register a callable with register_source and are sampled when the
+# report is built.
+#
+REPORT_DIR = "data/run_reports"
+LOG_LEVEL = os.getenv("MLB_LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("src.mlb.metrics")
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Leveled logging for the pipeline; DEBUG shows per-row progress."""
+    logging.basicConfig(
+        level=getattr(logging, (level or LOG_LEVEL).upper(), logging.INFO),
+        format="%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.stages: Dict[str, dict] = {}
+        self.http: Dict[str, dict] = {}
+        self.caches: Dict[str, dict] = {}
+        self.sources: Dict[str, Callable[[], dict]] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated stages accumulate calls and seconds."""
+        start = time.perf_counter()
+        logger.debug("stage %s started", name)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                entry["calls"] += 1
+                entry["seconds"] += elapsed
+            logger.debug("stage %s finished in %.2fs", name, elapsed)
+
+    def record_http(self, host: str, nbytes: int = 0, seconds: float = 0.0, error: bool = False) -> None:
+        with self.lock:
+            entry = self.http.setdefault(host, {"requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0})
+            entry["requests"] += 1
+            entry["bytes"] += nbytes
+            entry["seconds"] += seconds
+            entry["errors"] += int(error)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        with self.lock:
+            entry = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            entry["hits" if hit else "misses"] += 1
+
+    def register_source(self, name: str, fn: Callable[[], dict]) -> None:
+        """Sample ``fn()`` into the report's caches section when it is built."""
+        self.sources[name] = fn
+
+    def report(self) -> dict:
+        with self.lock:
+            stages = {k: {"calls": v["calls"], "seconds": round(v["seconds"], 3)} for k, v in self.stages.items()}
+            http = {k: {**v, "seconds": round(v["seconds"], 3)} for k, v in self.http.items()}
+            caches = {k: dict(v) for k, v in self.caches.items()}
+        for entry in caches.values():
+            total = entry["hits"] + entry["misses"]
+            entry["hit_rate"] = round(entry["hits"] / total, 3) if total else None
+        for name, fn in self.sources.items():
+            try:
+                caches[name] = fn()
+            except Exception as exc:
+                caches[name] = {"error": str(exc)}
+        return {
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "http": http,
+            "caches": caches,
+        }
+
+    def write_report(self, path: Optional[str] = None) -> str:
+        report = self.report()
+        if path is None:
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            path = os.path.join(REPORT_DIR, f"run_{datetime.now():%Y%m%d_%H%M%S}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
+
+    def summary(self) -> str:
+        """A few human-readable lines: slowest stages first, then HTTP per host."""
+        report = self.report()
+        lines = [f"Run took {report['wall_seconds']:.1f}s, peak RSS {report['peak_rss_mb']} MB"]
+        for name, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            lines.append(f"  {name:<28} {s['seconds']:9.2f}s  ({s['calls']} calls)")
+        for host, h in sorted(report["http"].items(), key=lambda kv: -kv[1]["requests"]):
+            lines.append(f"  {host:<28} {h['requests']:6d} requests  {h['bytes'] / 1e6:8.2f} MB")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+
+
+def instrument_requests() -> None:
+    """
+    Count every request that reaches the network through ``requests``.
+    The transport adapter is patched rather than Session, so responses served
+    by requests_cache (which wraps Session.send) are not counted, and every
+    session class, cached or not, is.
+    """
+    from requests.adapters import HTTPAdapter
+
+    base = HTTPAdapter
+    if getattr(base.send, "_metrics_hook", False):
+        return
+    original = base.send
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).netloc
+        start = time.perf_counter()
+        try:
+            resp = original(self, request, **kwargs)
+        except Exception:
+            metrics.record_http(host, seconds=time.perf_counter() - start, error=True)
+            raise
+        if kwargs.get("stream"):
+            nbytes = int(resp.headers.get("Content-Length") or 0)
+        else:
+            nbytes = len(resp.content or b"")
+        metrics.record_http(host, nbytes, time.perf_counter() - start, error=resp.status_code >= 400)
+        return resp
+
+    send._metrics_hook = True
+    base.send = send
@@ -1,34 +1,67 @@
-import os
+import logging
 import requests
-import requests_cache
 import json
-import re
+import threading
 import pandas as pd
-from pandas.errors import ParserError
 import numpy as np
 import warnings
 from datetime import datetime, date
-from bs4 import BeautifulSoup, Comment
-from pybaseball import playerid_lookup, statcast_pitcher, pitching_stats
+from bs4 import BeautifulSoup
 
 from src.mlb.war import get_pitcher_war_on_date
-from src.mlb.supabase_client import ensure_local_file
+from src.mlb.rate_limit import limited_get
+from src.mlb.boxscore_store import parse_starters, team_key, store as boxscore_store
+from src.mlb.statcast_store import pitcher_counts_asof
+from src.mlb.player_ids import resolver as pid_resolver
 
-requests_cache.install_cache('bbref_cache', expire_after=86400)
-session = requests_cache.CachedSession()
+logger = logging.getLogger(__name__)
 
-PID_CSV = "data/playerid_list.csv"
-_BUCKET = os.getenv("SUPABASE_BUCKET")
-if _BUCKET:
-    try:
-        ensure_local_file(_BUCKET, "playerid_list.csv", PID_CSV)
-    except Exception as exc:
-        print(f"Warning: failed to download playerid_list.csv from Supabase: {exc}")
+# The requests cache and bbref session are set up on first use, so importing
+# this module doesn't create cache files or touch the network.
+_session = None
+_session_lock = threading.RLock()
+
+
+def install_http_cache() -> None:
+    """Install the process-wide requests cache (one day) if it isn't already."""
+    import requests_cache
+
+    with _session_lock:
+        if not requests_cache.is_installed():
+            requests_cache.install_cache('bbref_cache', expire_after=86400)
+
+
+def reopen_http_cache() -> None:
+    """
+    Drop any requests cache and box score session inherited from a parent
+    process and install fresh ones, so this process gets its own SQLite
+    connections to bbref_cache.sqlite.
+    """
+    global _session
+    import requests_cache
+
+    with _session_lock:
+        if requests_cache.is_installed():
+            requests_cache.uninstall_cache()
+        _session = None
+        install_http_cache()
+
+
+def get_session():
+    """The cached session used for box score pages."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests_cache
+
+            install_http_cache()
+            _session = requests_cache.CachedSession()
+        return _session
 
-pid_df = pd.read_csv(PID_CSV)
 
 def get_all_boxscores(year: int) -> pd.DataFrame:
     url = f"https://www.baseball-reference.com/leagues/majors/{year}-schedule.shtml"
+    install_http_cache()
     resp = requests.get(url)
     resp.raise_for_status()
 
@@ -69,17 +102,19 @@ def get_all_boxscores(year: int) -> pd.DataFrame:
     return schedule_df
 
 def get_starting_pitcher(box_url: str, team_name: str, game_date, year: int = 2025) -> dict:
-    resp = session.get(box_url)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    clean = re.sub(r'[^A-Za-z]', '', team_name)
-    table_id = f"{clean}pitching"
-    comments = soup.find_all(string=lambda t: isinstance(t, Comment))
-
-    try:
-        comment = next(c for c in comments if table_id in c)
-    except StopIteration:
+    # Parsed box scores are kept permanently; only unseen URLs hit bbref
+    found, starter = boxscore_store.get(box_url, team_name)
+    if not found:
+        resp = limited_get(box_url, session=get_session())
+        resp.raise_for_status()
+        starters = parse_starters(resp.text)
+        # Only complete box scores are kept: a throttled or partial page
+        # without both pitching tables is fetched again next time
+        if len(starters) >= 2:
+            boxscore_store.put(box_url, starters)
+        starter = starters.get(team_key(team_name))
+
+    if starter is None:
         warnings.warn(f"No pitching table for {team_name} at {box_url}; returning NaNs")
         return {
             'SP':       np.nan,
@@ -93,22 +128,10 @@ def get_starting_pitcher(box_url: str, team_name: str, game_date, year: int = 20
             'SP_IP':    np.nan
         }
 
-    inner = BeautifulSoup(comment, "html.parser")
-    table = inner.find("table", id=table_id)
-
-    row = table.tbody.find("tr")
-    
-    def _parse_float(cell, stat):
-        text = cell.get_text(strip=True) if cell is not None else ""
-        return float(text) if text else np.nan
-    
+    name, era = starter
     data = {}
-    name_cell = row.find("th", {"data-stat": "player"})
-    raw = name_cell.find("a").get_text(strip=True)
-    name = raw.encode("latin-1").decode("utf-8")
     data['SP'] = name
-    era_cell = row.find("td", {"data-stat": "earned_run_avg"})
-    data['SP_ERA'] = _parse_float(era_cell, 'earned_run_avg')
+    data['SP_ERA'] = era if era is not None else np.nan
     
     game_date = normalize_date(game_date, year)
     player_stats = get_player_stats(data['SP'], game_date, year)
@@ -118,15 +141,13 @@ def get_starting_pitcher(box_url: str, team_name: str, game_date, year: int = 20
 
 def get_player_stats(player_name: str, game_date, year: int = 2025) -> dict:
     if not player_name or pd.isna(player_name):
-        print(
-            f"⚠️ get_player_stats(): no player_name provided (game_date={game_date}); "
-            "returning NaNs for SP stats."
+        logger.warning(
+            "get_player_stats(): no player_name provided (game_date=%s); returning NaNs for SP stats.",
+            game_date,
         )
         return {'SP_K9':np.nan, 'SP_BB9':np.nan, 'SP_WHIP':np.nan, 'SP_HardHit%':np.nan, 'SP_IP':np.nan, 'SP_WAR':np.nan}
     
-    last, first = player_name.split()[-1], player_name.split()[0]
-    
-    pid = get_mlb_pid(last, first)
+    pid = pid_resolver.resolve(player_name)
     
     if pid is None:
         warnings.warn(f"No PID found for {player_name}; returning NaNs")
@@ -134,38 +155,28 @@ def get_player_stats(player_name: str, game_date, year: int = 2025) -> dict:
 
     end_dt = game_date - pd.Timedelta(days=1)
     end_dt = end_dt.strftime("%Y-%m-%d")
-    start_dt = f"{year}-03-01"
     
+    # Season-to-date counts come from the league-wide Statcast store
     try:
-        df = statcast_pitcher(start_dt, end_dt, pid)
-    except ParserError as e:
-        warnings.warn(
-            f"ParserError reading Statcast for {player_name} ({pid}) on {end_dt}: {e}\n"
-            "Falling back to NaNs."
-        )
-        return _make_nan_stats()
+        counts = pitcher_counts_asof(pid, year, end_dt)
     except Exception as e:
         warnings.warn(f"Unexpected error for {player_name} ({pid}) on {end_dt}: {e}")
         return _make_nan_stats()
 
-    if df.empty:
+    if counts is None:
         return _make_nan_stats()
     
-    if 'outs_when_up' not in df.columns:
-        warnings.warn(f"Statcast output missing 'outs_when_up' for {player_name} on {end_dt}; returning NaNs")
-        return _make_nan_stats()
-    innings = df['outs_when_up'].sum() / 3
+    innings = counts['outs'] / 3
     
-    ks = (df['events']=='strikeout').sum()
+    ks = counts['ks']
     k9 = (ks * 9 / innings) if innings>0 else np.nan
-    bb = (df['events']=='walk').sum()
+    bb = counts['bb']
     bb9 = (bb * 9 / innings) if innings>0 else np.nan
     
-    contact = df[df.launch_speed.notna()]
-    hard_hit_pct = (contact.launch_speed>95).mean()
+    hard_hit_pct = (counts['hard_hit'] / counts['contact']) if counts['contact']>0 else np.nan
     
     # hits + walks allowed
-    wh  = df['events'].isin(['single','double','triple','home_run']).sum() + bb
+    wh  = counts['hits'] + bb
     whip = (wh / innings) if innings>0 else np.nan    
     
     war = get_pitcher_war_on_date(pid, end_dt)
@@ -199,21 +210,4 @@ def normalize_date(game_date, year):
     return dt
 
 def get_mlb_pid(last: str, first: str) -> str:
-    player_id = pid_df[(pid_df['LASTNAME'] == last) & (pid_df['FIRSTNAME'] == first)]
-    if not player_id.empty:
-        raw_code = player_id['MLBCODE'].iat[0]
-        if pd.notna(raw_code):
-            pid = int(raw_code)
-        else:
-            pid = None
-    else:
-        pid = None
-    
-    if pid is None:
-        # Fallback to pybaseball lookup (key_mlbam column)
-        mlb_df = playerid_lookup(last, first)
-        if mlb_df.empty or mlb_df['key_mlbam'].isna().all():
-            return None
-        pid = int(mlb_df.loc[mlb_df['key_mlbam'].notna(),'key_mlbam'].iat[0])
-    
-    return str(pid)
+    return pid_resolver.resolve_parts(first, last)
@@ -0,0 +1,182 @@
+import os
+import re
+import threading
+import unicodedata
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from src.mlb.supabase_client import ensure_local_file
+
+#
+# Player name -> MLBAM id resolution.
+#
+# The SFBB id map (data/playerid_list.csv) is indexed once per process on a
+# normalized (first, last) key: accents folded, lower-cased, punctuation and
+# generational suffixes dropped. Names it can't resolve go to pybaseball's
+# playerid_lookup once; the answer is kept in data/playerid_fallback.csv with
+# the date it was checked. An id is kept for good; "not found" only for
+# NOT_FOUND_TTL, since a call-up can be missing from the Chadwick register on
+# their debut day and show up there a few days later.
+#
+# Nothing is read at import: the id map is fetched from the Supabase bucket
+# (when SUPABASE_BUCKET is set and it is missing) and indexed on first lookup.
+#
+PID_CSV = "data/playerid_list.csv"
+FALLBACK_CSV = "data/playerid_fallback.csv"
+
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# How long a "not found" answer is trusted before the name is looked up again
+NOT_FOUND_TTL = timedelta(days=3)
+FALLBACK_COLUMNS = ['first', 'last', 'mlbam', 'checked']
+
+
+def fold(text: str) -> str:
+    """Lower-case ASCII form of a name part: 'Pérez-Ramos, Jr.' -> 'perez ramos jr'."""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[.'’]", '', text.lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def split_name(full_name: str) -> Tuple[str, str]:
+    """
+    Normalized (first, last) of a display name. The first token is the first
+    name and everything after it the last name, minus any suffix:
+    'Luis Ortiz Jr.' -> ('luis', 'ortiz'), 'Jose De Leon' -> ('jose', 'de leon').
+    """
+    tokens = fold(full_name).split()
+    while len(tokens) > 2 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    if not tokens:
+        return '', ''
+    return tokens[0], ' '.join(tokens[1:])
+
+
+def name_key(first: str, last: str) -> Tuple[str, str]:
+    last_tokens = [t for t in fold(last).split() if t not in SUFFIXES] or fold(last).split()
+    return fold(first).replace(' ', ''), ' '.join(last_tokens)
+
+
+class PlayerIdResolver:
+    def __init__(self, pid_csv: str = PID_CSV, fallback_csv: str = FALLBACK_CSV):
+        self.pid_csv = pid_csv
+        self.fallback_csv = fallback_csv
+        self.index = None
+        self.fallback = None
+        self.stats = {'index_hits': 0, 'fallback_hits': 0, 'lookups': 0, 'not_found': 0}
+        self.lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self.index is not None:
+            return
+        bucket = os.getenv("SUPABASE_BUCKET")
+        if bucket:
+            try:
+                ensure_local_file(bucket, "playerid_list.csv", self.pid_csv)
+            except Exception as exc:
+                print(f"Warning: failed to download playerid_list.csv from Supabase: {exc}")
+        index = {}
+        ids = pd.read_csv(self.pid_csv, usecols=['LASTNAME', 'FIRSTNAME', 'MLBCODE'])
+        for last, first, code in ids.itertuples(index=False):
+            if pd.isna(last) or pd.isna(first):
+                continue
+            key = name_key(first, last)
+            # First row wins, like the old boolean scan; it may have no MLB code
+            if key not in index:
+                index[key] = str(int(code)) if pd.notna(code) else None
+        # key -> (id or None, date checked or None); later rows win
+        self.fallback = {}
+        if os.path.exists(self.fallback_csv):
+            cached = pd.read_csv(self.fallback_csv, dtype=str, keep_default_na=False)
+            if 'checked' not in cached.columns:
+                # Written before answers were dated: their "not found"s count as expired
+                cached['checked'] = ''
+                cached[FALLBACK_COLUMNS].to_csv(self.fallback_csv, index=False)
+            for first, last, mlbam, checked in cached[FALLBACK_COLUMNS].itertuples(index=False):
+                self.fallback[(first, last)] = (mlbam or None, date.fromisoformat(checked) if checked else None)
+        self.index = index
+
+    def _known(self, key: Tuple[str, str]) -> bool:
+        """True if the fallback has an id for ``key``, or a "not found" that hasn't expired."""
+        if key not in self.fallback:
+            return False
+        pid, checked = self.fallback[key]
+        return pid is not None or (checked is not None and date.today() - checked < NOT_FOUND_TTL)
+
+    def _lookup(self, first: str, last: str) -> Optional[str]:
+        """pybaseball's Chadwick register lookup; once per name, or per NOT_FOUND_TTL while unresolved."""
+        from pybaseball import playerid_lookup
+
+        found = playerid_lookup(last, first)
+        found = found[found['key_mlbam'].notna()] if not found.empty else found
+        if found.empty:
+            return None
+        return str(int(found['key_mlbam'].iat[0]))
+
+    def _remember(self, key: Tuple[str, str], pid: Optional[str]) -> None:
+        today = date.today()
+        self.fallback[key] = (pid, today)
+        exists = os.path.exists(self.fallback_csv)
+        row = pd.DataFrame([{'first': key[0], 'last': key[1], 'mlbam': pid or '', 'checked': today.isoformat()}])
+        row.to_csv(self.fallback_csv, mode='a' if exists else 'w', header=not exists, index=False)
+
+    def _index_get(self, key: Tuple[str, str]) -> Optional[str]:
+        pid = self.index.get(key)
+        if pid is None and ' ' in key[1]:
+            # 'Jose De Leon' may be listed under the last token only
+            pid = self.index.get((key[0], key[1].split()[-1]))
+        return pid
+
+    def _resolve(self, keys: list) -> Optional[str]:
+        """Try every candidate key against the index, then the fallback for the first one."""
+        key = keys[0]
+        with self.lock:
+            self._load()
+            for candidate in keys:
+                pid = self._index_get(candidate)
+                if pid is not None:
+                    self.stats['index_hits'] += 1
+                    return pid
+            if self._known(key):
+                self.stats['fallback_hits'] += 1
+                pid = self.fallback[key][0]
+                if pid is None:
+                    self.stats['not_found'] += 1
+                return pid
+
+        pid = self._lookup(*key)
+        with self.lock:
+            self.stats['lookups'] += 1
+            if pid is None:
+                self.stats['not_found'] += 1
+            if not self._known(key):
+                self._remember(key, pid)
+        return pid
+
+    def resolve_parts(self, first: str, last: str) -> Optional[str]:
+        return self._resolve([name_key(first, last)])
+
+    def resolve(self, full_name: str) -> Optional[str]:
+        """
+        MLBAM id for a display name. Every first/last split is tried against
+        the index, so 'Jean Carlos Mejia' finds FIRSTNAME 'Jean Carlos'.
+        """
+        first, last = split_name(full_name)
+        if not first or not last:
+            return None
+        tokens = [first] + last.split()
+        keys = [(''.join(tokens[:i]), ' '.join(tokens[i:])) for i in range(1, len(tokens))]
+        return self._resolve(keys)
+
+    def report(self) -> dict:
+        with self.lock:
+            report = dict(self.stats)
+        resolved = report['index_hits'] + report['fallback_hits'] + report['lookups']
+        report['index_hit_rate'] = round(report['index_hits'] / resolved, 3) if resolved else None
+        return report
+
+
+resolver = PlayerIdResolver()
@@ -0,0 +1,183 @@
+import queue
+import random
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from src.mlb.metrics import metrics
+
+# Requests per second allowed per host. Baseball-Reference blocks clients that
+# exceed ~20 requests a minute, so keep it well under that.
+HOST_RATES = {
+    'www.baseball-reference.com': 0.3,
+    'baseballsavant.mlb.com':     2.0,
+    'www.fangraphs.com':          1.0,
+}
+DEFAULT_RATE = 1.0
+
+RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """
+    Token bucket that adapts its refill rate: throttling responses halve it,
+    successful responses slowly restore it (AIMD), never above the base rate.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, min_rate: float = 0.02):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def reward(self) -> None:
+        with self.lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+
+class HostRateLimiter:
+    """
+    One TokenBucket per host, created on first use. In worker processes the
+    limiter can be attached to a shared one (see start_shared_limiter) so the
+    per-host budget holds across the whole process pool.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: float = DEFAULT_RATE, scale: float = 1.0):
+        self.rates = dict(HOST_RATES if rates is None else rates)
+        self.default_rate = default_rate
+        self.scale = scale
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+        self.remote = None
+
+    def attach(self, remote) -> None:
+        """Delegate acquire/report to ``remote`` (a shared limiter proxy); None detaches."""
+        self.remote = remote
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self.lock:
+            if host not in self.buckets:
+                rate = self.rates.get(host, self.default_rate) * self.scale
+                self.buckets[host] = TokenBucket(rate)
+            return self.buckets[host]
+
+    def acquire(self, host: str) -> float:
+        if self.remote is not None:
+            return self.remote.acquire(host)
+        return self.bucket(host).acquire()
+
+    def report(self, host: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        if self.remote is not None:
+            self.remote.report(host, status_code, retry_after)
+        elif status_code in RETRY_STATUSES:
+            self.bucket(host).penalize(retry_after)
+        elif status_code < 400:
+            self.bucket(host).reward()
+
+
+limiter = HostRateLimiter()
+
+
+class LimiterManager(BaseManager):
+    pass
+
+
+LimiterManager.register('HostRateLimiter', HostRateLimiter, exposed=['acquire', 'report'])
+LimiterManager.register('Queue', queue.Queue)
+
+
+def start_shared_limiter(rates: Optional[Dict[str, float]] = None, scale: float = 1.0):
+    """
+    Start a manager process holding one HostRateLimiter and return
+    (manager, proxy). Pass the proxy to worker processes and attach it to
+    their ``limiter``; shut the manager down when the pool is done.
+    """
+    manager = LimiterManager()
+    manager.start()
+    return manager, manager.HostRateLimiter(rates, DEFAULT_RATE, scale)
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def limited_get(url: str, session=None, max_retries: int = 4, **kwargs) -> requests.Response:
+    """
+    GET ``url`` through the per-host limiter, backing off and retrying on
+    HTTP 429/503. Responses served from a requests_cache session skip the
+    limiter entirely.
+    """
+    http = session or requests
+    host = host_of(url)
+
+    cached = is_cached(session, url, kwargs.get('params'))
+    if getattr(session, 'cache', None) is not None:
+        metrics.record_cache('requests_cache', cached)
+    if cached:
+        return http.get(url, **kwargs)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire(host)
+        resp = http.get(url, **kwargs)
+        limiter.report(host, resp.status_code, _retry_after(resp))
+        if resp.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return resp
+        time.sleep(random.uniform(0, 1))
+    return resp
+
+
+def is_cached(session, url: str, params=None) -> bool:
+    """
+    True if a requests_cache session can answer ``url`` without the network.
+    Expired entries do not count: requests_cache refetches those.
+    """
+    cache = getattr(session, 'cache', None)
+    if cache is None:
+        return False
+    try:
+        request = requests.Request('GET', url, params=params).prepare()
+        response = cache.get_response(cache.create_key(request))
+        return response is not None and not response.is_expired
+    except Exception:
+        return False
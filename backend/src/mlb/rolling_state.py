@@ -0,0 +1,292 @@
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.mlb.storage import content_fingerprint
+
+#
+# Per-team rolling state for incremental feature updates.
+#
+# For every team the state keeps the last ROLLING_WINDOW_MAX values of R, RA
+# and Run_Diff, the running EWMA (value and pandas' old-weight term) for each
+# span, the streak and the last result. Features for a new game are computed
+# from the state alone and the state is then advanced by that game, so a daily
+# update costs O(1) per game instead of reloading and re-rolling the season.
+#
+# The EWMA recurrence is the one pandas uses for ewm(span, adjust=False) with
+# the default ignore_na=False, so the numbers match a full recompute exactly.
+#
+# Prediction uses the same state: latest_state replays a raw schedule once and
+# each team's features for the target date are then a dictionary lookup.
+#
+ROLLING_WINDOWS = [3, 5, 10]
+ROLLING_WINDOW_MAX = max(ROLLING_WINDOWS)
+
+# Feature name prefix -> source column
+ROLLING_STATS = {'R': 'R', 'RA': 'RA', 'RunDiff': 'Run_Diff'}
+
+STATE_PATH = "data/processed/rolling_state_{year}.json"
+
+
+def rolling_columns(windows=ROLLING_WINDOWS) -> list:
+    """Rolling feature columns in the order create_features writes them."""
+    cols = []
+    for window in windows:
+        cols += [f"{name}_MA{window}" for name in ROLLING_STATS]
+        cols += [f"{name}_EWMA{window}" for name in ROLLING_STATS]
+    return cols
+
+
+def add_rolling_features(df: pd.DataFrame, windows=ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    Full recompute of the MA/EWMA features over ``df``, which must be one
+    team's games in order. Each game only sees the games before it.
+    """
+    for window in windows:
+        for name, col in ROLLING_STATS.items():
+            df[f'{name}_MA{window}'] = (
+                df[col]
+                .shift(1)
+                .rolling(window=window, min_periods=1)
+                .mean()
+                .round(3)
+            )
+        for name, col in ROLLING_STATS.items():
+            df[f'{name}_EWMA{window}'] = (
+                df[col]
+                .shift(1)
+                .ewm(span=window, adjust=False)
+                .mean()
+                .round(3)
+            )
+    return df
+
+
+def _is_nan(x) -> bool:
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
+
+def _alpha(span: int) -> float:
+    # pandas: com = (span - 1) / 2, alpha = 1 / (1 + com)
+    return 1. / (1. + (span - 1) / 2)
+
+
+def _ewm_step(weighted, old_wt: float, cur, span: int):
+    """One step of pandas' ewm(adjust=False, ignore_na=False) mean."""
+    if _is_nan(weighted):
+        return (cur, 1.) if not _is_nan(cur) else (weighted, old_wt)
+    alpha = _alpha(span)
+    old_wt *= 1. - alpha
+    if not _is_nan(cur):
+        if weighted != cur:
+            weighted = old_wt * weighted + alpha * cur
+            weighted /= old_wt + alpha
+        old_wt = 1.
+    return weighted, old_wt
+
+
+def _mean(values: list, window: int):
+    recent = [v for v in values[-window:] if not _is_nan(v)]
+    return sum(recent) / len(recent) if recent else np.nan
+
+
+def _json_num(x):
+    return None if _is_nan(x) else x
+
+
+def _round3(x):
+    return float(np.round(x, 3)) if not _is_nan(x) else np.nan
+
+
+def _next_streak(streak: int, last_result: int) -> int:
+    if last_result == 1:
+        return streak + 1 if streak > 0 else 1
+    return streak - 1 if streak < 0 else -1
+
+
+class TeamState:
+    def __init__(self, windows=ROLLING_WINDOWS):
+        self.windows = list(windows)
+        self.values = {col: [] for col in ROLLING_STATS.values()}
+        self.ewma = {col: {w: [np.nan, 1.] for w in self.windows} for col in ROLLING_STATS.values()}
+        # Streak going into the last game and that game's result, as stored in
+        # the _individual file's Streak and W/L columns
+        self.streak = 0
+        self.last_result = 0
+        self.last_date: Optional[str] = None
+        self.rank = np.nan
+        self.games = 0
+
+    def features(self) -> dict:
+        """MA/EWMA features for the team's next game."""
+        out = {}
+        for window in self.windows:
+            for name, col in ROLLING_STATS.items():
+                out[f'{name}_MA{window}'] = _round3(_mean(self.values[col], window))
+            for name, col in ROLLING_STATS.items():
+                out[f'{name}_EWMA{window}'] = _round3(self.ewma[col][window][0])
+        return out
+
+    def next_streak(self) -> int:
+        return _next_streak(self.streak, self.last_result)
+
+    def push(self, game: dict, streak: int, result: int) -> None:
+        """Advance the state by one played game."""
+        for col in ROLLING_STATS.values():
+            cur = game[col]
+            cur = np.nan if _is_nan(cur) else float(cur)
+            self.values[col] = (self.values[col] + [cur])[-ROLLING_WINDOW_MAX:]
+            for window in self.windows:
+                weighted, old_wt = self.ewma[col][window]
+                self.ewma[col][window] = list(_ewm_step(weighted, old_wt, cur, window))
+        self.streak = int(streak)
+        self.last_result = int(result)
+        self.last_date = pd.Timestamp(game['Date']).strftime('%Y-%m-%d')
+        if 'Rank' in game:
+            self.rank = game['Rank']
+        self.games += 1
+
+    def advance(self, games: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rolling features and Streak for ``games`` (one team, in order, with
+        R/RA/Run_Diff and W/L encoded as 1/0), advancing the state as it goes.
+        """
+        rows = []
+        for game in games[['Date', 'R', 'RA', 'Run_Diff', 'W/L']].to_dict('records'):
+            streak = self.next_streak()
+            rows.append({**self.features(), 'Streak': streak})
+            self.push(game, streak, 1 if game['W/L'] == 1 else 0)
+        return pd.DataFrame(rows, index=games.index)
+
+    def to_dict(self) -> dict:
+        return {
+            'values': {col: [_json_num(v) for v in vals] for col, vals in self.values.items()},
+            'ewma': {
+                col: {str(w): [_json_num(v[0]), v[1]] for w, v in spans.items()}
+                for col, spans in self.ewma.items()
+            },
+            'streak': self.streak,
+            'last_result': self.last_result,
+            'last_date': self.last_date,
+            'rank': _json_num(self.rank),
+            'games': self.games,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, windows=ROLLING_WINDOWS) -> "TeamState":
+        state = cls(windows)
+        state.values = {col: [np.nan if v is None else v for v in vals] for col, vals in data['values'].items()}
+        state.ewma = {
+            col: {int(w): [np.nan if v[0] is None else v[0], v[1]] for w, v in spans.items()}
+            for col, spans in data['ewma'].items()
+        }
+        state.streak = data['streak']
+        state.last_result = data['last_result']
+        state.last_date = data['last_date']
+        state.rank = np.nan if data.get('rank') is None else data['rank']
+        state.games = data['games']
+        return state
+
+
+def _history_order(feats: pd.DataFrame) -> pd.DataFrame:
+    # Stable, so doubleheaders keep the order they were appended in
+    return feats.sort_values('Date', kind='stable')
+
+
+def build_state(feats: pd.DataFrame, windows=ROLLING_WINDOWS) -> dict:
+    """Replay a season's _individual rows into a {team: TeamState} map."""
+    states = {}
+    for team, games in _history_order(feats).groupby('Tm', observed=True, sort=False):
+        state = TeamState(windows)
+        for game in games[['Date', 'R', 'RA', 'Run_Diff', 'W/L', 'Streak']].to_dict('records'):
+            state.push(game, game['Streak'], 1 if game['W/L'] == 1 else 0)
+        states[str(team)] = state
+    return states
+
+
+def latest_state(raw: pd.DataFrame, as_of, windows=ROLLING_WINDOWS) -> dict:
+    """
+    Each team's state going into ``as_of`` from a raw schedule (as returned by
+    load_dataset('raw'): datetime Date, bbref W/L and the after-game Streak),
+    replaying every earlier game once. Streak is shifted like create_features
+    does, so next_streak() is the value training sees for the next game.
+    """
+    games = raw.loc[raw['Date'] < pd.Timestamp(as_of), ['Date', 'Tm', 'R', 'RA', 'W/L', 'Streak', 'Rank']].copy()
+    games['R'] = games['R'].astype(float)
+    games['RA'] = games['RA'].astype(float)
+    games['Run_Diff'] = games['R'] - games['RA']
+    games['W/L'] = games['W/L'].isin(['W', 'W-wo']).astype(int)
+    games = _history_order(games)
+    games['Streak'] = games.groupby('Tm', observed=True)['Streak'].shift(1).fillna(0).astype(int)
+    states = {}
+    for team, team_games in games.groupby('Tm', observed=True, sort=False):
+        state = TeamState(windows)
+        for game in team_games.to_dict('records'):
+            state.push(game, game['Streak'], game['W/L'])
+        states[str(team)] = state
+    return states
+
+
+def _fingerprint(feats_path: str) -> list:
+    # By content: the state is synced through the bucket next to the
+    # _individual file, and a downloaded copy has a new mtime
+    return content_fingerprint(feats_path)
+
+
+def load_state(year: int, feats_path: str) -> Optional[dict]:
+    """
+    The persisted state for ``year``, or None if it is missing or was saved
+    for a different version (by content) of the _individual file.
+    """
+    path = STATE_PATH.format(year=year)
+    if not os.path.exists(path) or not os.path.exists(feats_path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('fingerprint') != _fingerprint(feats_path):
+        return None
+    return {team: TeamState.from_dict(team_data) for team, team_data in data['teams'].items()}
+
+
+def save_state(states: dict, year: int, feats_path: str) -> str:
+    """Persist the state, tied to the current content of the _individual file."""
+    path = STATE_PATH.format(year=year)
+    payload = {
+        'fingerprint': _fingerprint(feats_path),
+        'teams': {team: state.to_dict() for team, state in states.items()},
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+    return path
+
+
+def verify_against_recompute(feats: pd.DataFrame, appended: pd.DataFrame, windows=ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    Recompute rolling features and streaks over each team's full season and
+    compare them with the incrementally computed ``appended`` rows. Returns
+    the mismatching (Tm, Date, column, incremental, recomputed) entries.
+    """
+    cols = rolling_columns(windows) + ['Streak']
+    mismatches = []
+    for team, new in appended.groupby('Tm', observed=True):
+        games = _history_order(feats[feats['Tm'] == team]).reset_index(drop=True)
+        full = add_rolling_features(games[['Date', 'R', 'RA', 'Run_Diff']].copy(), windows)
+        # Each streak follows from the previous game's streak and result
+        prev_streak = games['Streak'].shift(1).fillna(0).astype(int)
+        prev_result = games['W/L'].shift(1).fillna(0).astype(int)
+        full['Streak'] = [_next_streak(s, r) for s, r in zip(prev_streak, prev_result)]
+        # The appended rows are the team's last len(new) games
+        full = full.tail(len(new))
+        for col in cols:
+            expected = full[col].to_numpy(dtype=float)
+            got = new[col].to_numpy(dtype=float)
+            bad = ~np.isclose(got, expected, rtol=0, atol=1e-9, equal_nan=True)
+            for i in np.flatnonzero(bad):
+                mismatches.append((team, new['Date'].iloc[i], col, got[i], expected[i]))
+    return pd.DataFrame(mismatches, columns=['Tm', 'Date', 'column', 'incremental', 'recomputed'])
@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+
+from src.mlb.compact_model import CompactClassifier, compact_promoted
+from src.mlb.features import FEATURES
+
+#
+# Local prediction service.
+#
+# The calibrated win/loss classifier and the run-diff/run-total boosters are
+# loaded once and kept in memory. A watcher thread polls the artifact files and
+# swaps in a new model as soon as one has been fully written; requests in
+# flight finish on the model they started with.
+#
+#   POST /predict  {"rows": [{"Home_Away": 1, "Rank": 3, ...}, ...]}
+#                  or {"columns": [...], "data": [[...], ...]}
+#   GET  /health   loaded artifacts and their modification times
+#
+# Missing features are sent to the models as NaN, which LightGBM handles the
+# same way it does in training.
+#
+MODEL_DIR = "backend/models"
+# Candidates per model, first existing file wins. The classifier's order is
+# flipped once a warm-start update has promoted the compact artifact (see
+# compact_model.py).
+ARTIFACTS = {
+    'classifier': ["mlb_wl_calibrated.joblib", "mlb_wl_compact.json"],
+    'run_diff':   ["run_diff_lgbm.txt"],
+    'run_total':  ["run_total_lgbm.txt"],
+}
+RELOAD_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class CalibratedPredictor:
+    """
+    Fast path for a sigmoid CalibratedClassifierCV over LightGBM: each fold's
+    booster is called directly on a float matrix and its Platt coefficients
+    applied in numpy, skipping scikit-learn's per-call validation. Falls back
+    to predict_proba for any other kind of model.
+    """
+
+    def __init__(self, clf):
+        self.clf = clf
+        self.features = list(getattr(clf, 'feature_names_in_', FEATURES))
+        self.folds = self._folds(clf)
+
+    @staticmethod
+    def _folds(clf) -> Optional[list]:
+        folds = []
+        for fold in getattr(clf, 'calibrated_classifiers_', []):
+            booster = getattr(fold.estimator, 'booster_', None)
+            if fold.method != 'sigmoid' or booster is None or len(fold.calibrators) != 1:
+                return None
+            # scikit-learn calibrates decision_function (the raw score) when
+            # the estimator has one, otherwise the positive class probability
+            raw = hasattr(fold.estimator, 'decision_function')
+            folds.append((booster, raw, fold.calibrators[0].a_, fold.calibrators[0].b_))
+        return folds or None
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.folds is None:
+            return self.clf.predict_proba(X)[:, 1]
+        total = np.zeros(len(X))
+        for booster, raw, a, b in self.folds:
+            total += 1. / (1. + np.exp(a * booster.predict(X, raw_score=raw) + b))
+        return total / len(self.folds)
+
+    def check(self) -> None:
+        """Drop the fast path if it disagrees with predict_proba on a probe batch."""
+        if self.folds is None:
+            return
+        import pandas as pd
+
+        probe = np.random.default_rng(0).normal(size=(8, len(self.features)))
+        probe[::2, ::3] = np.nan
+        expected = self.clf.predict_proba(pd.DataFrame(probe, columns=self.features))[:, 1]
+        if not np.allclose(self.predict(probe), expected, rtol=0, atol=1e-9):
+            logger.warning("Calibrated fast path disagrees with predict_proba; using predict_proba")
+            self.folds = None
+
+
+def _load_artifact(name: str, path: str):
+    if path.endswith(".json"):
+        return CompactClassifier.load(path)
+    if name == 'classifier':
+        import joblib
+
+        predictor = CalibratedPredictor(joblib.load(path))
+        predictor.check()
+        return predictor
+    import lightgbm as lgb
+
+    return lgb.Booster(model_file=path)
+
+
+def _model_features(name: str, model) -> list:
+    return model.features if name == 'classifier' else model.feature_name()
+
+
+class ModelStore:
+    def __init__(self, model_dir: str = MODEL_DIR):
+        self.model_dir = model_dir
+        # name -> (model, features, mtime_ns, loaded_at); replaced, never mutated
+        self.models = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def path(self, name: str) -> str:
+        paths = [os.path.join(self.model_dir, f) for f in ARTIFACTS[name]]
+        if name == 'classifier' and compact_promoted(os.path.join(self.model_dir, "train_state.json")):
+            paths.reverse()
+        return next((p for p in paths if os.path.exists(p)), paths[-1])
+
+    def reload_if_changed(self) -> list:
+        """Load every artifact that is new or changed on disk; returns their names."""
+        loaded = []
+        for name in ARTIFACTS:
+            path = self.path(name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            current = self.models.get(name)
+            if current is not None and current[2] == mtime:
+                continue
+            try:
+                model = _load_artifact(name, path)
+            except Exception as exc:
+                # Probably still being written; the next poll tries again
+                logger.warning("Could not load %s: %s", path, exc)
+                continue
+            with self.lock:
+                self.models = {**self.models, name: (model, _model_features(name, model), mtime, time.time())}
+            logger.info("Loaded %s", path)
+            loaded.append(name)
+        return loaded
+
+    def watch(self, interval: float = RELOAD_SECONDS) -> threading.Thread:
+        def poll():
+            while not self.stop.wait(interval):
+                self.reload_if_changed()
+
+        thread = threading.Thread(target=poll, name="model-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def predict(self, rows: list) -> dict:
+        with self.lock:
+            models = self.models
+        if 'classifier' not in models:
+            raise RuntimeError(f"No classifier loaded from {self.model_dir}")
+
+        matrices = {}
+        for model, features, _, _ in models.values():
+            if tuple(features) not in matrices:
+                matrices[tuple(features)] = feature_matrix(rows, features)
+
+        out = {}
+        start = time.perf_counter()
+        for name, (model, features, _, _) in models.items():
+            out[name] = model.predict(matrices[tuple(features)])
+        elapsed = time.perf_counter() - start
+
+        prob = out.pop('classifier')
+        return {
+            'prob_home_win': np.round(prob, 4).tolist(),
+            'prob_away_win': np.round(1 - prob, 4).tolist(),
+            'run_diff': np.round(out['run_diff'], 3).tolist() if 'run_diff' in out else None,
+            'run_total': np.round(out['run_total'], 3).tolist() if 'run_total' in out else None,
+            'model_ms': round(elapsed * 1000, 3),
+        }
+
+    def status(self) -> dict:
+        with self.lock:
+            models = self.models
+        return {
+            name: {
+                'path': self.path(name),
+                'mtime': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(mtime / 1e9)),
+                'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(loaded_at)),
+                'features': len(features),
+            }
+            for name, (_, features, mtime, loaded_at) in models.items()
+        }
+
+
+def _float(value) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def feature_matrix(rows: list, features: list) -> np.ndarray:
+    """C-contiguous float64 matrix of ``rows`` (feature dicts) in ``features`` order."""
+    return np.array([[_float(row.get(f)) for f in features] for row in rows], dtype=np.float64)
+
+
+def parse_rows(payload: dict) -> list:
+    """Feature dicts from a request body; ValueError if it has neither accepted shape."""
+    usage = 'expected {"rows": [{...}, ...]} or {"columns": [...], "data": [[...], ...]}'
+    if not isinstance(payload, dict):
+        raise ValueError(usage)
+    if 'rows' in payload:
+        rows = payload['rows']
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError(f"rows must be a list of objects; {usage}")
+        return rows
+    if 'columns' in payload and 'data' in payload:
+        columns, data = payload['columns'], payload['data']
+        if (not isinstance(columns, list) or not isinstance(data, list)
+                or not all(isinstance(values, list) for values in data)):
+            raise ValueError(f"columns must be a list and data a list of lists; {usage}")
+        return [dict(zip(columns, values)) for values in data]
+    raise ValueError(usage)
+
+
+def make_handler(store: ModelStore):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {'status': 'ok', 'models': store.status()})
+            else:
+                self._reply(404, {'error': f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._reply(404, {'error': f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                rows = parse_rows(json.loads(self.rfile.read(length) or b"{}"))
+            except (ValueError, TypeError, AttributeError) as exc:
+                self._reply(400, {'error': str(exc)})
+                return
+            try:
+                self._reply(200, store.predict(rows))
+            except RuntimeError as exc:
+                self._reply(503, {'error': str(exc)})
+            except (TypeError, AttributeError) as exc:
+                self._reply(400, {'error': f"malformed rows: {exc}"})
+
+        def log_message(self, format, *args):
+            logger.debug("%s %s", self.address_string(), format % args)
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, model_dir: str = MODEL_DIR,
+          poll: float = RELOAD_SECONDS) -> None:
+    store = ModelStore(model_dir)
+    if not store.reload_if_changed():
+        logger.warning("No model artifacts in %s yet; waiting for them to appear", model_dir)
+    store.watch(poll)
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    logger.info("Serving predictions on http://%s:%d (POST /predict, GET /health)", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop.set()
+        server.server_close()
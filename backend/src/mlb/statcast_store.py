@@ -0,0 +1,239 @@
+import os
+import tarfile
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.mlb.rate_limit import limiter
+
+#
+# League-wide Statcast store.
+#
+# Pitch-level rows are downloaded once per day for the whole league and kept in
+# one partition per date: data/statcast/{season}/{YYYY-MM-DD}.csv.gz.
+# Alongside them, pitcher_daily.csv keeps per-(pitcher, game_date) counts, from
+# which per-pitcher cumulative sums answer "stats before date X" without
+# touching the network or the pitch-level partitions.
+#
+# A season's store is synced through the Supabase bucket as one tar archive
+# (export_archive / import_archive), so a fresh checkout only downloads the
+# days that are not in it yet.
+#
+STORE_DIR = "data/statcast"
+ARCHIVE_PATH = "data/statcast_{season}.tar"
+
+# Pitch-level columns kept in each partition
+PITCH_COLUMNS = ['game_date', 'game_pk', 'at_bat_number', 'pitch_number',
+                 'pitcher', 'events', 'outs_when_up', 'launch_speed']
+
+# Per-pitcher daily counts, in the order they are stored in the cumulative arrays
+COUNT_COLUMNS = ['pitches', 'outs', 'ks', 'bb', 'hits', 'contact', 'hard_hit']
+
+HIT_EVENTS = ['single', 'double', 'triple', 'home_run']
+
+# Savant's season window used by get_player_stats
+SEASON_START = "{season}-03-01"
+
+_lock = threading.Lock()
+_indexes = {}
+# Latest date per season known to be fully stored
+_covered = {}
+
+
+def _season_dir(season: int) -> str:
+    return os.path.join(STORE_DIR, str(season))
+
+
+def _partition_path(season: int, day: date) -> str:
+    return os.path.join(_season_dir(season), f"{day:%Y-%m-%d}.csv.gz")
+
+
+def _daily_path(season: int) -> str:
+    return os.path.join(_season_dir(season), "pitcher_daily.csv")
+
+
+def daily_counts(pitches: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate pitch-level rows into per-(pitcher, game_date) counts."""
+    if pitches.empty:
+        return pd.DataFrame(columns=['pitcher', 'game_date'] + COUNT_COLUMNS)
+    df = pd.DataFrame({
+        'pitcher':   pitches['pitcher'].astype('int64'),
+        'game_date': pd.to_datetime(pitches['game_date']).dt.strftime('%Y-%m-%d'),
+        'pitches':   1,
+        'outs':      pitches['outs_when_up'].fillna(0),
+        'ks':        (pitches['events'] == 'strikeout').astype(int),
+        'bb':        (pitches['events'] == 'walk').astype(int),
+        'hits':      pitches['events'].isin(HIT_EVENTS).astype(int),
+        'contact':   pitches['launch_speed'].notna().astype(int),
+        'hard_hit':  (pitches['launch_speed'] > 95).astype(int),
+    })
+    return df.groupby(['pitcher', 'game_date'], as_index=False)[COUNT_COLUMNS].sum()
+
+
+def missing_dates(season: int, through: date) -> list:
+    """Dates from the season start through ``through`` with no stored partition."""
+    start = pd.Timestamp(SEASON_START.format(season=season)).date()
+    # Only completed days are stored; today's games are still in progress
+    through = min(through, date.today() - timedelta(days=1), date(season, 12, 31))
+    days = []
+    day = start
+    while day <= through:
+        if not os.path.exists(_partition_path(season, day)):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _fetch_range(start: date, end: date) -> pd.DataFrame:
+    from pybaseball import statcast
+
+    limiter.acquire("baseballsavant.mlb.com")
+    df = statcast(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), verbose=False)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PITCH_COLUMNS)
+    df = df[[c for c in PITCH_COLUMNS if c in df.columns]].copy()
+    df['game_date'] = pd.to_datetime(df['game_date']).dt.date
+    return df
+
+
+def update_store(season: int, through: date, chunk_days: int = 7) -> int:
+    """
+    Download every missing date of ``season`` up to ``through`` (inclusive),
+    write one partition per date and append its counts to pitcher_daily.csv.
+    Returns the number of dates added.
+    """
+    with _lock:
+        days = missing_dates(season, through)
+        if not days:
+            return 0
+        os.makedirs(_season_dir(season), exist_ok=True)
+        print(f"Updating Statcast store for {season}: {len(days)} missing dates")
+
+        for i in range(0, len(days), chunk_days):
+            chunk = days[i:i + chunk_days]
+            pitches = _fetch_range(chunk[0], chunk[-1])
+            if 'outs_when_up' not in pitches.columns:
+                raise RuntimeError(
+                    f"Statcast output missing 'outs_when_up' for {chunk[0]}..{chunk[-1]}"
+                )
+            counts = daily_counts(pitches)
+            counts.to_csv(
+                _daily_path(season),
+                mode='a' if os.path.exists(_daily_path(season)) else 'w',
+                header=not os.path.exists(_daily_path(season)),
+                index=False,
+            )
+            # Partitions are written last: a partition marks its date as complete
+            for day in chunk:
+                part = pitches[pitches['game_date'] == day]
+                part.to_csv(_partition_path(season, day), index=False)
+
+        _indexes.pop(season, None)
+        return len(days)
+
+
+def export_archive(season: int, dest: Optional[str] = None) -> Optional[str]:
+    """Pack the season's partitions and pitcher_daily.csv into one tar file; None if there is no store."""
+    dest = dest or ARCHIVE_PATH.format(season=season)
+    with _lock:
+        folder = _season_dir(season)
+        if not os.path.isdir(folder):
+            return None
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp = f"{dest}.tmp"
+        with tarfile.open(tmp, "w") as tar:
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(".csv.gz") or name == "pitcher_daily.csv":
+                    tar.add(os.path.join(folder, name), arcname=name)
+        os.replace(tmp, dest)
+    return dest
+
+
+def import_archive(season: int, src: str) -> int:
+    """
+    Restore a season from an exported archive when the local store has no
+    partitions of it yet. Returns the number of dates restored.
+    """
+    with _lock:
+        folder = _season_dir(season)
+        if os.path.isdir(folder) and any(n.endswith(".csv.gz") for n in os.listdir(folder)):
+            return 0
+        os.makedirs(folder, exist_ok=True)
+        with tarfile.open(src) as tar:
+            members = [m for m in tar.getmembers()
+                       if m.isfile() and os.path.basename(m.name) == m.name
+                       and (m.name.endswith(".csv.gz") or m.name == "pitcher_daily.csv")]
+            # pitcher_daily.csv first: a partition marks its date as complete
+            members.sort(key=lambda m: m.name != "pitcher_daily.csv")
+            for member in members:
+                with tar.extractfile(member) as f, open(os.path.join(folder, member.name), "wb") as out:
+                    out.write(f.read())
+        _indexes.pop(season, None)
+        _covered.pop(season, None)
+        return sum(m.name.endswith(".csv.gz") for m in members)
+
+
+def load_pitches(season: int, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    """Read the stored pitch-level rows of a season, optionally limited to a date range."""
+    folder = _season_dir(season)
+    if not os.path.isdir(folder):
+        return pd.DataFrame(columns=PITCH_COLUMNS)
+    parts = []
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(".csv.gz"):
+            continue
+        day = date.fromisoformat(name[:10])
+        if (start and day < start) or (end and day > end):
+            continue
+        parts.append(pd.read_csv(os.path.join(folder, name)))
+    if not parts:
+        return pd.DataFrame(columns=PITCH_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+class PitcherIndex:
+    """Per-pitcher sorted game dates and cumulative counts for one season."""
+
+    def __init__(self, daily: pd.DataFrame):
+        self.dates = {}
+        self.cumulative = {}
+        daily = (daily.drop_duplicates(subset=['pitcher', 'game_date'], keep='last')
+                      .sort_values(['pitcher', 'game_date']))
+        for pid, grp in daily.groupby('pitcher', sort=False):
+            self.dates[int(pid)] = grp['game_date'].to_numpy(dtype='datetime64[D]')
+            self.cumulative[int(pid)] = grp[COUNT_COLUMNS].to_numpy(dtype=float).cumsum(axis=0)
+
+    def asof(self, pid: int, end_dt) -> Optional[dict]:
+        """Counts over all games on or before ``end_dt``; None if there are none."""
+        dates = self.dates.get(int(pid))
+        if dates is None:
+            return None
+        i = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_dt).date(), 'D'), side='right')
+        if i == 0:
+            return None
+        return dict(zip(COUNT_COLUMNS, self.cumulative[int(pid)][i - 1]))
+
+
+def pitcher_index(season: int) -> PitcherIndex:
+    with _lock:
+        if season not in _indexes:
+            path = _daily_path(season)
+            daily = pd.read_csv(path) if os.path.exists(path) else daily_counts(pd.DataFrame())
+            _indexes[season] = PitcherIndex(daily)
+        return _indexes[season]
+
+
+def pitcher_counts_asof(pid, season: int, end_dt) -> Optional[dict]:
+    """
+    Season-to-date counts for a pitcher through ``end_dt`` (inclusive),
+    downloading any dates the store is still missing first.
+    """
+    end = pd.Timestamp(end_dt).date()
+    if end > _covered.get(season, date.min):
+        if missing_dates(season, end):
+            update_store(season, end)
+        _covered[season] = end
+    return pitcher_index(season).asof(int(pid), end)
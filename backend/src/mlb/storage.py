@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+#
+# Typed storage for the raw and processed schedule datasets.
+#
+# CSV stays the canonical format (it is what gets synced to Supabase), but
+# every load goes through a declared schema: datetime Date columns, numeric
+# stats and categorical team codes. With MLB_STORAGE_FORMAT=parquet each CSV
+# gets a Parquet mirror next to it, which is read instead of the CSV whenever
+# it was written from the CSV as it is now (its metadata records the CSV's
+# size and mtime_ns), with column projection and filter pushdown.
+#
+# Full-table loads are parsed once per process and reused until the file's
+# mtime or size changes; callers get a copy unless they ask for the shared
+# frame with copy=False (which they must then treat as read-only).
+#
+STORAGE_FORMAT = os.getenv("MLB_STORAGE_FORMAT", "csv").lower()
+
+# Parquet metadata key holding the (size, mtime_ns) of the CSV a mirror was written from
+MIRROR_KEY = b"mlb_csv_fingerprint"
+
+DATASET_PATHS = {
+    'raw':        "data/raw/mlb_teams_schedules_{year}.csv",
+    'processed':  "data/processed/mlb_teams_schedules_{year}.csv",
+    'individual': "data/processed/mlb_teams_schedules_{year}_individual.csv",
+}
+
+# ATH for 2025, OAK for 2024 and before
+TEAM_CODES = ['ARI', 'ATH', 'ATL', 'BAL', 'BOS', 'CHC', 'CHW', 'CIN', 'CLE', 'COL',
+              'DET', 'HOU', 'KCR', 'LAA', 'LAD', 'MIA', 'MIL', 'MIN', 'NYM', 'NYY',
+              'OAK', 'PHI', 'PIT', 'SDP', 'SEA', 'SFG', 'STL', 'TBR', 'TEX', 'TOR', 'WSN']
+TEAM_DTYPE = pd.CategoricalDtype(TEAM_CODES)
+
+TEAM_COLUMNS = ['Tm', 'Opp']
+RAW_NUMERIC = ['R', 'RA', 'Inn', 'Rank', 'Attendance', 'cLI', 'Streak', 'Game_Number']
+PROCESSED_DATES = ['Date', 'Opp_Date']
+
+
+def dataset_path(kind: str, year: int) -> str:
+    return DATASET_PATHS[kind].format(year=year)
+
+
+def parquet_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _team_codes(col: pd.Series) -> pd.Series:
+    extra = sorted(set(col.dropna().astype(str)) - set(TEAM_CODES))
+    dtype = TEAM_DTYPE if not extra else pd.CategoricalDtype(TEAM_CODES + extra)
+    return col.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, kind: str, year: Optional[int] = None) -> pd.DataFrame:
+    """Coerce a schedule dataset to its declared dtypes (in place where possible)."""
+    for col in TEAM_COLUMNS:
+        if col in df.columns:
+            df[col] = _team_codes(df[col])
+
+    if kind == 'raw':
+        if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            # bbref dates carry no year: "Thursday, Mar 27" (doubleheaders end in "(1)")
+            dates = df['Date'].astype(str).str.replace(r'\s+\(\d\)$', '', regex=True)
+            df['Date'] = pd.to_datetime(dates + f" {year}", format='%A, %b %d %Y')
+        for col in RAW_NUMERIC:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+    else:
+        for col in PROCESSED_DATES:
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _filter_mask(df: pd.DataFrame, filters: dict) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    for col, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= df[col].isin(list(values))
+    return mask
+
+
+def _read_csv(path: str, kind: str, year: Optional[int], columns=None, filters=None) -> pd.DataFrame:
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + list(filters or {})))
+    df = pd.read_csv(path, usecols=usecols)
+    df = apply_schema(df, kind, year)
+    if filters:
+        df = df[_filter_mask(df, filters)].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def _read_parquet(path: str, columns=None, filters=None) -> pd.DataFrame:
+    pq_filters = None
+    if filters:
+        pq_filters = [
+            (col, 'in', list(v) if isinstance(v, (list, tuple, set)) else [v])
+            for col, v in filters.items()
+        ]
+    return pd.read_parquet(path, columns=list(columns) if columns is not None else None, filters=pq_filters)
+
+
+def write_parquet_mirror(df: pd.DataFrame, csv_path: str, kind: str, year: Optional[int],
+                         csv_key: Optional[list] = None) -> str:
+    """
+    Write the Parquet mirror of ``csv_path``. The CSV's (size, mtime_ns) when
+    ``df`` was read from it (default: now) is stored in the file's metadata.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = parquet_path(csv_path)
+    typed = apply_schema(df.copy(), kind, year)
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    key = csv_key if csv_key is not None else fingerprint(csv_path)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), MIRROR_KEY: json.dumps(key).encode()})
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def _mirror_is_fresh(csv_path: str) -> bool:
+    """True if the mirror was written from the CSV as it is now (same size and mtime_ns)."""
+    pq_path = parquet_path(csv_path)
+    if not os.path.exists(pq_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    import pyarrow.parquet as pq
+
+    stored = (pq.read_schema(pq_path).metadata or {}).get(MIRROR_KEY)
+    return stored is not None and json.loads(stored) == fingerprint(csv_path)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'parse_seconds': 0.0, 'saved_seconds': 0.0}
+
+
+def _source_path(path: str, kind: str, year: Optional[int]) -> str:
+    """The file a load will actually parse, refreshing the Parquet mirror if needed."""
+    if STORAGE_FORMAT == 'parquet':
+        if not _mirror_is_fresh(path):
+            key = fingerprint(path)
+            write_parquet_mirror(pd.read_csv(path), path, kind, year, csv_key=key)
+        return parquet_path(path)
+    return path
+
+
+def _file_key(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_uncached(path: str, source: str, kind: str, year: Optional[int], columns=None, filters=None) -> pd.DataFrame:
+    if source != path:
+        return _read_parquet(source, columns, filters)
+    return _read_csv(path, kind, year, columns, filters)
+
+
+def _cached_frame(source: str) -> Optional[pd.DataFrame]:
+    entry = _cache.get(source)
+    if entry is None or entry[0] != _file_key(source):
+        return None
+    _cache_stats['hits'] += 1
+    _cache_stats['saved_seconds'] += entry[2]
+    return entry[1]
+
+
+def read_table(path: str, kind: str, year: Optional[int] = None, columns=None,
+               filters: Optional[dict] = None, copy: bool = True) -> pd.DataFrame:
+    """
+    Load a schedule dataset with its declared schema.
+    ``columns`` projects to a subset of columns; ``filters`` maps a column to
+    a value or list of accepted values, e.g. {'Tm': 'NYY'}.
+    """
+    source = _source_path(path, kind, year)
+    with _cache_lock:
+        full = _cached_frame(source)
+        if full is None and columns is None and not filters:
+            start = time.perf_counter()
+            full = _read_uncached(path, source, kind, year)
+            elapsed = time.perf_counter() - start
+            _cache[source] = (_file_key(source), full, elapsed)
+            _cache_stats['misses'] += 1
+            _cache_stats['parse_seconds'] += elapsed
+
+    if full is None:
+        # Partial read of a file not parsed yet: let the backend project/filter
+        return _read_uncached(path, source, kind, year, columns, filters)
+
+    df = full
+    if filters:
+        df = df[_filter_mask(df, filters)].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    if df is full and copy:
+        df = full.copy()
+    return df
+
+
+def cache_report() -> dict:
+    """Hits, misses and parse time spent / saved by the dataset cache in this process."""
+    with _cache_lock:
+        report = dict(_cache_stats)
+        report['entries'] = len(_cache)
+    report['parse_seconds'] = round(report['parse_seconds'], 3)
+    report['saved_seconds'] = round(report['saved_seconds'], 3)
+    return report
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def write_table(df: pd.DataFrame, path: str, kind: str, year: Optional[int] = None) -> None:
+    """Write the canonical CSV and, with the Parquet backend, its mirror."""
+    df.to_csv(path, index=False)
+    if STORAGE_FORMAT == 'parquet':
+        write_parquet_mirror(df, path, kind, year)
+
+
+def append_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Append rows to a canonical CSV whose header already matches ``df``. A
+    Parquet mirror is left alone: it no longer matches the CSV, so the next
+    load rebuilds it.
+    """
+    df.to_csv(path, mode='a', header=False, index=False)
+
+
+def csv_columns(path: str) -> list:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def fingerprint(path: str) -> list:
+    """(size, mtime_ns) of a file, JSON-friendly."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def content_fingerprint(path: str) -> list:
+    """
+    (size, sha1) of a file, JSON-friendly. Unlike fingerprint it survives a
+    download of the same bytes onto another machine.
+    """
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return [os.path.getsize(path), h.hexdigest()]
+
+
+def load_dataset(kind: str, year: int, columns=None, filters: Optional[dict] = None, copy: bool = True) -> pd.DataFrame:
+    return read_table(dataset_path(kind, year), kind, year, columns, filters, copy)
+
+
+def migrate(data_dir: str = "data") -> list:
+    """Write a Parquet mirror for every schedule CSV under data/raw and data/processed."""
+    written = []
+    pattern = re.compile(r"mlb_teams_schedules_(\d{4})(_individual)?\.csv$")
+    for sub, default_kind in (("raw", "raw"), ("processed", "processed")):
+        folder = os.path.join(data_dir, sub)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            m = pattern.match(name)
+            if not m:
+                continue
+            kind = 'individual' if m.group(2) else default_kind
+            csv_path = os.path.join(folder, name)
+            out = write_parquet_mirror(pd.read_csv(csv_path), csv_path, kind, int(m.group(1)))
+            print(f"{csv_path} -> {out}")
+            written.append(out)
+    return written
+
@@ -1,31 +1,50 @@
 import os
-from typing import Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlparse
 import pandas as pd
 from dotenv import load_dotenv
-from supabase import Client, create_client
+
+from src.mlb.metrics import metrics
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 _SUPABASE_URL: Optional[str] = os.getenv("SUPABASE_URL")
 _SUPABASE_KEY: Optional[str] = os.getenv("SUPABASE_KEY")
 _SUPABASE_BUCKET: Optional[str] = os.getenv("SUPABASE_BUCKET")
 
-_client: Optional[Client] = None
-if _SUPABASE_URL and _SUPABASE_KEY:
-    _client = create_client(_SUPABASE_URL, _SUPABASE_KEY)
-    
-def _require_client() -> Client:
+# supabase-py talks over httpx, which the requests hook in metrics doesn't see
+_HOST = urlparse(_SUPABASE_URL).netloc if _SUPABASE_URL else "supabase"
+
+# Created by the first call that needs it; importing supabase is slow and
+# most runs only touch the bucket when a file is missing locally.
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+def _require_client() -> "Client":
     """Return a configured Supabase client or raise an error."""
-    if _client is None:
+    global _client
+    if not (_SUPABASE_URL and _SUPABASE_KEY):
         raise RuntimeError(
             "Supabase client is not configured. Set SUPABASE_URL and SUPABASE_KEY."
         )
+    with _client_lock:
+        if _client is None:
+            from supabase import create_client
+
+            _client = create_client(_SUPABASE_URL, _SUPABASE_KEY)
     return _client
 
 def ensure_local_file(bucket: str, storage_path: str, local_path: str) -> str:
     """Download a file from a Supabase storage bucket if it is missing locally."""
     if not os.path.exists(local_path):
         client = _require_client()
+        start = time.perf_counter()
         data = client.storage.from_(bucket).download(storage_path)
+        metrics.record_http(_HOST, len(data), time.perf_counter() - start)
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
         with open(local_path, "wb") as f:
             f.write(data)
@@ -42,15 +61,14 @@ def upsert_predictions(df: pd.DataFrame, table: str = "predictions") -> None:
             client.table(table).delete().neq("id", 0).execute()
         if table == "history":
             client.table(table).delete().neq("id", 0).execute()
+        start = time.perf_counter()
         client.table(table).upsert(records).execute()
+        metrics.record_http(_HOST, seconds=time.perf_counter() - start)
         
         
 def upload_file_to_bucket(file_path: str, bucket: Optional[str] = None, dest_path: Optional[str] = None) -> None:
     """Upload a file to the configured Supabase storage bucket."""
-    if _client is None:
-        raise RuntimeError(
-            "Supabase client is not configured. Set SUPABASE_URL and SUPABASE_KEY."
-        ) 
+    client = _require_client()
 
     bucket_name = bucket or _SUPABASE_BUCKET
     if not bucket_name:
@@ -60,6 +78,8 @@ def upload_file_to_bucket(file_path: str, bucket: Optional[str] = None, dest_pat
 
     target_path = dest_path or os.path.basename(file_path)
 
+    start = time.perf_counter()
     with open(file_path, "rb") as f:
-        _client.storage.from_(bucket_name).upload(target_path, f, {"upsert": "true"})
+        client.storage.from_(bucket_name).upload(target_path, f, {"upsert": "true"})
+    metrics.record_http(_HOST, os.path.getsize(file_path), time.perf_counter() - start)
     print("Uploaded", file_path, "to Supabase bucket")
@@ -0,0 +1,41 @@
+# Arizona D'Backs when creating raw data (for collecting boxscores) or making prediction
+# Arizona Diamondbacks when creating processed data 
+# 2025 season uses Athletics: 'ATH'
+full_to_abbrev = {
+    'Arizona D\'Backs':       'ARI',
+    'Atlanta Braves':         'ATL',
+    'Baltimore Orioles':      'BAL',
+    'Boston Red Sox':         'BOS',
+    'Chicago Cubs':           'CHC',
+    'Chicago White Sox':      'CHW',
+    'Cincinnati Reds':        'CIN',
+    'Cleveland Guardians':    'CLE',
+    'Colorado Rockies':       'COL',
+    'Detroit Tigers':         'DET',
+    'Houston Astros':         'HOU',
+    'Kansas City Royals':     'KCR',
+    'Los Angeles Angels':     'LAA',
+    'Los Angeles Dodgers':    'LAD',
+    'Miami Marlins':          'MIA',
+    'Milwaukee Brewers':      'MIL',
+    'Minnesota Twins':        'MIN',
+    'New York Mets':          'NYM',
+    'New York Yankees':       'NYY',
+#   'Oakland Athletics':      'OAK',
+    'Athletics':              'ATH',
+    'Philadelphia Phillies':  'PHI',
+    'Pittsburgh Pirates':     'PIT',
+    'San Diego Padres':       'SDP',
+    'Seattle Mariners':       'SEA',
+    'San Francisco Giants':   'SFG',
+    'St. Louis Cardinals':    'STL',
+    'Tampa Bay Rays':         'TBR',
+    'Texas Rangers':          'TEX',
+    'Toronto Blue Jays':      'TOR',
+    'Washington Nationals':   'WSN'
+}
+
+full_to_abbrev_proc = full_to_abbrev.copy()
+full_to_abbrev_proc['Arizona Diamondbacks'] = full_to_abbrev_proc.pop('Arizona D\'Backs')
+
+abbrev_to_full = {abbrev: full for full, abbrev in full_to_abbrev_proc.items()}
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+#
+# Binned LightGBM datasets shared by the training jobs.
+#
+# The win/loss classifier and the run-diff/run-total regressors train on the
+# same chronologically sorted feature matrix. It is binned once: the training
+# rows (the first TRAIN_FRACTION) become one lgb.Dataset, the holdout rows a
+# second one that reuses its bin mappers, exactly as each job used to build
+# for itself. Every job, and every fold fit of the hyperparameter search,
+# trains on Dataset.subset views of those two: a view shares the bins and
+# carries its own label and weights, so views for different targets can be
+# used side by side (and from several threads) without re-binning anything.
+#
+# Both datasets are saved in LightGBM's binary format under DATASET_DIR, keyed
+# by a hash of the feature matrix, the split and the binning parameters. A
+# retrain on unchanged data loads the binaries and skips construction.
+#
+DATASET_DIR = "data/lgbm_dataset"
+TRAIN_FRACTION = 0.8
+
+# Binning parameters. feature_pre_filter is off so the jobs can train with
+# their own min_data_in_leaf on the shared bins.
+DATASET_PARAMS = {'max_bin': 255, 'feature_pre_filter': False, 'verbose': -1}
+
+
+def _dataset_key(X: pd.DataFrame, split_idx: int) -> str:
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(json.dumps([list(map(str, X.columns)), [str(t) for t in X.dtypes], split_idx,
+                         DATASET_PARAMS, lgb.__version__]).encode())
+    return h.hexdigest()
+
+
+class TrainingData:
+    """
+    Sorted training rows (``frame``), their feature matrix ``X`` and the
+    binned train/holdout datasets over it, built or loaded on first use.
+    """
+
+    def __init__(self, frame: pd.DataFrame, X: pd.DataFrame, cache_dir: str = DATASET_DIR):
+        self.frame = frame
+        self.X = X
+        self.split_idx = int(len(X) * TRAIN_FRACTION)
+        self.cache_dir = cache_dir
+        self._train = None
+        self._holdout = None
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @property
+    def X_train(self) -> pd.DataFrame:
+        return self.X.iloc[:self.split_idx]
+
+    @property
+    def X_test(self) -> pd.DataFrame:
+        return self.X.iloc[self.split_idx:]
+
+    def target(self, column: str) -> tuple:
+        """(train, holdout) slices of a label column of ``frame``."""
+        y = self.frame[column]
+        return y.iloc[:self.split_idx], y.iloc[self.split_idx:]
+
+    def _paths(self) -> tuple:
+        return (os.path.join(self.cache_dir, "train.bin"),
+                os.path.join(self.cache_dir, "holdout.bin"),
+                os.path.join(self.cache_dir, "meta.json"))
+
+    def _load_or_build(self):
+        with self._lock:
+            if self._train is None:
+                self._build()
+
+    def _build(self):
+        train_path, holdout_path, meta_path = self._paths()
+        key = _dataset_key(self.X, self.split_idx)
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        if meta and meta.get('key') == key and os.path.exists(train_path) and os.path.exists(holdout_path):
+            self._train = lgb.Dataset(train_path, params=DATASET_PARAMS, free_raw_data=False).construct()
+            self._holdout = lgb.Dataset(holdout_path, reference=self._train, params=DATASET_PARAMS,
+                                        free_raw_data=False).construct()
+            self.loaded = True
+            return
+
+        # Placeholder labels; the views carry the real ones
+        zeros = np.zeros(len(self.X))
+        self._train = lgb.Dataset(self.X_train, label=zeros[:self.split_idx], params=DATASET_PARAMS,
+                                  free_raw_data=False).construct()
+        self._holdout = lgb.Dataset(self.X_test, label=zeros[self.split_idx:], reference=self._train,
+                                    params=DATASET_PARAMS, free_raw_data=False).construct()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for dataset, path in ((self._train, train_path), (self._holdout, holdout_path)):
+            tmp = f"{path}.tmp"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            dataset.save_binary(tmp)
+            os.replace(tmp, path)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({'key': key, 'rows': len(self.X), 'split_idx': self.split_idx}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @staticmethod
+    def _view(base: lgb.Dataset, rows: list, label: pd.Series, weight=None) -> lgb.Dataset:
+        view = base.subset(rows).construct()
+        view.set_label(label.iloc[rows].to_numpy(dtype=float))
+        if weight is not None:
+            view.set_weight(np.asarray(weight, dtype=float))
+        return view
+
+    def datasets(self, column: str) -> tuple:
+        """Views of all the (train, holdout) rows, labelled with ``column``."""
+        self._load_or_build()
+        y_train, y_test = self.target(column)
+        return (self._view(self._train, list(range(len(y_train))), y_train),
+                self._view(self._holdout, list(range(len(y_test))), y_test))
+
+    def train_subset(self, column: str, rows, weight=None) -> lgb.Dataset:
+        """A labelled view of some training rows, sharing their bins."""
+        self._load_or_build()
+        return self._view(self._train, sorted(rows), self.target(column)[0], weight)
+
+
+def balanced_weight(y) -> np.ndarray:
+    """Per-row weights for class_weight='balanced' on binary labels."""
+    y = np.asarray(y).astype(int)
+    counts = np.bincount(y, minlength=2)
+    return (len(y) / (2 * np.maximum(counts, 1)))[y]
+
+
+def reference_dataset(features: list, cache_dir: str = DATASET_DIR):
+    """
+    The saved training dataset, to bin new rows with the same bin mappers,
+    or None if there is none or it was built for other features.
+    """
+    path = os.path.join(cache_dir, "train.bin")
+    if not os.path.exists(path):
+        return None
+    dataset = lgb.Dataset(path, params=DATASET_PARAMS, free_raw_data=False).construct()
+    return dataset if dataset.get_feature_name() == list(features) else None
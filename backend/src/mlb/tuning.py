@@ -0,0 +1,122 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler
+
+from src.mlb.train_dataset import TrainingData, balanced_weight
+
+#
+# Hyperparameter search for the win/loss classifier.
+#
+# Successive halving over the TimeSeriesSplit folds: every candidate is scored
+# on the first (cheapest) fold, the best third go on to the next folds, and so
+# on until the survivors have seen all of them. Each fold fit stops early on
+# the last STOP_FRACTION of its own training window, so a trial trains only as
+# many trees as it needs instead of the full n_estimators. With 25 candidates
+# and 5 folds that is 49 fold fits instead of RandomizedSearchCV's 125.
+#
+# The fold's validation block is kept out of early stopping and is only used
+# to score the stopped model, so fold AUCs are as unbiased as
+# RandomizedSearchCV's. The stopping tail sits right before the validation
+# block, in time order, so no future games leak into either.
+#
+# Fold fits call lgb.train on views of the shared binned training dataset
+# (train_dataset.TrainingData), so no fit re-bins the feature matrix. The
+# candidates use LGBMClassifier's parameter names, which lgb.train accepts
+# as aliases; class_weight='balanced' becomes per-row weights.
+#
+# CPU budget: ``cpus`` cores are split into ``cpus // trial_threads`` fold
+# fits running at once, each with ``trial_threads`` LightGBM threads. Fits run
+# in threads (LightGBM releases the GIL), so the data is not copied per worker.
+#
+HALVING_ETA = 3
+STOP_FRACTION = 0.2
+
+
+def cpu_budget(cpus: int = None, trial_threads: int = 1) -> tuple:
+    """(concurrent fits, LightGBM threads per fit) for a total of ``cpus`` cores."""
+    cpus = max(1, cpus or os.cpu_count() or 1)
+    trial_threads = max(1, min(trial_threads, cpus))
+    return max(1, cpus // trial_threads), trial_threads
+
+
+def _fold_auc(data: TrainingData, target: str, base_params: dict, params: dict, train_idx, valid_idx,
+              threads: int, stopping_rounds: int) -> tuple:
+    params = {**base_params, **params, 'metric': 'auc', 'num_threads': threads, 'verbose': -1}
+    rounds = params.pop('n_estimators', 100)
+    balanced = params.pop('class_weight', None) == 'balanced'
+
+    stop = int(len(train_idx) * (1 - STOP_FRACTION))
+    fit_idx, stop_idx = train_idx[:stop], train_idx[stop:]
+    y = data.target(target)[0]
+    weight = balanced_weight(y.iloc[fit_idx]) if balanced else None
+    booster = lgb.train(
+        params, data.train_subset(target, fit_idx, weight=weight), num_boost_round=rounds,
+        valid_sets=[data.train_subset(target, stop_idx)],
+        callbacks=[lgb.early_stopping(stopping_rounds, verbose=False)],
+    )
+    best_iteration = booster.best_iteration or rounds
+    scores = booster.predict(data.X_train.iloc[valid_idx], num_iteration=best_iteration)
+    return roc_auc_score(y.iloc[valid_idx], scores), best_iteration
+
+
+def halving_search(data: TrainingData, target: str, base_params: dict, param_dist: dict, cv,
+                   n_candidates: int = 25,
+                   eta: int = HALVING_ETA, cpus: int = None, trial_threads: int = 1,
+                   stopping_rounds: int = 50, random_state: int = 42) -> dict:
+    """
+    Successive-halving search over ``param_dist`` with per-fold early stopping,
+    on the training rows of ``data`` labelled with ``target``. Candidates are
+    drawn like RandomizedSearchCV's (same sampler and seed).
+    Returns the best parameters, their mean fold AUC and run statistics.
+    """
+    folds = list(cv.split(data.X_train))
+    candidates = list(ParameterSampler(param_dist, n_iter=n_candidates, random_state=random_state))
+    workers, threads = cpu_budget(cpus, trial_threads)
+    scores = {i: [] for i in range(len(candidates))}
+    iterations = {i: [] for i in range(len(candidates))}
+    alive = list(scores)
+
+    start = time.perf_counter()
+    fits = 0
+    n_folds = 0
+    rung = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Rung r has seen eta**r folds (all of them at the last rung)
+            reached = min(len(folds), eta ** rung)
+            jobs = {
+                (i, k): pool.submit(_fold_auc, data, target, base_params, candidates[i], *folds[k], threads,
+                                    stopping_rounds)
+                for i in alive for k in range(n_folds, reached)
+            }
+            for (i, k), job in sorted(jobs.items()):
+                auc, best_iteration = job.result()
+                scores[i].append(auc)
+                iterations[i].append(best_iteration)
+            fits += len(jobs)
+            n_folds = reached
+            alive.sort(key=lambda i: np.mean(scores[i]), reverse=True)
+            print(f"Rung {rung}: {len(alive)} candidates on {n_folds} fold(s), "
+                  f"best mean AUC {np.mean(scores[alive[0]]):.4f}")
+            if n_folds == len(folds) or len(alive) == 1:
+                break
+            alive = alive[:max(1, math.ceil(len(alive) / eta))]
+            rung += 1
+
+    best = alive[0]
+    return {
+        'best_params': candidates[best],
+        'best_score': float(np.mean(scores[best])),
+        'best_iterations': iterations[best],
+        'fits': fits,
+        'candidates': len(candidates),
+        'workers': workers,
+        'threads': threads,
+        'seconds': time.perf_counter() - start,
+    }
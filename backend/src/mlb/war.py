@@ -1,51 +1,88 @@
-import requests
 import io
+import os
 import zipfile
 import pandas as pd
 from functools import lru_cache
-from datetime import date
 
-@lru_cache(maxsize=None)
+from src.mlb.rate_limit import limited_get
+
+# Each daily archive is reduced to (mlb_ID, year_ID, WAR) and kept here
+WAR_DIR = "data/war"
+
+# Daily indexes held in memory at once; a backfill walks dates in order, so a
+# small window keeps the hit rate high without holding a season of archives.
+WAR_CACHE_SIZE = 16
+
+def _ymd(game_date) -> str:
+    return pd.to_datetime(game_date).strftime("%Y-%m-%d")
+
+def _index_path(ymd: str) -> str:
+    return os.path.join(WAR_DIR, f"war_{ymd}.csv")
+
 def fetch_daily_war_df(game_date) -> pd.DataFrame:
     """
     Download the war_daily_pitch ZIP for a given date (YYYY‑MM‑DD),
     unzip it in memory, read the inner CSV, and return a DataFrame.
     """
-    if not isinstance(game_date, date):
-        ymd = pd.to_datetime(game_date).strftime("%Y-%m-%d")
+    ymd = _ymd(game_date)
 
     # build the URL
     url = f"https://www.baseball-reference.com/data/war_archive-{ymd}.zip"
 
-    resp = requests.get(url)
+    resp = limited_get(url)
     if resp.status_code == 404:
         return pd.DataFrame()
     resp.raise_for_status()
-    
+
     with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
         inner_name = next(n for n in zf.namelist() if "war_daily_pitch" in n)
         with zf.open(inner_name) as csvfile:
-            df = pd.read_csv(csvfile)
+            df = pd.read_csv(csvfile, usecols=["mlb_ID", "year_ID", "WAR"])
     #print(f"Loaded {len(df)} rows from {inner_name} for {ymd}")
     return df
 
+def _build_index(df: pd.DataFrame) -> dict:
+    """Reduce an archive to {(mlb_ID, year): WAR}, keeping the first row per key like the old mask lookup."""
+    df = df.dropna(subset=["mlb_ID"])
+    keys = zip(df["mlb_ID"].astype(float).astype(int), df["year_ID"].astype(int))
+    index = {}
+    for key, war in zip(keys, df["WAR"]):
+        index.setdefault(key, war)
+    return index
+
+@lru_cache(maxsize=WAR_CACHE_SIZE)
+def load_war_index(ymd: str) -> dict:
+    """
+    Return the (mlb_ID, year) -> WAR index for a date, reading the on-disk
+    copy if present and downloading the archive only once otherwise.
+    An empty dict means bbref has no archive for that date.
+    """
+    path = _index_path(ymd)
+    if os.path.exists(path):
+        return _build_index(pd.read_csv(path))
+
+    df = fetch_daily_war_df(ymd)
+    if df.empty:
+        return {}
+    # Lookups are always for the archive date's own season
+    compact = df.loc[df["year_ID"] == int(ymd[:4]), ["mlb_ID", "year_ID", "WAR"]].dropna(subset=["mlb_ID"])
+    os.makedirs(WAR_DIR, exist_ok=True)
+    # Unique per process: pool workers may build the same date at once
+    tmp = f"{path}.{os.getpid()}.tmp"
+    compact.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return _build_index(compact)
+
 def get_pitcher_war_on_date(mlb_code: float, game_date: str) -> float:
     """
     Returns the pitcher’s cumulative WAR as of game_date.
-    bbref_id should be the 'key_bbref' from pybaseball.playerid_lookup.
+    mlb_code is the pitcher's MLBAM id (the archive's mlb_ID column).
     """
-    df = fetch_daily_war_df(game_date)
-    if df.empty:
+    ymd = _ymd(game_date)
+    index = load_war_index(ymd)
+    if not index:
         print(f"No WAR data available for {game_date}")
         return float("nan")
-    
-    #print("mlb_ID dtype:", df['mlb_ID'].dtype)
-    df["mlb_ID"] = df["mlb_ID"].astype(float)
-    mlb_code = float(mlb_code)
-
-    # 3) boolean mask on mlb_ID, then select the 'WAR' column
-    mask = (df["mlb_ID"] == mlb_code) & (df["year_ID"] == pd.to_datetime(game_date).year)
-    war_series = df.loc[mask, "WAR"]
-
-    return war_series.iloc[0] if not war_series.empty else float("nan")
 
+    key = (int(float(mlb_code)), pd.to_datetime(game_date).year)
+    return index.get(key, float("nan"))
@@ -0,0 +1,253 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.mlb.compact_model import (COMPACT_PATH, TRAIN_STATE_PATH, CompactClassifier, compact_promoted,
+                                   fit_platt, write_compact)
+from src.mlb.features import FEATURES, TRAIN_COLUMNS
+from src.mlb.load_process import load_all_teams_data
+from src.mlb.supabase_client import ensure_local_file, upload_file_to_bucket
+
+#
+# Daily warm-start model updates.
+#
+# Instead of a full retrain, each saved booster is continued for a few rounds
+# on the games completed since it was last trained (lgb.train's init_model).
+# The newest HOLDOUT_DAYS game days are held back: the candidate is trained on
+# the days before them and compared with the current model on them, and it
+# replaces the current model only if it does no worse. Held-back days are
+# trained on by the next update, so each update is scored on games neither
+# model has seen.
+#
+# The win/loss update continues each of the compact classifier's calibrated
+# fold boosters on the unseen games before the last CALIBRATION_DAYS and
+# refits each fold's Platt coefficients on those last days, which the
+# boosters have not been trained on. Like the held-back days, the calibration
+# days are trained on by a later update, once they have moved out of the
+# window. The candidate is compared with the model being served: the
+# five-fold joblib model after a full retrain, the compact artifact after a
+# warm update. Once promoted, the compact artifact is what serving and
+# prediction load; the joblib model only changes with a full retrain.
+#
+# The date each model was last trained through is kept in STATE_PATH; the
+# training jobs reset it to the last row each booster was fit on. The models
+# and the state are fetched from the Supabase bucket when missing locally and
+# uploaded again after a promotion. LightGBM is imported only when an update
+# runs.
+#
+MODEL_DIR = "backend/models"
+STATE_PATH = TRAIN_STATE_PATH
+MODELS = {
+    'classifier': "mlb_wl_compact.json",
+    'run_diff':   "run_diff_lgbm.txt",
+    'run_total':  "run_total_lgbm.txt",
+}
+TARGETS = {'classifier': 'W/L', 'run_diff': 'Run_Diff', 'run_total': 'Run_Total'}
+JOBLIB_PATH = "backend/models/mlb_wl_calibrated.joblib"
+
+WARM_ROUNDS = 20
+HOLDOUT_DAYS = 3
+CALIBRATION_DAYS = 30
+MIN_CALIBRATION_ROWS = 100
+
+# Tree parameters carried over from the saved boosters
+CARRIED_PARAMS = [
+    'objective', 'learning_rate', 'num_leaves', 'max_depth', 'min_data_in_leaf',
+    'bagging_fraction', 'bagging_freq', 'feature_fraction', 'lambda_l1', 'lambda_l2',
+]
+
+
+def load_train_state(path: str = STATE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def mark_trained(through, models=tuple(MODELS), mode: str = "full", path: str = STATE_PATH) -> dict:
+    """Record that ``models`` have been trained on games up to ``through``."""
+    state = load_train_state(path)
+    for name in models:
+        state[name] = {
+            'trained_through': pd.Timestamp(through).strftime("%Y-%m-%d"),
+            'mode': mode,
+            'updated_at': datetime.now().isoformat(timespec="seconds"),
+        }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+    return state
+
+
+def _trained_through(state: dict, name: str, model_path: str) -> pd.Timestamp:
+    if name in state:
+        return pd.Timestamp(state[name]['trained_through'])
+    # Models from before the state file: everything up to the day they were written
+    return pd.Timestamp(os.stat(model_path).st_mtime_ns, unit="ns").normalize()
+
+
+def _log_loss(y: np.ndarray, p: np.ndarray) -> float:
+    p = np.clip(p, 1e-15, 1 - 1e-15)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def _rmse(y: np.ndarray, pred: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((y - pred) ** 2)))
+
+
+def _continue(booster, X: pd.DataFrame, y: np.ndarray, rounds: int, weight=None):
+    import lightgbm as lgb
+
+    from src.mlb.train_dataset import reference_dataset
+
+    params = {k: v for k, v in booster.params.items() if k in CARRIED_PARAMS}
+    params.update({'verbose': -1, 'seed': 42, 'feature_pre_filter': False})
+    dtrain = lgb.Dataset(X, label=y, weight=weight, reference=reference_dataset(X.columns), free_raw_data=False)
+    return lgb.train(params, dtrain, num_boost_round=rounds, init_model=booster)
+
+
+def _balanced_weight(y: np.ndarray) -> np.ndarray:
+    counts = np.bincount(y.astype(int), minlength=2)
+    return (len(y) / (2 * np.maximum(counts, 1)))[y.astype(int)]
+
+
+def _current_classifier():
+    """The classifier currently served (see compact_model.compact_promoted)."""
+    if compact_promoted(STATE_PATH) or not os.path.exists(JOBLIB_PATH):
+        return CompactClassifier.load(COMPACT_PATH)
+    import joblib
+
+    return joblib.load(JOBLIB_PATH)
+
+
+def _fetch_models() -> None:
+    """Download the saved models and the training state that are missing locally."""
+    bucket = os.getenv("SUPABASE_BUCKET")
+    if not bucket:
+        return
+    for path in [STATE_PATH, JOBLIB_PATH] + [os.path.join(MODEL_DIR, f) for f in MODELS.values()]:
+        try:
+            ensure_local_file(bucket, f"models/{os.path.basename(path)}", path)
+        except Exception as exc:
+            print(f"Could not download {path} from Supabase storage: {exc}")
+
+
+def _update_classifier(served: CompactClassifier, new, window, holdout, rounds) -> tuple:
+    """Boost on ``new``, calibrate on the later ``window`` and score on ``holdout``."""
+    features = served.features
+    if new.empty:
+        return None, "no unseen games before the calibration window"
+    if len(window) < MIN_CALIBRATION_ROWS:
+        return None, f"only {len(window)} games in the calibration window"
+
+    y_new = new['W/L'].to_numpy(dtype=float)
+    X_window = window[features].to_numpy(dtype=float)
+    folds = []
+    for booster, a, b in served.folds:
+        booster = _continue(booster, new[features], y_new, rounds, weight=_balanced_weight(y_new))
+        scores = booster.predict(X_window, raw_score=served.raw_score)
+        folds.append((booster, *fit_platt(scores, window['W/L'].to_numpy(dtype=float), a, b)))
+    model = CompactClassifier(folds, features, served.raw_score)
+
+    y_hold = holdout['W/L'].to_numpy(dtype=float)
+    current = _current_classifier()
+    cur = _log_loss(y_hold, current.predict_proba(holdout[features])[:, 1])
+    cand = _log_loss(y_hold, model.predict(holdout[features]))
+    result = {'holdout_logloss': {'current': round(cur, 4), 'candidate': round(cand, 4)}}
+    if cand > cur:
+        return None, result
+
+    write_compact(folds, features, COMPACT_PATH, served.raw_score,
+                  warm_start={'rows': len(new), 'calibration_rows': len(window), **result})
+    return model, result
+
+
+def _update_regressor(name, booster, new, holdout, rounds) -> tuple:
+    features = booster.feature_name()
+    target = TARGETS[name]
+    candidate = _continue(booster, new[features], new[target].to_numpy(dtype=float), rounds)
+
+    X_hold = holdout[features].to_numpy(dtype=float)
+    y_hold = holdout[target].to_numpy(dtype=float)
+    cur = _rmse(y_hold, booster.predict(X_hold))
+    cand = _rmse(y_hold, candidate.predict(X_hold))
+    result = {'holdout_rmse': {'current': round(cur, 4), 'candidate': round(cand, 4)}}
+    if cand > cur:
+        return None, result
+    candidate.save_model(os.path.join(MODEL_DIR, MODELS[name]))
+    return candidate, result
+
+
+def update_models(season: int = 2025, rounds: int = WARM_ROUNDS, holdout_days: int = HOLDOUT_DAYS,
+                  calibration_days: int = CALIBRATION_DAYS, upload: bool = True) -> dict:
+    """
+    Continue each saved model on the games completed since it was trained and
+    promote it if it holds up on the newest ``holdout_days`` game days.
+    Returns what happened to each model.
+    """
+    # Training-side imports, kept out of the pipeline's startup
+    import lightgbm as lgb
+
+    start = time.perf_counter()
+    _fetch_models()
+    state = load_train_state()
+    # A full retrain leaves part of the last season(s) to the first update
+    first = min([pd.Timestamp(entry['trained_through']).year for entry in state.values()] + [season])
+    games = pd.concat([load_all_teams_data(year, columns=TRAIN_COLUMNS) for year in range(first, season + 1)],
+                      ignore_index=True)
+    games = games.dropna(subset=FEATURES + ['R', 'RA', 'W/L']).copy()
+    games['Date'] = pd.to_datetime(games['Date'])
+    games = games.sort_values('Date')
+    games['Run_Diff'] = games['R'] - games['RA']
+    games['Run_Total'] = games['R'] + games['RA']
+
+    report = {}
+    promoted = []
+    for name, filename in MODELS.items():
+        path = os.path.join(MODEL_DIR, filename)
+        if not os.path.exists(path):
+            report[name] = {'status': 'skipped', 'reason': f"{path} not found; run train-models"}
+            continue
+        since = _trained_through(state, name, path)
+        unseen = games[games['Date'] > since]
+        days = sorted(unseen['Date'].unique())
+        if len(days) <= holdout_days:
+            report[name] = {'status': 'skipped', 'reason': f"{len(days)} new game day(s) since {since:%Y-%m-%d}"}
+            continue
+        cutoff = days[-holdout_days]
+        new, holdout = unseen[unseen['Date'] < cutoff], unseen[unseen['Date'] >= cutoff]
+
+        if name == 'classifier':
+            window_start = cutoff - pd.Timedelta(days=calibration_days)
+            new, window = new[new['Date'] < window_start], new[new['Date'] >= window_start]
+            model, result = _update_classifier(CompactClassifier.load(path), new, window, holdout, rounds)
+        else:
+            booster = lgb.Booster(model_file=path)
+            model, result = _update_regressor(name, booster, new, holdout, rounds)
+        if isinstance(result, str):
+            report[name] = {'status': 'skipped', 'reason': result}
+            continue
+        report[name] = {'status': 'promoted' if model is not None else 'rejected',
+                        'rows': len(new), 'holdout_rows': len(holdout), **result}
+        if model is not None:
+            mark_trained(new['Date'].max(), [name], mode="warm")
+            promoted.append(name)
+
+    for name, entry in report.items():
+        print(f"{name}: {entry}")
+    print(f"Warm-start update took {time.perf_counter() - start:.1f}s")
+
+    if upload and promoted:
+        paths = [os.path.join(MODEL_DIR, MODELS[name]) for name in promoted] + [STATE_PATH]
+        try:
+            for path in paths:
+                upload_file_to_bucket(path, dest_path=f"models/{os.path.basename(path)}")
+        except Exception as exc:
+            print(f"Failed to upload updated models to Supabase storage: {exc}")
+    return report